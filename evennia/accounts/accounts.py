@@ -463,6 +463,33 @@ class DefaultAccount(with_metaclass(TypeclassBase, AccountDB)):
         Kwargs:
             any (dict): All other keywords are passed on to the protocol.
 
+        """
+        kwargs = self._prepare_msg(text=text, from_obj=from_obj, options=options, **kwargs)
+        if kwargs is None:
+            # abort message to this account
+            return
+
+        # session relay
+        sessions = make_iter(session) if session else self.sessions.all()
+        for session in sessions:
+            session.data_out(**kwargs)
+
+    def _prepare_msg(self, text=None, from_obj=None, options=None, **kwargs):
+        """
+        Helper method for `msg` and batched sends like channel messages.
+        Calls the message hooks and sanitizes the outgoing data.
+
+        Args:
+            text (str or tuple, optional): The message to send.
+            from_obj (obj or list, optional): The sending entity(s).
+            options (dict, optional): Protocol-specific options.
+        Kwargs:
+            any (dict): All other keywords are passed on to the protocol.
+
+        Returns:
+            kwargs (dict or None): The data to send to the Session(s), or
+                `None` if `at_msg_receive` aborted the message.
+
         """
         if from_obj:
             # call hook
@@ -475,7 +502,7 @@ class DefaultAccount(with_metaclass(TypeclassBase, AccountDB)):
         try:
             if not self.at_msg_receive(text=text, **kwargs):
                 # abort message to this account
-                return
+                return None
         except Exception:
             # this may not be assigned.
             pass
@@ -490,11 +517,7 @@ class DefaultAccount(with_metaclass(TypeclassBase, AccountDB)):
                 except Exception:
                     text = repr(text)
             kwargs['text'] = text
-
-        # session relay
-        sessions = make_iter(session) if session else self.sessions.all()
-        for session in sessions:
-            session.data_out(**kwargs)
+        return kwargs
 
     def execute_cmd(self, raw_string, session=None, **kwargs):
         """
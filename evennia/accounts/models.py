@@ -38,6 +38,7 @@ _SA = object.__setattr__
 _DA = object.__delattr__
 
 _TYPECLASS = None
+_CHANNELHANDLER = None
 
 
 #------------------------------------------------------------
@@ -135,6 +136,22 @@ class AccountDB(TypedObject, AbstractUser):
     # property/field access
     #
 
+    def at_db_is_connected_postsave(self, new):
+        """
+        This is called automatically after the is_connected field was
+        saved, no matter how (such as when logging in or out). It
+        updates our online status on the channels we subscribe to.
+
+        Args:
+            new (bool): Set if this account has not yet been saved before.
+
+        """
+        global _CHANNELHANDLER
+        if not _CHANNELHANDLER:
+            from evennia.comms.channelhandler import CHANNEL_HANDLER as _CHANNELHANDLER
+        if not new:
+            _CHANNELHANDLER.update_online(self)
+
     def __str__(self):
         return smart_str("%s(account %s)" % (self.name, self.dbid))
 
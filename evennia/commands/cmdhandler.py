@@ -33,8 +33,7 @@ command line. The processing of a command works as follows:
 13. Return deferred that will fire with the return from `cmdobj.func()` (unused by default).
 """
 
-from collections import defaultdict
-from weakref import WeakValueDictionary
+from collections import defaultdict, OrderedDict
 from traceback import format_exc
 from itertools import chain
 from copy import copy
@@ -46,15 +45,15 @@ from django.conf import settings
 from evennia.commands.command import InterruptCommand
 from evennia.comms.channelhandler import CHANNELHANDLER
 from evennia.utils import logger, utils
+from evennia.utils.dbserialize import flush_saves
 from evennia.utils.utils import string_suggestions, to_unicode
 
 from django.utils.translation import ugettext as _
 
 _IN_GAME_ERRORS = settings.IN_GAME_ERRORS
 
-__all__ = ("cmdhandler", "InterruptCommand")
+__all__ = ("cmdhandler", "InterruptCommand", "CMDSET_MERGE_CACHE")
 _GA = object.__getattribute__
-_CMDSET_MERGE_CACHE = WeakValueDictionary()
 
 # tracks recursive calls by each caller
 # to avoid infinite loops (commands calling themselves)
@@ -137,6 +136,29 @@ _GET_INPUT = None
 
 # helper functions
 
+def _copy_cmdset(cmdset):
+    """
+    Make a copy of a merged cmdset to hand to a Command. The merged
+    cmdsets are cached and re-used, so a Command changing its
+    `self.cmdset` (like `make_unique` does) must not change the cached one.
+
+    Args:
+        cmdset (CmdSet): The merged cmdset.
+
+    Returns:
+        copy (CmdSet): A new cmdset with the same settings and commands.
+
+    """
+    if not hasattr(cmdset, "_duplicate"):
+        return cmdset
+    copy = cmdset._duplicate()
+    copy.actual_mergetype = cmdset.actual_mergetype
+    copy.commands = list(cmdset.commands)
+    copy.system_commands = list(cmdset.system_commands)
+    copy.merged_from = cmdset.merged_from
+    return copy
+
+
 def _msg_err(receiver, stringtuple):
     """
     Helper function for returning an error to the caller.
@@ -248,6 +270,99 @@ class ErrorReported(Exception):
         self.args = (raw_string,)
         self.raw_string = raw_string
 
+
+# merged-cmdset cache
+
+class CmdSetMergeCache(object):
+    """
+    A size-limited cache of merged cmdsets. The cache key is made from
+    the `merge_generation` of every cmdset going into the merge. Since
+    a cmdset gets a new, never re-used generation whenever it changes
+    or is added to/removed from a `CmdSetHandler`, an entry can never
+    be returned for a changed set of cmdsets; such entries instead age
+    out of the cache in least-recently-used order.
+
+    """
+
+    def __init__(self, size_limit=1000):
+        """
+        Initialize the cache.
+
+        Args:
+            size_limit (int, optional): Max number of merged cmdsets to
+                keep. Least recently used entries are dropped first.
+
+        """
+        self.size_limit = max(1, size_limit)
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, mergehash):
+        """
+        Get a merged cmdset from the cache.
+
+        Args:
+            mergehash (tuple): The merge-generations of the cmdsets merged.
+
+        Returns:
+            cmdset (CmdSet or None): The cached merged cmdset, if any.
+
+        """
+        cmdset = self._cache.pop(mergehash, None)
+        if cmdset is None:
+            self.misses += 1
+        else:
+            # re-insert to mark as most recently used
+            self._cache[mergehash] = cmdset
+            self.hits += 1
+        return cmdset
+
+    def set(self, mergehash, cmdset):
+        """
+        Store a merged cmdset, evicting the least recently used entries
+        if the cache is full.
+
+        Args:
+            mergehash (tuple): The merge-generations of the cmdsets merged.
+            cmdset (CmdSet): The merged cmdset.
+
+        """
+        cache = self._cache
+        cache[mergehash] = cmdset
+        while len(cache) > self.size_limit:
+            cache.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Empty the cache. The counters are not affected.
+
+        """
+        self._cache.clear()
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            stats (dict): With keys `size`, `size_limit`, `hits`,
+                `misses` and `evictions`.
+
+        """
+        return {"size": len(self._cache),
+                "size_limit": self.size_limit,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
+
+
+CMDSET_MERGE_CACHE = CmdSetMergeCache(size_limit=settings.CMDSET_MERGE_CACHE_SIZE)
+
 # Helper function
 
 
@@ -425,11 +540,9 @@ def get_and_merge_cmdsets(caller, session, account, obj, callertype, raw_string)
 
         if cmdsets:
             # faster to do tuple on list than to build tuple directly
-            mergehash = tuple([id(cmdset) for cmdset in cmdsets])
-            if mergehash in _CMDSET_MERGE_CACHE:
-                # cached merge exist; use that
-                cmdset = _CMDSET_MERGE_CACHE[mergehash]
-            else:
+            mergehash = tuple([cmdset.merge_generation for cmdset in cmdsets])
+            cmdset = CMDSET_MERGE_CACHE.get(mergehash)
+            if cmdset is None:
                 # we group and merge all same-prio cmdsets separately (this avoids
                 # order-dependent clashes in certain cases, such as
                 # when duplicates=True)
@@ -452,7 +565,7 @@ def get_and_merge_cmdsets(caller, session, account, obj, callertype, raw_string)
                 # store the full sets for diagnosis
                 cmdset.merged_from = cmdsets
                 # cache
-                _CMDSET_MERGE_CACHE[mergehash] = cmdset
+                CMDSET_MERGE_CACHE.set(mergehash, cmdset)
         else:
             cmdset = None
         for cset in (cset for cset in local_obj_cmdsets if cset):
@@ -549,7 +662,7 @@ def cmdhandler(called_by, raw_string, _testing=False, callertype="session", sess
             cmd.raw_cmdname = raw_cmdname
             cmd.cmdstring = cmdname  # deprecated
             cmd.args = args
-            cmd.cmdset = cmdset
+            cmd.cmdset = _copy_cmdset(cmdset)
             cmd.session = session
             cmd.account = account
             cmd.raw_string = unformatted_raw_string
@@ -617,6 +730,8 @@ def cmdhandler(called_by, raw_string, _testing=False, callertype="session", sess
             raise ErrorReported(raw_string)
         finally:
             _COMMAND_NESTING[called_by] -= 1
+            # save Attributes changed in-place by the command
+            flush_saves()
 
     raw_string = to_unicode(raw_string, force_string=True)
 
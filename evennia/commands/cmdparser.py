@@ -13,6 +13,97 @@ from evennia.utils.logger import log_trace
 
 _MULTIMATCH_REGEX = re.compile(settings.SEARCH_MULTIMATCH_REGEX, re.I + re.U)
 _CMD_IGNORE_PREFIXES = settings.CMD_IGNORE_PREFIXES
+# trie-node key holding the commands whose name ends at that node. No
+# single character can be the empty string, so this can't clash.
+_TRIE_END = ""
+
+
+class CmdNameIndex(object):
+    """
+    A prefix tree (trie) of the lower-case keys and aliases of all
+    commands in a cmdset. Looking up all command names matching the
+    start of an input string is a single walk over that string rather
+    than a check of every command name in the cmdset.
+
+    """
+
+    def __init__(self, cmdset, strip_prefixes=False):
+        """
+        Build the index.
+
+        Args:
+            cmdset (CmdSet): The (usually merged) cmdset to index.
+            strip_prefixes (bool, optional): If set, index the command names
+                with `settings.CMD_IGNORE_PREFIXES` stripped from them.
+
+        """
+        self.root = root = {}
+        for cmd in cmdset:
+            for raw_cmdname in [cmd.key] + cmd.aliases:
+                if strip_prefixes and len(raw_cmdname) > 1:
+                    cmdname = raw_cmdname.lstrip(_CMD_IGNORE_PREFIXES)
+                else:
+                    cmdname = raw_cmdname
+                if not cmdname:
+                    continue
+                node = root
+                for char in cmdname.lower():
+                    node = node.setdefault(char, {})
+                node.setdefault(_TRIE_END, []).append((cmdname, raw_cmdname, cmd))
+
+    def find(self, l_string):
+        """
+        Find all command names that the given string starts with.
+
+        Args:
+            l_string (str): The lower-case string to match against.
+
+        Returns:
+            candidates (list): A list of tuples `(cmdname, raw_cmdname, cmd)`,
+                ordered by length of `cmdname`. The `raw_cmdname` is the name
+                before any prefix-stripping.
+
+        """
+        candidates = []
+        node = self.root
+        for char in l_string:
+            node = node.get(char)
+            if node is None:
+                break
+            if _TRIE_END in node:
+                candidates.extend(node[_TRIE_END])
+        return candidates
+
+
+def get_cmdname_index(cmdset, strip_prefixes=False):
+    """
+    Get the command-name index for a cmdset, building it if needed. The
+    index is stored on the cmdset itself, so with the merged cmdsets being
+    cached by the cmdhandler, each index is normally only built once.
+
+    Args:
+        cmdset (CmdSet): The cmdset to get the index for.
+        strip_prefixes (bool, optional): Get the index of command names
+            with `settings.CMD_IGNORE_PREFIXES` stripped from them.
+
+    Returns:
+        index (CmdNameIndex): The index.
+
+    """
+    generation = getattr(cmdset, "merge_generation", None)
+    if generation is None:
+        # not a CmdSet (or an old-style one); don't cache
+        return CmdNameIndex(cmdset, strip_prefixes=strip_prefixes)
+    cache = getattr(cmdset, "_cmdname_indexes", None)
+    if not cache or cache[0] != generation or cache[1] is not cmdset.commands:
+        # the index cache is reset whenever the cmdset changes, also if
+        # its `commands` list was replaced without calling `invalidate`
+        cache = (generation, cmdset.commands, {})
+        cmdset._cmdname_indexes = cache
+    index = cache[2].get(strip_prefixes)
+    if index is None:
+        index = cache[2][strip_prefixes] = CmdNameIndex(cmdset, strip_prefixes=strip_prefixes)
+    return index
 
 
 def cmdparser(raw_string, cmdset, caller, match_index=None):
@@ -79,22 +170,12 @@ def cmdparser(raw_string, cmdset, caller, match_index=None):
         l_raw_string = raw_string.lower()
         matches = []
         try:
-            if include_prefixes:
-                # use the cmdname as-is
-                for cmd in cmdset:
-                    matches.extend([create_match(cmdname, raw_string, cmd, cmdname)
-                                    for cmdname in [cmd.key] + cmd.aliases
-                                    if cmdname and l_raw_string.startswith(cmdname.lower()) and
-                                    (not cmd.arg_regex or
-                                        cmd.arg_regex.match(l_raw_string[len(cmdname):]))])
-            else:
-                # strip prefixes set in settings
-                for cmd in cmdset:
-                    for raw_cmdname in [cmd.key] + cmd.aliases:
-                        cmdname = raw_cmdname.lstrip(_CMD_IGNORE_PREFIXES) if len(raw_cmdname) > 1 else raw_cmdname
-                        if cmdname and l_raw_string.startswith(cmdname.lower()) and \
-                                (not cmd.arg_regex or cmd.arg_regex.match(l_raw_string[len(cmdname):])):
-                            matches.append(create_match(cmdname, raw_string, cmd, raw_cmdname))
+            # if include_prefixes is set we use the cmdname as-is, otherwise
+            # we match against names stripped of the prefixes set in settings
+            index = get_cmdname_index(cmdset, strip_prefixes=not include_prefixes)
+            for cmdname, raw_cmdname, cmd in index.find(l_raw_string):
+                if not cmd.arg_regex or cmd.arg_regex.match(l_raw_string[len(cmdname):]):
+                    matches.append(create_match(cmdname, raw_string, cmd, raw_cmdname))
         except Exception:
             log_trace("cmdhandler error. raw_input:%s" % raw_string)
         return matches
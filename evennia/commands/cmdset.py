@@ -28,11 +28,17 @@ Set theory.
 """
 from future.utils import listvalues, with_metaclass
 
+from itertools import count
 from weakref import WeakKeyDictionary
 from django.utils.translation import ugettext as _
 from evennia.utils.utils import inherits_from, is_iter
 __all__ = ("CmdSet",)
 
+# source of merge-generation stamps. Every cmdset gets a new, never
+# reused stamp when it is created or modified, so the cmdhandler
+# can use the stamps of the sets it merges as a safe cache key.
+_MERGE_GENERATION = count(1)
+
 
 class _CmdSetMeta(type):
     """
@@ -178,6 +184,7 @@ class CmdSet(with_metaclass(_CmdSetMeta, object)):
 
         if key:
             self.key = key
+        self.merge_generation = next(_MERGE_GENERATION)
         self.commands = []
         self.system_commands = []
         self.actual_mergetype = self.mergetype
@@ -474,6 +481,7 @@ class CmdSet(with_metaclass(_CmdSetMeta, object)):
             cmds = [self._instantiate(c) for c in cmd]
         else:
             cmds = [self._instantiate(cmd)]
+        self.invalidate()
         commands = self.commands
         system_commands = self.system_commands
         for cmd in cmds:
@@ -505,6 +513,7 @@ class CmdSet(with_metaclass(_CmdSetMeta, object)):
                 or the key of such a command.
 
         """
+        self.invalidate()
         cmd = self._instantiate(cmd)
         if cmd.key.startswith("__"):
             try:
@@ -516,6 +525,19 @@ class CmdSet(with_metaclass(_CmdSetMeta, object)):
         else:
             self.commands = [oldcmd for oldcmd in self.commands if oldcmd != cmd]
 
+    def invalidate(self):
+        """
+        Give this cmdset a new merge-generation. This makes sure that
+        cached mergers involving this cmdset will not be used again.
+        It is called automatically whenever commands are added or
+        removed, or when the cmdset is added/removed from a
+        `CmdSetHandler`. Call it manually if changing other merge
+        properties (like `priority` or `mergetype`) of a cmdset
+        that is already in use.
+
+        """
+        self.merge_generation = next(_MERGE_GENERATION)
+
     def get(self, cmd):
         """
         Get a command from the cmdset. This is mostly useful to
@@ -585,6 +607,7 @@ class CmdSet(with_metaclass(_CmdSetMeta, object)):
                     unique[cmd.key] = cmd
             else:
                 unique[cmd.key] = cmd
+        self.invalidate()
         self.commands = listvalues(unique)
 
     def get_all_cmd_keys_and_aliases(self, caller=None):
@@ -388,6 +388,9 @@ class CmdSetHandler(object):
         new_current = None
         self.mergetype_stack = []
         for cmdset in self.cmdset_stack:
+            # the stack changed; make sure the cmdhandler does not
+            # re-use cached mergers involving these sets.
+            cmdset.invalidate()
             try:
                 # for cmdset's '+' operator, order matters.
                 new_current = cmdset + new_current
@@ -494,6 +497,7 @@ class CmdSetHandler(object):
         if not cmdset:
             # remove the last one in the stack
             cmdset = self.cmdset_stack.pop()
+            cmdset.invalidate()
             if cmdset.permanent:
                 storage = self.obj.cmdset_storage
                 storage.pop()
@@ -525,6 +529,7 @@ class CmdSetHandler(object):
                     self.obj.cmdset_storage = storage
             for cset in delcmdsets:
                 # clean the in-memory stack
+                cset.invalidate()
                 try:
                     self.cmdset_stack.remove(cset)
                 except ValueError:
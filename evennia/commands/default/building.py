@@ -2818,7 +2818,8 @@ class CmdSpawn(COMMAND_DEFAULT_CLASS):
       update - find existing objects with the same prototype_key and update
                them with latest version of given prototype. If given with /save,
                will auto-update all objects with the old version of the prototype
-               without asking first.
+               without asking first. The objects are updated in the background,
+               continuing after a reload.
       edit, olc - create/manipulate prototype in a menu interface.
 
     Example:
@@ -2896,6 +2897,25 @@ class CmdSpawn(COMMAND_DEFAULT_CLASS):
                     return
             return prototype
 
+        def _update_existing(prototype_key, objects):
+            # update the objects in the background, reporting the progress
+            caller = self.caller
+
+            def _progress(done, total):
+                caller.msg("Updating objects of prototype {}: {}/{} ...".format(
+                    prototype_key, done, total))
+
+            try:
+                deferred = spawner.start_prototype_update(
+                    prototype_key, objects=objects, progress=_progress)
+            except RuntimeError as err:
+                caller.msg("|r{}|n".format(err))
+                return
+            deferred.addCallbacks(
+                lambda n_updated: caller.msg("{} objects were updated.".format(n_updated)),
+                lambda failure: caller.msg("|rError updating objects of prototype {}.|n".format(
+                    prototype_key)))
+
         def _search_show_prototype(query, prototypes=None):
             # prototype detail
             if not prototypes:
@@ -3020,8 +3040,7 @@ class CmdSpawn(COMMAND_DEFAULT_CLASS):
                         caller.msg("|rNo update was done of existing objects. "
                                    "Use @spawn/update <key> to apply later as needed.|n")
                         return
-                n_updated = spawner.batch_update_objects_with_prototype(existing_objects, key)
-                caller.msg("{} objects were updated.".format(n_updated))
+                _update_existing(prototype_key, existing_objects)
             return
 
         if not self.args:
@@ -3064,8 +3083,7 @@ class CmdSpawn(COMMAND_DEFAULT_CLASS):
                 if answer.lower() in ["n", "no"]:
                     caller.msg("|rUpdate cancelled.")
                     return
-                n_updated = spawner.batch_update_objects_with_prototype(existing_objects, key)
-                caller.msg("{} objects were updated.".format(n_updated))
+                _update_existing(key, existing_objects)
 
         # A direct creation of an object from a given prototype
 
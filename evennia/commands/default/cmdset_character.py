@@ -49,6 +49,7 @@ class CharacterCmdSet(CmdSet):
         self.add(system.CmdServerLoad())
         # self.add(system.CmdPs())
         self.add(system.CmdTickers())
+        self.add(system.CmdMaintenance())
 
         # Admin commands
         self.add(admin.CmdBoot())
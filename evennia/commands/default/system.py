@@ -698,6 +698,13 @@ class CmdServerLoad(COMMAND_DEFAULT_CLASS):
     non-persistent storage schemes. The total amount of cached objects
     are displayed plus a breakdown of database object types.
 
+    The |wCmdset merge cache|n shows how often the merged command sets
+    could be re-used rather than re-merged for a command. The |wAMP
+    traffic|n shows the messages and data sent from the Server to
+    the Portal. The |wPortal output buffers|n show how many messages
+    the Portal sent to the clients and in how many network writes.
+    They are shown as soon as the Portal has answered.
+
     The |wflushmem|n switch allows to flush the object cache. Please
     note that due to how Python's memory management works, releasing
     caches may not show you a lower Residual/Virtual memory footprint,
@@ -810,9 +817,52 @@ class CmdServerLoad(COMMAND_DEFAULT_CLASS):
 
         string += "\n|w Entity idmapper cache:|n %i items\n%s" % (total_num, memtable)
 
+        # merged-cmdset cache statistics
+        from evennia.commands.cmdhandler import CMDSET_MERGE_CACHE
+        stats = CMDSET_MERGE_CACHE.stats()
+        lookups = stats["hits"] + stats["misses"]
+        cmdsettable = EvTable("property", "statistic", align="l")
+        cmdsettable.add_row("Cached mergers", "%i (max %i)" % (stats["size"], stats["size_limit"]))
+        cmdsettable.add_row("Hits / misses", "%i / %i (%.2f%% hits)" % (
+            stats["hits"], stats["misses"],
+            (float(stats["hits"]) / lookups * 100) if lookups else 0))
+        cmdsettable.add_row("Evictions", "%i" % stats["evictions"])
+        string += "\n|w Cmdset merge cache:|n\n%s" % cmdsettable
+
+        # Server->Portal AMP traffic statistics
+        from evennia.server.portal.amp import get_codec
+        stats = get_codec().stats()
+        amptable = EvTable("property", "statistic", align="l")
+        amptable.add_row("Codec", stats["codec"])
+        amptable.add_row("Messages sent", "%i in %i AMP messages (%.2f/s)" % (
+            stats["messages"], stats["boxes"], stats["messages_per_sec"]))
+        amptable.add_row("Data sent", "%i bytes, %i on the wire (%.2f bytes/s)" % (
+            stats["bytes_in"], stats["bytes_out"], stats["bytes_per_sec"]))
+        string += "\n|w AMP traffic:|n\n%s" % amptable
+
         # return to caller
         self.caller.msg(string)
 
+        # the Portal's output buffer statistics are shown when they arrive
+        if getattr(SESSIONS.server, "amp_protocol", None):
+            SESSIONS.get_portal_output_stats().addCallback(self.show_portal_output_stats)
+
+    def show_portal_output_stats(self, stats):
+        """
+        Show the output buffer statistics of the Portal's sessions.
+
+        Args:
+            stats (dict): `{sessid: {"messages": int, "writes": int}}`.
+
+        """
+        messages = sum(sessstats["messages"] for sessstats in stats.values())
+        writes = sum(sessstats["writes"] for sessstats in stats.values())
+        outputtable = EvTable("property", "statistic", align="l")
+        outputtable.add_row("Sessions", "%i" % len(stats))
+        outputtable.add_row("Messages / writes", "%i / %i (%.2f messages per write)" % (
+            messages, writes, (float(messages) / writes) if writes else 0))
+        self.caller.msg("|w Portal output buffers:|n\n%s" % outputtable)
+
 
 class CmdTickers(COMMAND_DEFAULT_CLASS):
     """
@@ -825,6 +875,11 @@ class CmdTickers(COMMAND_DEFAULT_CLASS):
     using the TickerHandler. This is merely a convenience function for
     inspecting the current status.
 
+    The timing table shows, per interval, the time spent per tick over
+    the last ticks (median, 99th percentile and max) and the number of
+    overruns - ticks that took longer than the time budget or, if none
+    is set, longer than the time until the next tick.
+
     """
     key = "@tickers"
     help_category = "System"
@@ -844,4 +899,59 @@ class CmdTickers(COMMAND_DEFAULT_CLASS):
                           sub[1] if sub[1] else sub[2],
                           sub[4] or "[Unset]",
                           "*" if sub[5] else "-")
-        self.caller.msg("|wActive tickers|n:\n" + unicode(table))
+
+        def _msecs(secs):
+            return "-" if secs is None else "%.1f" % (1000 * secs)
+
+        stats_table = EvTable("interval (s)", "subscribers", "phases", "ticks",
+                              "p50 (ms)", "p99 (ms)", "max (ms)", "overruns")
+        for interval, stats in sorted(TICKER_HANDLER.stats().items()):
+            stats_table.add_row(interval, stats["subscribers"], stats["slots"], stats["ticks"],
+                                _msecs(stats["p50"]), _msecs(stats["p99"]), _msecs(stats["max"]),
+                                stats["overruns"])
+        self.caller.msg("|wActive tickers|n:\n%s\n|wTicker timing|n:\n%s"
+                        % (unicode(table), unicode(stats_table)))
+
+
+class CmdMaintenance(COMMAND_DEFAULT_CLASS):
+    """
+    View the server's maintenance jobs
+
+    Usage:
+      @maintenance
+
+    Lists the jobs the server runs regularly in the background, like
+    flushing the object cache and validating scripts, with how long
+    their last run took. The duration is the time from start to end,
+    the work time is how much of that the job actually kept the
+    server busy.
+
+    """
+    key = "@maintenance"
+    help_category = "System"
+    locks = "cmd:perm(maintenance) or perm(Developer)"
+
+    def func(self):
+        from evennia.server.maintenance import MAINTENANCE_HANDLER
+        now = time.time()
+        table = EvTable("job", "every", "runs", "last run", "duration", "work time",
+                        "steps", "status", border="cells")
+        for job in MAINTENANCE_HANDLER.all():
+            stats = job.stats()
+            if stats["running"]:
+                status = "running"
+            elif stats["errors"]:
+                status = "|r%i errors|n" % stats["errors"]
+            else:
+                status = "idle"
+            if stats["last_duration"] is None:
+                duration, runtime, steps = "-", "-", "-"
+            else:
+                duration = "%.3fs" % stats["last_duration"]
+                runtime = "%.3fs" % stats["last_runtime"]
+                steps = stats["last_steps"]
+            last_start = stats["last_start"]
+            table.add_row(job.key, utils.time_format(job.interval * 60, 4), stats["runs"],
+                          "%s ago" % utils.time_format(now - last_start, 4) if last_start else "-",
+                          duration, runtime, steps, status)
+        self.caller.msg("|wMaintenance jobs|n:\n" + unicode(table))
@@ -228,6 +228,23 @@ class TestSystem(CommandTest):
     def test_server_load(self):
         self.call(system.CmdServerLoad(), "", "Server CPU and Memory load:")
 
+    def test_server_load_portal_output(self):
+        from evennia.server.sessionhandler import SESSIONS
+        with mock.patch.object(SESSIONS, "server", Mock()):
+            msg = self.call(system.CmdServerLoad(), "")
+            # the portal answers later
+            SESSIONS.server.amp_protocol.send_AdminServer2Portal.assert_called_once()
+            self.assertFalse("Portal output buffers" in msg)
+            self.char1.msg = Mock()
+            SESSIONS.portal_output_stats({1: {"messages": 6, "writes": 2},
+                                          2: {"messages": 3, "writes": 1}})
+            text = self.char1.msg.call_args[0][0]
+            self.assertTrue("Portal output buffers" in text)
+            self.assertTrue("9 / 3 (3.00 messages per write)" in text)
+
+    def test_maintenance(self):
+        self.call(system.CmdMaintenance(), "", "Maintenance jobs:")
+
 
 class TestAdmin(CommandTest):
     def test_emit(self):
@@ -376,3 +376,194 @@ class TestGetAndMergeCmdSets(TwistedTestCase, EvenniaTest):
             self.assertEqual(len(cmdset.commands), 9)
         deferred.addCallback(_callback)
         return deferred
+
+    def test_merge_cache(self):
+        a, b = self.cmdset_a, self.cmdset_b
+        a.no_channels = True
+        self.set_cmdsets(self.obj1, a, b)
+        hits = cmdhandler.CMDSET_MERGE_CACHE.hits
+        deferred = cmdhandler.get_and_merge_cmdsets(self.obj1, None, None, self.obj1, "object", "")
+
+        def _callback(cmdset):
+            # a second merge of the same sets is a cache hit
+            deferred2 = cmdhandler.get_and_merge_cmdsets(self.obj1, None, None, self.obj1, "object", "")
+            deferred2.addCallback(lambda cmdset2: self.assertEqual(cmdset, cmdset2))
+            self.assertEqual(cmdhandler.CMDSET_MERGE_CACHE.hits, hits + 1)
+            # changing the stack invalidates the cached merger
+            self.obj1.cmdset.remove(b)
+            deferred3 = cmdhandler.get_and_merge_cmdsets(self.obj1, None, None, self.obj1, "object", "")
+            deferred3.addCallback(lambda cmdset3: self.assertNotEqual(cmdset, cmdset3))
+            self.assertEqual(cmdhandler.CMDSET_MERGE_CACHE.hits, hits + 1)
+        deferred.addCallback(_callback)
+        return deferred
+
+
+class TestChannelHandlerIndex(EvenniaTest):
+    "Test the channelhandler's reverse subscriber index"
+
+    def test_incremental_cmdsets(self):
+        import evennia
+        from evennia.comms.channelhandler import CHANNEL_HANDLER
+        chan1 = evennia.create_channel("indextest1", locks="listen:all();send:all()")
+        CHANNEL_HANDLER.update()
+        chan1.connect(self.account)
+        rebuilds = CHANNEL_HANDLER.stats()["rebuilds"]
+        cmdset = CHANNEL_HANDLER.get_cmdset(self.account)
+        self.assertEqual([cmd.key for cmd in cmdset.commands], ["indextest1"])
+        other = CHANNEL_HANDLER.get_cmdset(self.account2)
+        self.assertEqual(CHANNEL_HANDLER.stats()["rebuilds"], rebuilds + 2)
+        # a new channel or a full update does not invalidate anyone
+        chan2 = evennia.create_channel("indextest2", locks="listen:all();send:all()")
+        CHANNEL_HANDLER.update()
+        self.assertTrue(CHANNEL_HANDLER.get_cmdset(self.account) is cmdset)
+        self.assertTrue(CHANNEL_HANDLER.get_cmdset(self.account2) is other)
+        # subscribing only invalidates the subscriber
+        chan2.connect(self.account)
+        self.assertTrue(CHANNEL_HANDLER.get_cmdset(self.account2) is other)
+        cmdset = CHANNEL_HANDLER.get_cmdset(self.account)
+        self.assertEqual(sorted(cmd.key for cmd in cmdset.commands), ["indextest1", "indextest2"])
+        self.assertEqual(CHANNEL_HANDLER.stats()["rebuilds"], rebuilds + 3)
+        # deleting a channel invalidates its subscribers
+        chan1.delete()
+        cmdset = CHANNEL_HANDLER.get_cmdset(self.account)
+        self.assertEqual([cmd.key for cmd in cmdset.commands], ["indextest2"])
+        self.assertTrue(CHANNEL_HANDLER.get_cmdset(self.account2) is other)
+        chan2.delete()
+
+    def test_iter_update_keeps_new_channels(self):
+        import evennia
+        from evennia.comms.channelhandler import CHANNEL_HANDLER
+        chan1 = evennia.create_channel("itertest1", locks="listen:all();send:all()")
+        CHANNEL_HANDLER.update()
+        updater = CHANNEL_HANDLER.iter_update()
+        next(updater)
+        # a channel created while the update runs
+        chan2 = evennia.create_channel("itertest2", locks="listen:all();send:all()")
+        CHANNEL_HANDLER.add(chan2)
+        list(updater)
+        self.assertEqual(CHANNEL_HANDLER.get("itertest1"), [chan1])
+        self.assertEqual(CHANNEL_HANDLER.get("itertest2"), [chan2])
+        chan1.delete()
+        chan2.delete()
+
+    def test_update_online_after_flush(self):
+        import evennia
+        from evennia.comms.channelhandler import CHANNEL_HANDLER
+        from evennia.comms.models import ChannelDB
+        chan = evennia.create_channel("onlinetest", locks="listen:all();send:all()")
+        CHANNEL_HANDLER.update()
+        chan.connect(self.account)
+        ChannelDB.flush_instance_cache(force=True)
+        channel = ChannelDB.objects.get_id(chan.id)
+        self.assertFalse(channel is chan)
+        with mock.patch.object(type(self.account), "is_connected",
+                               new_callable=mock.PropertyMock, return_value=True) as is_connected:
+            self.assertEqual(channel.subscriptions.online(), [self.account])
+            # the account logs out
+            is_connected.return_value = False
+            CHANNEL_HANDLER.update_online(self.account)
+            self.assertEqual(channel.subscriptions.online(), [])
+        # re-adding the unchanged channel keeps the command but updates its channel
+        CHANNEL_HANDLER.update()
+        self.assertTrue(CHANNEL_HANDLER._cached_channel_ids[channel.id].obj is channel)
+        channel.delete()
+
+
+class TestCmdSetMergeCache(TestCase):
+    "Test the merged-cmdset cache"
+
+    def test_lru_eviction(self):
+        cache = cmdhandler.CmdSetMergeCache(size_limit=2)
+        cache.set((1,), "a")
+        cache.set((2,), "b")
+        self.assertEqual(cache.get((1,)), "a")
+        cache.set((3,), "c")
+        self.assertEqual(cache.get((2,)), None)
+        self.assertEqual(cache.get((1,)), "a")
+        self.assertEqual(cache.get((3,)), "c")
+        self.assertEqual(cache.stats(), {"size": 2, "size_limit": 2, "hits": 3,
+                                         "misses": 1, "evictions": 1})
+
+    def test_generation(self):
+        cmdset = _CmdSetA()
+        generation = cmdset.merge_generation
+        cmdset.add(_CmdB("A"))
+        self.assertNotEqual(generation, cmdset.merge_generation)
+        generation = cmdset.merge_generation
+        cmdset.remove(_CmdB("A"))
+        self.assertNotEqual(generation, cmdset.merge_generation)
+        generation = cmdset.merge_generation
+        cmdset.make_unique(None)
+        self.assertNotEqual(generation, cmdset.merge_generation)
+
+    def test_command_copy(self):
+        cmdset = _CmdSetA()
+        # a doublet, like from merging with duplicates=True
+        cmdset.commands.append(_CmdA("B"))
+        generation = cmdset.merge_generation
+        copy = cmdhandler._copy_cmdset(cmdset)
+        self.assertEqual((copy.key, copy.priority), (cmdset.key, cmdset.priority))
+        # a command cleaning up its cmdset does not touch the cached one
+        copy.make_unique(None)
+        self.assertEqual(len(copy.commands), 4)
+        self.assertEqual(len(cmdset.commands), 5)
+        self.assertEqual(generation, cmdset.merge_generation)
+
+
+# test cmdparser
+
+import mock
+from evennia.commands import cmdparser
+
+
+class _CmdLook(Command):
+    key = "look"
+    aliases = ["l", "@ls"]
+
+
+class _CmdLookAt(Command):
+    key = "look at"
+
+
+class _CmdSetParse(CmdSet):
+    key = "Parse"
+
+    def at_cmdset_creation(self):
+        self.add(_CmdLook())
+        self.add(_CmdLookAt())
+
+
+class TestCmdParser(TestCase):
+    "Test the default cmdparser"
+
+    def setUp(self):
+        self.cmdset = _CmdSetParse()
+        self.caller = mock.MagicMock()
+
+    def test_index(self):
+        index = cmdparser.get_cmdname_index(self.cmdset)
+        self.assertEqual([tup[0] for tup in index.find("look at me")], ["l", "look", "look at"])
+        self.assertEqual(index.find("@ls"), [("@ls", "@ls", self.cmdset.get("look"))])
+        index = cmdparser.get_cmdname_index(self.cmdset, strip_prefixes=True)
+        self.assertEqual(index.find("ls"), [("l", "l", self.cmdset.get("look")),
+                                            ("ls", "@ls", self.cmdset.get("look"))])
+        # the index is cached until the cmdset changes
+        self.assertTrue(index is cmdparser.get_cmdname_index(self.cmdset, strip_prefixes=True))
+        self.cmdset.remove(_CmdLookAt())
+        self.assertFalse(index is cmdparser.get_cmdname_index(self.cmdset, strip_prefixes=True))
+        index = cmdparser.get_cmdname_index(self.cmdset)
+        # replacing the commands list directly also resets the index
+        self.cmdset.commands = [_CmdLookAt()]
+        index2 = cmdparser.get_cmdname_index(self.cmdset)
+        self.assertFalse(index is index2)
+        self.assertEqual([tup[0] for tup in index2.find("look at me")], ["look at"])
+
+    def test_cmdparser(self):
+        matches = cmdparser.cmdparser("look at me", self.cmdset, self.caller)
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0][:2], ("look at", " me"))
+        matches = cmdparser.cmdparser("LOOK here", self.cmdset, self.caller)
+        self.assertEqual(matches[0][:2], ("look", " here"))
+        matches = cmdparser.cmdparser("@look", self.cmdset, self.caller)
+        self.assertEqual(matches[0][:2], ("look", ""))
+        self.assertEqual(cmdparser.cmdparser("jump", self.cmdset, self.caller), [])
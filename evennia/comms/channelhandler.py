@@ -165,6 +165,12 @@ class ChannelHandler(object):
     done automatically if creating the channel with
     evennia.create_channel())
 
+    The handler keeps a reverse index of which channels each
+    subscriber listens to. This means a subscriber's channel cmdset
+    is built without checking every channel, and that a change to a
+    channel or a subscription only invalidates the cached cmdsets of
+    the subscribers actually affected.
+
     """
 
     def __init__(self):
@@ -175,6 +181,11 @@ class ChannelHandler(object):
         self._cached_channel_cmds = {}
         self._cached_cmdsets = {}
         self._cached_channels = {}
+        # {channel_id: channelcmd}
+        self._cached_channel_ids = {}
+        # {subscriber: set(channel_ids)}, built on first use
+        self._subscriber_index = None
+        self.num_rebuilds = 0
 
     def __str__(self):
         """
@@ -191,6 +202,118 @@ class ChannelHandler(object):
         self._cached_channel_cmds = {}
         self._cached_cmdsets = {}
         self._cached_channels = {}
+        self._cached_channel_ids = {}
+        self._subscriber_index = None
+
+    def _get_subscriber_index(self):
+        """
+        Get the reverse subscriber index, building it from the
+        channels' subscriptions if needed.
+
+        Returns:
+            index (dict): A mapping `{subscriber: set(channel_ids)}`.
+
+        """
+        if self._subscriber_index is None:
+            index = {}
+            for channel in self._cached_channel_cmds:
+                for subscriber in channel.subscriptions.all():
+                    index.setdefault(subscriber, set()).add(channel.id)
+            self._subscriber_index = index
+        return self._subscriber_index
+
+    def _invalidate_channel(self, channel_id):
+        """
+        Drop the cached cmdsets of everyone subscribing to a channel.
+
+        Args:
+            channel_id (int): The id of the channel that changed.
+
+        """
+        if self._subscriber_index is None:
+            # no cmdsets can have been cached yet
+            return
+        stale = False
+        for subscriber, channel_ids in self._subscriber_index.iteritems():
+            if not subscriber.pk:
+                stale = True
+            elif channel_id in channel_ids:
+                self._cached_cmdsets.pop(subscriber, None)
+        if stale:
+            # drop subscribers deleted since they were indexed
+            self._subscriber_index = {subscriber: channel_ids for subscriber, channel_ids
+                                      in self._subscriber_index.iteritems() if subscriber.pk}
+            self._cached_cmdsets = {subscriber: chan_cmdset for subscriber, chan_cmdset
+                                    in self._cached_cmdsets.iteritems() if subscriber.pk}
+
+    def add_subscriber(self, channel, subscriber):
+        """
+        Register that an entity subscribed to a channel. This is
+        called by the channel's subscription handler.
+
+        Args:
+            channel (Channel): The channel subscribed to.
+            subscriber (Account or Object): The new subscriber.
+
+        """
+        if self._subscriber_index is not None:
+            self._subscriber_index.setdefault(subscriber, set()).add(channel.id)
+        self._cached_cmdsets.pop(subscriber, None)
+
+    def remove_subscriber(self, channel, subscriber):
+        """
+        Register that an entity unsubscribed from a channel. This is
+        called by the channel's subscription handler.
+
+        Args:
+            channel (Channel): The channel unsubscribed from.
+            subscriber (Account or Object): The old subscriber.
+
+        """
+        if self._subscriber_index is not None:
+            channel_ids = self._subscriber_index.get(subscriber)
+            if channel_ids is not None:
+                channel_ids.discard(channel.id)
+                if not channel_ids:
+                    del self._subscriber_index[subscriber]
+        self._cached_cmdsets.pop(subscriber, None)
+
+    def update_online(self, subscriber):
+        """
+        Update the online status of a subscriber on all channels it
+        subscribes to. This is called when an account logs in or out
+        or an object is puppeted or unpuppeted.
+
+        Args:
+            subscriber (Account or Object): The entity whose
+                connection changed.
+
+        """
+        global _CHANNELDB
+        if not _CHANNELDB:
+            from evennia.comms.models import ChannelDB as _CHANNELDB
+        for channel_id in self._get_subscriber_index().get(subscriber, ()):
+            if channel_id in self._cached_channel_ids:
+                # the command's channel may have been flushed from the
+                # idmapper cache, so we look up the live one.
+                channel = _CHANNELDB.objects.get_id(channel_id)
+                if channel:
+                    channel.subscriptions.update_online(subscriber)
+
+    def stats(self):
+        """
+        Report on the state of the handler.
+
+        Returns:
+            stats (dict): Number of `channels`, indexed `subscribers`
+                and `cached_cmdsets`, as well as the total number of
+                channel cmdset `rebuilds` done since the server started.
+
+        """
+        return {"channels": len(self._cached_channel_ids),
+                "subscribers": len(self._subscriber_index or ()),
+                "cached_cmdsets": len(self._cached_cmdsets),
+                "rebuilds": self.num_rebuilds}
 
     def add(self, channel):
         """
@@ -206,6 +329,9 @@ class ChannelHandler(object):
             handled automatically by one of the deletion methos of
             the Channel itself.
 
+            Re-adding a channel that has not changed keeps the old
+            channel command, so no cached cmdsets are invalidated.
+
         """
         global _CHANNEL_COMMAND_CLASS
         if not _CHANNEL_COMMAND_CLASS:
@@ -225,9 +351,20 @@ class ChannelHandler(object):
                                          lower_channelkey=key.strip().lower(),
                                          channeldesc=channel.attributes.get(
                                             "desc", default="").strip())
+        old_cmd = self._cached_channel_ids.get(channel.id)
+        if old_cmd and (old_cmd.key, old_cmd.aliases, old_cmd.locks, old_cmd.__doc__) == \
+                (cmd.key, cmd.aliases, cmd.locks, cmd.__doc__):
+            cmd = old_cmd
+            # the channel may be a new instance after an idmapper flush
+            cmd.obj = channel
+        else:
+            self._invalidate_channel(channel.id)
+            self._cached_channel_ids[channel.id] = cmd
+            if self._subscriber_index is not None:
+                for subscriber in channel.subscriptions.all():
+                    self._subscriber_index.setdefault(subscriber, set()).add(channel.id)
         self._cached_channel_cmds[channel] = cmd
         self._cached_channels[key] = channel
-        self._cached_cmdsets = {}
     add_channel = add  # legacy alias
 
     def remove(self, channel):
@@ -247,15 +384,50 @@ class ChannelHandler(object):
         Updates the handler completely, including removing old removed
         Channel objects. This must be called after deleting a Channel.
 
+        """
+        for _ in self.iter_update():
+            pass
+
+    def iter_update(self):
+        """
+        Update the handler like `update`, one channel per step. This
+        is the server's `channel_update` maintenance job. Removed
+        channels are dropped first; channels added or renamed while
+        the update runs are kept under their current keys. Commands
+        and cmdsets of unchanged channels are re-used.
+
+        Yields:
+            channel (Channel): Each channel, after it was re-added.
+
         """
         global _CHANNELDB
         if not _CHANNELDB:
             from evennia.comms.models import ChannelDB as _CHANNELDB
-        self._cached_channel_cmds = {}
-        self._cached_cmdsets = {}
-        self._cached_channels = {}
-        for channel in _CHANNELDB.objects.get_all_channels():
-            self.add(channel)
+        channels = list(_CHANNELDB.objects.get_all_channels())
+        channel_ids = set(channel.id for channel in channels)
+        for channel_id in list(self._cached_channel_ids):
+            if channel_id not in channel_ids:
+                # a removed channel
+                self._invalidate_channel(channel_id)
+                del self._cached_channel_ids[channel_id]
+                if self._subscriber_index is not None:
+                    for subscriber_channel_ids in self._subscriber_index.itervalues():
+                        subscriber_channel_ids.discard(channel_id)
+        self._cached_channel_cmds = dict((channel, cmd) for channel, cmd
+                                         in self._cached_channel_cmds.items()
+                                         if channel.id in channel_ids)
+        for key, channel in list(self._cached_channels.items()):
+            if channel.id not in channel_ids:
+                del self._cached_channels[key]
+        for channel in channels:
+            if channel.pk:
+                self.add(channel)
+                yield channel
+        # drop the old keys of renamed and deleted channels, but keep
+        # channels added meanwhile
+        for key, channel in list(self._cached_channels.items()):
+            if not channel.pk or key != channel.key:
+                del self._cached_channels[key]
 
     def get(self, channelname=None):
         """
@@ -292,9 +464,11 @@ class ChannelHandler(object):
         else:
             # create a new cmdset holding all viable channels
             chan_cmdset = None
-            chan_cmds = [channelcmd for channel, channelcmd in self._cached_channel_cmds.iteritems()
-                         if channel.subscriptions.has(source_object) and
-                         channelcmd.access(source_object, 'send')]
+            chan_cmds = []
+            for channel_id in sorted(self._get_subscriber_index().get(source_object, ())):
+                channelcmd = self._cached_channel_ids.get(channel_id)
+                if channelcmd and channelcmd.access(source_object, 'send'):
+                    chan_cmds.append(channelcmd)
             if chan_cmds:
                 chan_cmdset = cmdset.CmdSet()
                 chan_cmdset.key = 'ChannelCmdSet'
@@ -303,6 +477,7 @@ class ChannelHandler(object):
                 for cmd in chan_cmds:
                     chan_cmdset.add(cmd)
             self._cached_cmdsets[source_object] = chan_cmdset
+            self.num_rebuilds += 1
             return chan_cmdset
 
 
@@ -9,6 +9,8 @@ from evennia.utils import logger
 from evennia.utils.utils import make_iter
 from future.utils import with_metaclass
 _CHANNEL_HANDLER = None
+_SESSIONS = None
+_DEFAULT_MSGS = None
 
 
 class DefaultChannel(with_metaclass(TypeclassBase, ChannelDB)):
@@ -19,6 +21,10 @@ class DefaultChannel(with_metaclass(TypeclassBase, ChannelDB)):
     """
     objects = ChannelManager()
 
+    # in-memory set of the muted subscribers, loaded from the
+    # mute_list Attribute on first use
+    _muted = None
+
     def at_first_save(self):
         """
         Called by the typeclass system the very first time the channel
@@ -94,10 +100,22 @@ class DefaultChannel(with_metaclass(TypeclassBase, ChannelDB)):
     def mutelist(self):
         return self.db.mute_list or []
 
+    def _get_muted(self):
+        """
+        Get the muted subscribers as a set, for fast lookups.
+
+        Returns:
+            muted (set): The muted subscribers.
+
+        """
+        if self._muted is None:
+            self._muted = set(self.mutelist)
+        return self._muted
+
     @property
     def wholist(self):
         subs = self.subscriptions.all()
-        muted = list(self.mutelist)
+        muted = self._get_muted()
         listening = [ob for ob in subs if ob.is_connected and ob not in muted]
         if subs:
             # display listening subscribers in bold
@@ -118,10 +136,12 @@ class DefaultChannel(with_metaclass(TypeclassBase, ChannelDB)):
                 overriding the call (unused by default).
 
         """
-        mutelist = self.mutelist
-        if subscriber not in mutelist:
+        muted = self._get_muted()
+        if subscriber not in muted:
+            mutelist = self.mutelist
             mutelist.append(subscriber)
             self.db.mute_list = mutelist
+            muted.add(subscriber)
             return True
         return False
 
@@ -136,10 +156,12 @@ class DefaultChannel(with_metaclass(TypeclassBase, ChannelDB)):
                 overriding the call (unused by default).
 
         """
-        mutelist = self.mutelist
-        if subscriber in mutelist:
+        muted = self._get_muted()
+        if subscriber in muted:
+            mutelist = self.mutelist
             mutelist.remove(subscriber)
             self.db.mute_list = mutelist
+            muted.discard(subscriber)
             return True
         return False
 
@@ -271,22 +293,62 @@ class DefaultChannel(with_metaclass(TypeclassBase, ChannelDB)):
         Notes:
             This is also where logging happens, if enabled.
 
+            Receivers using the default `msg()` method of Accounts and
+            Objects are sent the message in batches, so it is normally
+            only sent across to the Portal once. Receivers with a custom
+            `msg()` method have it called as normal. The message is still
+            delivered in the order of the subscribers.
+
         """
+        global _SESSIONS, _DEFAULT_MSGS
+        if not _SESSIONS:
+            from evennia.server.sessionhandler import SESSIONS as _SESSIONS
+        if not _DEFAULT_MSGS:
+            from evennia.accounts.accounts import DefaultAccount
+            from evennia.objects.objects import DefaultObject
+            _DEFAULT_MSGS = (DefaultAccount.msg.__func__, DefaultObject.msg.__func__)
+
         # get all accounts or objects connected to this channel and send to them
         if online:
             subs = self.subscriptions.online()
         else:
             subs = self.subscriptions.all()
+        muted = self._get_muted()
+        message = msgobj.message
+        sessions = []
+
+        def _send_batch():
+            "Send to the sessions gathered so far"
+            if sessions:
+                _SESSIONS.data_out_multi(list(sessions), text=message,
+                                         options={"from_channel": self.id})
+                del sessions[:]
+
         for entity in subs:
             # if the entity is muted, we don't send them a message
-            if entity in self.mutelist:
+            if entity in muted:
                 continue
+            # note our addition of the from_channel keyword here. This could be checked
+            # by a custom account.msg() to treat channel-receives differently.
+            options = {"from_channel": self.id}
             try:
-                # note our addition of the from_channel keyword here. This could be checked
-                # by a custom account.msg() to treat channel-receives differently.
-                entity.msg(msgobj.message, from_obj=msgobj.senders, options={"from_channel": self.id})
+                if getattr(entity.msg, "__func__", None) not in _DEFAULT_MSGS:
+                    # a custom msg method must be called separately
+                    _send_batch()
+                    entity.msg(message, from_obj=msgobj.senders, options=options)
+                    continue
+                sendkwargs = entity._prepare_msg(text=message, from_obj=msgobj.senders,
+                                                 options=options)
+                if sendkwargs is not None and sendkwargs.get("text") == message:
+                    sessions.extend(entity.sessions.all())
+                elif sendkwargs is not None:
+                    # a hook changed the outgoing data; send it separately
+                    _send_batch()
+                    for session in entity.sessions.all():
+                        session.data_out(**sendkwargs)
             except AttributeError as e:
                 logger.log_trace("%s\nCannot send msg to '%s'." % (e, entity))
+        _send_batch()
 
         if msgobj.keep_log:
             # log to file
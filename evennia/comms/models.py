@@ -18,8 +18,10 @@ connect to channels by use of a ChannelConnect object (this object is
 necessary to easily be able to delete connections on the fly).
 """
 from builtins import object
+from collections import OrderedDict
 
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
 from django.db import models
 from evennia.typeclasses.models import TypedObject
@@ -470,6 +472,10 @@ class SubscriptionHandler(object):
     This handler manages subscriptions to the
     channel and hides away which type of entity is
     subscribing (Account or Object)
+
+    The subscribers currently online are cached and kept up to date
+    as subscribers connect and disconnect, so they don't have to be
+    looked up every time a message is sent.
     """
 
     def __init__(self, obj):
@@ -482,6 +488,8 @@ class SubscriptionHandler(object):
         """
         self.obj = obj
         self._cache = None
+        # {subscriber: online recipient}, built on first use
+        self._online = None
 
     def _recache(self):
         self._cache = {account: True for account in self.obj.db_account_subscriptions.all()
@@ -532,8 +540,11 @@ class SubscriptionHandler(object):
                     self.obj.db_object_subscriptions.add(subscriber)
                 elif clsname == "AccountDB":
                     self.obj.db_account_subscriptions.add(subscriber)
-                _CHANNELHANDLER._cached_cmdsets.pop(subscriber, None)
+                _CHANNELHANDLER.add_subscriber(self.obj, subscriber)
         self._recache()
+        for subscriber in make_iter(entity):
+            if subscriber:
+                self.update_online(subscriber)
 
     def remove(self, entity):
         """
@@ -555,8 +566,11 @@ class SubscriptionHandler(object):
                     self.obj.db_account_subscriptions.remove(entity)
                 elif clsname == "ObjectDB":
                     self.obj.db_object_subscriptions.remove(entity)
-                _CHANNELHANDLER._cached_cmdsets.pop(subscriber, None)
+                _CHANNELHANDLER.remove_subscriber(self.obj, subscriber)
         self._recache()
+        for subscriber in make_iter(entity):
+            if subscriber:
+                self.update_online(subscriber)
 
     def all(self):
         """
@@ -572,6 +586,45 @@ class SubscriptionHandler(object):
         return self._cache
     get = all  # alias
 
+    def _get_online_recipient(self, subscriber):
+        """
+        Find who should receive messages for a subscriber while online.
+
+        Args:
+            subscriber (Account or Object): The subscriber to check.
+
+        Returns:
+            recipient (Account, Object or None): The subscriber or the
+                account puppeting it, or `None` if offline.
+
+        Raises:
+            ObjectDoesNotExist: If the subscriber was deleted.
+
+        """
+        if hasattr(subscriber, 'account') and subscriber.account:
+            subscriber = subscriber.account
+        return subscriber if subscriber.is_connected else None
+
+    def update_online(self, entity):
+        """
+        Update the cached online status of a single subscriber.
+
+        Args:
+            entity (Account or Object): The entity whose connection
+                changed.
+
+        """
+        if self._online is None or not entity.pk:
+            return
+        self._online.pop(entity, None)
+        if entity in self.all():
+            try:
+                recipient = self._get_online_recipient(entity)
+            except ObjectDoesNotExist:
+                return
+            if recipient:
+                self._online[entity] = recipient
+
     def online(self):
         """
         Get all online accounts from our cache
@@ -579,32 +632,37 @@ class SubscriptionHandler(object):
             subscribers (list): Subscribers who are online or
                 are puppeted by an online account.
         """
-        subs = []
-        recache_needed = False
-        for obj in self.all():
-            from django.core.exceptions import ObjectDoesNotExist
-            try:
-                if hasattr(obj, 'account') and obj.account:
-                    obj = obj.account
-                if not obj.is_connected:
+        if self._online is None:
+            online = OrderedDict()
+            recache_needed = False
+            for obj in self.all():
+                try:
+                    recipient = self._get_online_recipient(obj)
+                except ObjectDoesNotExist:
+                    # a subscribed object has already been deleted. Mark that we need a recache and ignore it
+                    recache_needed = True
                     continue
-            except ObjectDoesNotExist:
-                # a subscribed object has already been deleted. Mark that we need a recache and ignore it
-                recache_needed = True
-                continue
-            subs.append(obj)
-        if recache_needed:
-            self._recache()
-        return subs
+                if recipient:
+                    online[obj] = recipient
+            if recache_needed:
+                self._recache()
+            self._online = online
+        return list(self._online.values())
 
     def clear(self):
         """
         Remove all subscribers from channel.
 
         """
+        global _CHANNELHANDLER
+        if not _CHANNELHANDLER:
+            from evennia.comms.channelhandler import CHANNEL_HANDLER as _CHANNELHANDLER
+        for subscriber in self.all():
+            _CHANNELHANDLER.remove_subscriber(self.obj, subscriber)
         self.obj.db_account_subscriptions.clear()
         self.obj.db_object_subscriptions.clear()
         self._cache = None
+        self._online = None
 
 
 class ChannelDB(TypedObject):
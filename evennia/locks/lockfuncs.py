@@ -92,6 +92,7 @@ from __future__ import print_function
 from ast import literal_eval
 from django.conf import settings
 from evennia.utils import utils
+from evennia.locks.lockhandler import get_capability
 
 _PERMISSION_HIERARCHY = [pe.lower() for pe in settings.PERMISSION_HIERARCHY]
 # also accept different plural forms
@@ -160,24 +161,26 @@ def perm(accessing_obj, accessed_obj, *args, **kwargs):
     (this is order to avoid Accounts potentially escalating their own permissions
     by use of a higher-level Object)
 
+    The permissions and hierarchy positions are read from the cached
+    capability record of accessing_obj (see `lockhandler.get_capability`).
+
     """
     # this allows the perm_above lockfunc to make use of this function too
     try:
         permission = args[0].lower()
-        perms_object = accessing_obj.permissions.all()
     except (AttributeError, IndexError):
         return False
+    capability = get_capability(accessing_obj)
+    perms_object = capability.permissions
+    if perms_object is None:
+        return False
 
     gtmode = kwargs.pop("_greater_than", False)
-    is_quell = False
 
-    account = (utils.inherits_from(accessing_obj, "evennia.objects.objects.DefaultObject") and
-               accessing_obj.account)
     # check object perms (note that accessing_obj could be an Account too)
-    perms_account = []
-    if account:
-        perms_account = account.permissions.all()
-        is_quell = account.attributes.get("_quell")
+    account = capability.account
+    perms_account = capability.account_permissions or ()
+    is_quell = account and account.attributes.get("_quell")
 
     # Check hirarchy matches; handle both singular/plural forms in hierarchy
     hpos_target = None
@@ -192,17 +195,11 @@ def perm(accessing_obj, accessed_obj, *args, **kwargs):
 
         if account:
             # we have an account puppeting this object. We must check what perms it has
-            perms_account_single = [p[:-1] if p.endswith('s') else p for p in perms_account]
-            hpos_account = [hpos for hpos, hperm in enumerate(_PERMISSION_HIERARCHY)
-                            if hperm in perms_account_single]
-            hpos_account = hpos_account and hpos_account[-1] or -1
+            hpos_account = capability.hpos_account
 
         if not account or is_quell:
             # only get the object-level perms if there is no account or quelling
-            perms_object_single = [p[:-1] if p.endswith('s') else p for p in perms_object]
-            hpos_object = [hpos for hpos, hperm in enumerate(_PERMISSION_HIERARCHY)
-                           if hperm in perms_object_single]
-            hpos_object = hpos_object and hpos_object[-1] or -1
+            hpos_object = capability.hpos_object
 
         if account and is_quell:
             # quell mode: use smallest perm from account and object
@@ -287,16 +284,22 @@ def dbref(accessing_obj, accessed_obj, *args, **kwargs):
         dbr = int(args[0].strip().strip('#'))
     except ValueError:
         return False
-    if hasattr(accessing_obj, 'dbid'):
-        return dbr == accessing_obj.dbid
-    return False
+    dbid = get_capability(accessing_obj).dbid
+    return dbid is not None and dbr == dbid
 
 
 def pdbref(accessing_obj, accessed_obj, *args, **kwargs):
     """
     Same as dbref, but making sure accessing_obj is an account.
     """
-    return dbref(_to_account(accessing_obj), accessed_obj, *args, **kwargs)
+    if not args:
+        return False
+    try:
+        dbr = int(args[0].strip().strip('#'))
+    except ValueError:
+        return False
+    account_id = get_capability(accessing_obj).account_id
+    return account_id is not None and dbr == account_id
 
 
 def id(accessing_obj, accessed_obj, *args, **kwargs):
@@ -306,7 +309,7 @@ def id(accessing_obj, accessed_obj, *args, **kwargs):
 
 def pid(accessing_obj, accessed_obj, *args, **kwargs):
     "Alias to dbref, for Accounts"
-    return dbref(_to_account(accessing_obj), accessed_obj, *args, **kwargs)
+    return pdbref(accessing_obj, accessed_obj, *args, **kwargs)
 
 
 # this is more efficient than multiple if ... elif statments
@@ -107,11 +107,13 @@ from __future__ import print_function
 from builtins import object
 
 import re
+from itertools import count
 from django.conf import settings
 from evennia.utils import logger, utils
 from django.utils.translation import ugettext as _
 
-__all__ = ("LockHandler", "LockException")
+__all__ = ("LockHandler", "LockException", "LockCapability",
+           "get_capability", "invalidate_capabilities")
 
 WARNING_LOG = settings.LOCKWARNING_LOG_FILE
 _LOCK_HANDLER = None
@@ -146,6 +148,8 @@ def _cache_lockfuncs():
     _LOCKFUNCS = {}
     for modulepath in settings.LOCK_FUNC_MODULES:
         _LOCKFUNCS.update(utils.callables_from_module(modulepath))
+    # compiled locks refer to the old lock functions
+    _COMPILED_LOCKS.clear()
 
 #
 # pre-compiled regular expressions
@@ -158,6 +162,241 @@ _RE_OK = re.compile(r"%s|and|or|not")
 
 
 #
+# Lock compilation
+#
+
+# Compiled lock definitions, keyed by the lock definition text (the part
+# after the colon). Many objects share the same lock definitions, so
+# these are only parsed and compiled once.
+_COMPILED_LOCKS = utils.LimitedSizeOrderedDict(size_limit=10000)
+
+
+def _compile_lockfunc(func, args, kwargs):
+    """
+    Wrap a lock function in a callable only needing the accessing
+    and accessed objects.
+
+    """
+    def _lockfunc(accessing_obj, accessed_obj):
+        return bool(func(accessing_obj, accessed_obj, *args, **kwargs))
+    return _lockfunc
+
+
+def _compile_evalstring(evalstring, lock_funcs):
+    """
+    Compile a cleaned evalstring into a single callable.
+
+    Args:
+        evalstring (str): A string of `%s`, `and`, `or` and `not` separated
+            by spaces, where each `%s` is a placeholder for a lock function.
+            The normal Python operator precedence applies.
+        lock_funcs (tuple): One tuple `(func, args, kwargs)` for every `%s`
+            in `evalstring`, in order.
+
+    Returns:
+        checker (callable): A callable `checker(accessing_obj, accessed_obj)`
+            returning `True` or `False`. AND/OR short-circuit so that lock
+            functions not affecting the outcome are never called.
+
+    Raises:
+        ValueError: If `evalstring` is not a valid expression.
+
+    """
+    tokens = evalstring.split()
+    funcs = iter(lock_funcs)
+    # [position in tokens]
+    pos = [0]
+
+    def _peek():
+        return tokens[pos[0]] if pos[0] < len(tokens) else None
+
+    def _not_expr():
+        token = _peek()
+        pos[0] += 1
+        if token == "not":
+            operand = _not_expr()
+            return lambda accessing_obj, accessed_obj: not operand(accessing_obj, accessed_obj)
+        elif token == "%s":
+            try:
+                return _compile_lockfunc(*next(funcs))
+            except StopIteration:
+                raise ValueError("More placeholders than lock functions.")
+        raise ValueError("Unexpected '%s'." % token)
+
+    def _and_expr():
+        operands = [_not_expr()]
+        while _peek() == "and":
+            pos[0] += 1
+            operands.append(_not_expr())
+        if len(operands) == 1:
+            return operands[0]
+
+        def _and(accessing_obj, accessed_obj):
+            for operand in operands:
+                if not operand(accessing_obj, accessed_obj):
+                    return False
+            return True
+        return _and
+
+    def _or_expr():
+        operands = [_and_expr()]
+        while _peek() == "or":
+            pos[0] += 1
+            operands.append(_and_expr())
+        if len(operands) == 1:
+            return operands[0]
+
+        def _or(accessing_obj, accessed_obj):
+            for operand in operands:
+                if operand(accessing_obj, accessed_obj):
+                    return True
+            return False
+        return _or
+
+    checker = _or_expr()
+    if pos[0] != len(tokens):
+        raise ValueError("Unexpected '%s'." % tokens[pos[0]])
+    return checker
+
+
+#
+#
+# Capability records
+#
+
+_PERMISSION_HIERARCHY = [pe.lower() for pe in settings.PERMISSION_HIERARCHY]
+_CAPABILITY_GENERATIONS = count(1)
+_CAPABILITY_GENERATION = next(_CAPABILITY_GENERATIONS)
+_DefaultObject = None
+
+
+def _hierarchy_pos(perms):
+    """
+    Helper for finding the highest position in the permission
+    hierarchy among a set of permissions.
+
+    Args:
+        perms (iterable): Lowercase permission strings.
+
+    Returns:
+        hpos (int): The index in the hierarchy (-1 if none matched).
+
+    """
+    perms_single = [p[:-1] if p.endswith('s') else p for p in perms]
+    hpos = [hpos for hpos, hperm in enumerate(_PERMISSION_HIERARCHY)
+            if hperm in perms_single]
+    return hpos and hpos[-1] or -1
+
+
+class LockCapability(object):
+    """
+    The lock-relevant capabilities of an accessing object, calculated
+    once and then re-used by all lock checks until permissions, superuser
+    status or puppeting change anywhere (see `invalidate_capabilities`).
+
+    Attributes:
+        superuser (bool): If the accessor bypasses locks.
+        permissions (frozenset or None): The accessor's own permissions,
+            or `None` if it cannot have any.
+        account_id (int or None): The dbid of the Account controlling the
+            accessor (or of the accessor itself if it is not an Object).
+        account (Account or None): The Account puppeting the accessor,
+            if it is an Object.
+        account_permissions (frozenset or None): The permissions of
+            `account`, if set.
+        hpos_object (int): Highest permission hierarchy position of
+            `permissions`.
+        hpos_account (int): Highest permission hierarchy position of
+            `account_permissions`.
+
+    """
+
+    def __init__(self, obj):
+        """
+        Calculate the capabilities.
+
+        Args:
+            obj (object): The accessing object.
+
+        """
+        global _DefaultObject
+        if not _DefaultObject:
+            from evennia.objects.objects import DefaultObject as _DefaultObject
+
+        self.generation = _CAPABILITY_GENERATION
+        self.dbid = getattr(obj, "dbid", None)
+
+        if hasattr(obj, "locks"):
+            superuser = getattr(obj, "is_superuser", False)
+        else:
+            # not a typeclassed entity, like a Session (also before login)
+            superuser = (
+                (hasattr(obj, 'is_superuser') and obj.is_superuser) or
+                (hasattr(obj, 'account') and
+                    hasattr(obj.account, 'is_superuser') and obj.account.is_superuser) or
+                (hasattr(obj, 'get_account') and
+                    (not obj.get_account() or obj.get_account().is_superuser)))
+        self.superuser = bool(superuser)
+
+        try:
+            self.permissions = frozenset(obj.permissions.all())
+        except AttributeError:
+            self.permissions = None
+
+        account = isinstance(obj, _DefaultObject) and obj.account
+        self.account = account or None
+        self.account_permissions = None
+        if account:
+            self.account_id = account.dbid
+            self.account_permissions = frozenset(account.permissions.all())
+        elif isinstance(obj, _DefaultObject):
+            self.account_id = None
+        else:
+            self.account_id = self.dbid
+
+        self.hpos_object = _hierarchy_pos(self.permissions or ())
+        self.hpos_account = _hierarchy_pos(self.account_permissions or ())
+
+
+def get_capability(obj):
+    """
+    Get the (cached) capability record of an accessing object.
+
+    Args:
+        obj (object): The accessing object.
+
+    Returns:
+        capability (LockCapability): The capabilities of `obj`.
+
+    """
+    capability = getattr(obj, "_lock_capability", None)
+    if capability is None or capability.generation != _CAPABILITY_GENERATION:
+        capability = LockCapability(obj)
+        try:
+            obj._lock_capability = capability
+        except AttributeError:
+            # can't cache on this type of object
+            pass
+    return capability
+
+
+def invalidate_capabilities(obj=None):
+    """
+    Invalidate cached capability records. This should be called whenever
+    a permission, superuser status, quell status or puppet changes.
+
+    Args:
+        obj (object, optional): Only invalidate the record of this
+            accessing object. If not given, invalidate all records.
+
+    """
+    global _CAPABILITY_GENERATION
+    if obj is None:
+        _CAPABILITY_GENERATION = next(_CAPABILITY_GENERATIONS)
+    elif getattr(obj, "_lock_capability", None) is not None:
+        obj._lock_capability = None
+
+
 #
 # Lock handler
 #
@@ -216,43 +455,24 @@ class LockHandler(object):
         for raw_lockstring in storage_lockstring.split(';'):
             if not raw_lockstring:
                 continue
-            lock_funcs = []
             try:
                 access_type, rhs = (part.strip() for part in raw_lockstring.split(':', 1))
             except ValueError:
                 logger.log_trace()
                 return locks
 
-            # parse the lock functions and separators
-            funclist = _RE_FUNCS.findall(rhs)
-            evalstring = rhs
-            for pattern in ('AND', 'OR', 'NOT'):
-                evalstring = re.sub(r"\b%s\b" % pattern, pattern.lower(), evalstring)
-            nfuncs = len(funclist)
-            for funcstring in funclist:
-                funcname, rest = (part.strip().strip(')') for part in funcstring.split('(', 1))
-                func = _LOCKFUNCS.get(funcname, None)
-                if not callable(func):
-                    elist.append(_("Lock: lock-function '%s' is not available.") % funcstring)
+            compiled = _COMPILED_LOCKS.get(rhs)
+            if not compiled:
+                compiled = self._compile_lockdef(rhs, raw_lockstring, elist)
+                if not compiled:
                     continue
-                args = list(arg.strip() for arg in rest.split(',') if arg and '=' not in arg)
-                kwargs = dict([arg.split('=', 1) for arg in rest.split(',') if arg and '=' in arg])
-                lock_funcs.append((func, args, kwargs))
-                evalstring = evalstring.replace(funcstring, '%s')
-            if len(lock_funcs) < nfuncs:
-                continue
-            try:
-                # purge the eval string of any superfluous items, then test it
-                evalstring = " ".join(_RE_OK.findall(evalstring))
-                eval(evalstring % tuple(True for func in funclist), {}, {})
-            except Exception:
-                elist.append(_("Lock: definition '%s' has syntax errors.") % raw_lockstring)
-                continue
+                _COMPILED_LOCKS[rhs] = compiled
+            evalstring, lock_funcs, checker = compiled
             if access_type in locks:
                 duplicates += 1
                 wlist.append(_("LockHandler on %(obj)s: access type '%(access_type)s' changed from '%(source)s' to '%(goal)s' " %
                                {"obj": self.obj, "access_type": access_type, "source": locks[access_type][2], "goal": raw_lockstring}))
-            locks[access_type] = (evalstring, tuple(lock_funcs), raw_lockstring)
+            locks[access_type] = (evalstring, lock_funcs, raw_lockstring, checker)
         if wlist and WARNING_LOG:
             # a warning text was set, it's not an error, so only report
             logger.log_file("\n".join(wlist), WARNING_LOG)
@@ -262,6 +482,51 @@ class LockHandler(object):
         # return the gathered locks in an easily executable form
         return locks
 
+    def _compile_lockdef(self, rhs, raw_lockstring, elist):
+        """
+        Helper function. Parses a single lock definition and compiles
+        it into a callable.
+
+        Args:
+            rhs (str): The lock definition (right side of the colon).
+            raw_lockstring (str): The full `access_type:definition` string,
+                used for error reporting.
+            elist (list): Error messages are appended to this list.
+
+        Returns:
+            compiled (tuple or None): A tuple `(evalstring, lock_funcs, checker)`
+                where `checker(accessing_obj, accessed_obj)` evaluates the lock.
+                `None` if an error occurred.
+
+        """
+        lock_funcs = []
+        # parse the lock functions and separators
+        funclist = _RE_FUNCS.findall(rhs)
+        evalstring = rhs
+        for pattern in ('AND', 'OR', 'NOT'):
+            evalstring = re.sub(r"\b%s\b" % pattern, pattern.lower(), evalstring)
+        nfuncs = len(funclist)
+        for funcstring in funclist:
+            funcname, rest = (part.strip().strip(')') for part in funcstring.split('(', 1))
+            func = _LOCKFUNCS.get(funcname, None)
+            if not callable(func):
+                elist.append(_("Lock: lock-function '%s' is not available.") % funcstring)
+                continue
+            args = list(arg.strip() for arg in rest.split(',') if arg and '=' not in arg)
+            kwargs = dict([arg.split('=', 1) for arg in rest.split(',') if arg and '=' in arg])
+            lock_funcs.append((func, args, kwargs))
+            evalstring = evalstring.replace(funcstring, '%s')
+        if len(lock_funcs) < nfuncs:
+            return None
+        try:
+            # purge the eval string of any superfluous items, then compile it
+            evalstring = " ".join(_RE_OK.findall(evalstring))
+            checker = _compile_evalstring(evalstring, lock_funcs)
+        except ValueError:
+            elist.append(_("Lock: definition '%s' has syntax errors.") % raw_lockstring)
+            return None
+        return evalstring, tuple(lock_funcs), checker
+
     def _cache_locks(self, storage_lockstring):
         """
         Store data
@@ -287,8 +552,12 @@ class LockHandler(object):
         Args:
             obj (object): This is checked for the `is_superuser` property.
 
+        Notes:
+            This also invalidates the cached capability record of `obj`.
+
         """
         self.lock_bypass = hasattr(obj, "is_superuser") and obj.is_superuser
+        invalidate_capabilities(obj)
 
     def add(self, lockstring, validate_only=False):
         """
@@ -408,7 +677,7 @@ class LockHandler(object):
         """
 
         if access_type:
-            return self.locks.get(access_type, ["", "", ""])[2]
+            return self.locks.get(access_type, ["", "", "", None])[2]
         return str(self)
 
     def all(self):
@@ -499,12 +768,12 @@ class LockHandler(object):
 
             Parsing the lockstring, we (during cache) extract the valid
             lock functions and store their function objects in the right
-            order along with their args/kwargs. These are now executed in
-            sequence, creating a list of True/False values. This is put
-            into the evalstring, which is a string of AND/OR/NOT entries
-            separated by placeholders where each function result should
-            go. We just put those results in and evaluate the string to
-            get a final, combined True/False value for the lockstring.
+            order along with their args/kwargs. The AND/OR/NOT entries
+            between them are then compiled into a single callable which
+            calls the lock functions in order, skipping those whose
+            result can no longer change the final True/False outcome.
+            The compiled callable is cached by lockstring, so objects
+            sharing the same lock definition also share the callable.
 
             The important bit with this solution is that the full
             lockstring is never blindly evaluated, and thus there (should
@@ -512,37 +781,20 @@ class LockHandler(object):
             functions (as defined by your settings) are executed.
 
         """
-        try:
-            # check if the lock should be bypassed (e.g. superuser status)
-            if accessing_obj.locks.lock_bypass and not no_superuser_bypass:
-                return True
-        except AttributeError:
-            # happens before session is initiated.
-            if not no_superuser_bypass and (
-                (hasattr(accessing_obj, 'is_superuser') and accessing_obj.is_superuser) or
-                (hasattr(accessing_obj, 'account') and
-                    hasattr(accessing_obj.account, 'is_superuser') and
-                    accessing_obj.account.is_superuser) or
-                (hasattr(accessing_obj, 'get_account') and
-                    (not accessing_obj.get_account() or accessing_obj.get_account().is_superuser))):
-                return True
+        # check if the lock should be bypassed (e.g. superuser status)
+        if not no_superuser_bypass and get_capability(accessing_obj).superuser:
+            return True
 
         # no superuser or bypass -> normal lock operation
         if access_type in self.locks:
-            # we have a lock, test it.
-            evalstring, func_tup, raw_string = self.locks[access_type]
-            # execute all lock funcs in the correct order, producing a tuple of True/False results.
-            true_false = tuple(bool(
-                tup[0](accessing_obj, self.obj, *tup[1], **tup[2])) for tup in func_tup)
-            # the True/False tuple goes into evalstring, which combines them
-            # with AND/OR/NOT in order to get the final result.
-            return eval(evalstring % true_false)
+            # we have a lock, test it using its compiled checker.
+            return self.locks[access_type][3](accessing_obj, self.obj)
         else:
             return default
 
     def _eval_access_type(self, accessing_obj, locks, access_type):
         """
-        Helper method for evaluating the access type using eval().
+        Helper method for evaluating the access type.
 
         Args:
             accessing_obj (object): Object seeking access.
@@ -550,10 +802,7 @@ class LockHandler(object):
             access_type (str): An access-type key to evaluate.
 
         """
-        evalstring, func_tup, raw_string = locks[access_type]
-        true_false = tuple(tup[0](accessing_obj, self.obj, *tup[1], **tup[2])
-                           for tup in func_tup)
-        return eval(evalstring % true_false)
+        return locks[access_type][3](accessing_obj, self.obj)
 
     def check_lockstring(self, accessing_obj, lockstring, no_superuser_bypass=False,
                          default=False, access_type=None):
@@ -580,18 +829,8 @@ class LockHandler(object):
             access (bool): If check is passed or not.
 
         """
-        try:
-            if accessing_obj.locks.lock_bypass and not no_superuser_bypass:
-                return True
-        except AttributeError:
-            if no_superuser_bypass and (
-                (hasattr(accessing_obj, 'is_superuser') and accessing_obj.is_superuser) or
-                (hasattr(accessing_obj, 'account') and
-                    hasattr(accessing_obj.account, 'is_superuser') and
-                    accessing_obj.account.is_superuser) or
-                (hasattr(accessing_obj, 'get_account') and
-                    (not accessing_obj.get_account() or accessing_obj.get_account().is_superuser))):
-                return True
+        if not no_superuser_bypass and get_capability(accessing_obj).superuser:
+            return True
         if ":" not in lockstring:
             lockstring = "%s:%s" % ("_dummy", lockstring)
 
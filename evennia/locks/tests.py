@@ -17,6 +17,7 @@ except ImportError:
 
 from evennia import settings_default
 from evennia.locks import lockfuncs
+from evennia.locks.lockhandler import LockException, get_capability
 
 # ------------------------------------------------------------
 # Lock testing
@@ -189,3 +190,65 @@ class TestLockfuncs(EvenniaTest):
         self.assertEquals(True, lockfuncs.serversetting(None, None, 'TESTVAL', '[1, 2, 3]'))
         self.assertEquals(False, lockfuncs.serversetting(None, None, 'TESTVAL', '[1, 2, 4]'))
         self.assertEquals(False, lockfuncs.serversetting(None, None, 'TESTVAL', '123'))
+
+
+class TestLockCompile(EvenniaTest):
+    def test_short_circuit(self):
+        from evennia.locks.lockhandler import _compile_evalstring
+        calls = []
+
+        def _func(result):
+            def _lockfunc(accessing_obj, accessed_obj, *args, **kwargs):
+                calls.append(result)
+                return result
+            return (_lockfunc, [], {})
+
+        checker = _compile_evalstring("%s or %s and not %s", (_func(True), _func(False), _func(False)))
+        self.assertEqual(True, checker(None, None))
+        self.assertEqual([True], calls)
+        del calls[:]
+        checker = _compile_evalstring("not %s and %s or %s", (_func(True), _func(True), _func(False)))
+        self.assertEqual(False, checker(None, None))
+        self.assertEqual([True, False], calls)
+        self.assertRaises(ValueError, _compile_evalstring, "%s and", (_func(True),))
+        self.assertRaises(ValueError, _compile_evalstring, "%s %s", (_func(True), _func(True)))
+
+    def test_lockstrings(self):
+        dbref = self.obj2.dbref
+        self.obj1.locks.add("edit:NOT dbref(%s) OR NOT perm(Admin);get:not false() and all()" % dbref)
+        self.assertEquals(True, self.obj1.locks.check(self.obj2, 'edit'))
+        self.obj2.permissions.add('Admin')
+        self.assertEquals(False, self.obj1.locks.check(self.obj2, 'edit'))
+        self.assertEquals(True, self.obj1.locks.check(self.obj2, 'get'))
+        self.assertRaises(LockException, self.obj1.locks.add, "get:all() and")
+        self.assertRaises(LockException, self.obj1.locks.add, "get:all() false()")
+
+
+class TestLockCapability(EvenniaTest):
+    def test_capability(self):
+        capability = get_capability(self.char1)
+        self.assertEqual(capability.account, self.account)
+        self.assertEqual(capability.account_id, self.account.id)
+        self.assertEqual(capability.dbid, self.char1.id)
+        self.assertTrue(capability is get_capability(self.char1))
+        # the record is recalculated when permissions change
+        self.char1.permissions.add("Tester")
+        capability = get_capability(self.char1)
+        self.assertTrue("tester" in capability.permissions)
+        self.char1.permissions.remove("Tester")
+        self.assertFalse("tester" in get_capability(self.char1).permissions)
+        self.assertFalse(lockfuncs.perm(self.obj1, None, "Tester"))
+        self.obj1.permissions.add("Tester")
+        self.assertTrue(lockfuncs.perm(self.obj1, None, "Tester"))
+
+    def test_session(self):
+        capability = get_capability(self.session)
+        self.assertEqual(capability.permissions, None)
+        self.assertFalse(lockfuncs.perm(self.session, None, "Admin"))
+        self.assertFalse(capability.superuser)
+        self.account.is_superuser = True
+        self.session.at_login(self.account)
+        self.assertTrue(get_capability(self.session).superuser)
+        self.assertTrue(self.obj1.locks.check_lockstring(self.session, "test:false()"))
+        self.assertFalse(self.obj1.locks.check_lockstring(self.session, "test:false()",
+                                                          no_superuser_bypass=True))
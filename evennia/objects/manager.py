@@ -17,6 +17,7 @@ _GA = object.__getattribute__
 _ATTR = None
 
 _MULTIMATCH_REGEX = re.compile(settings.SEARCH_MULTIMATCH_REGEX, re.I + re.U)
+_SEARCH_NAME_INDEX = settings.SEARCH_NAME_INDEX
 
 # Try to use a custom way to parse id-tagged multimatches.
 
@@ -258,6 +259,12 @@ class ObjectDBManager(TypedObjectManager):
             # Exit early.
             return []
 
+        if _SEARCH_NAME_INDEX and candidates is not None:
+            # match against the in-memory name index of the candidates
+            return self._get_objs_with_key_or_alias_in_index(ostring, exact=exact,
+                                                             candidates=candidates,
+                                                             typeclasses=typeclasses)
+
         # build query objects
         candidates_id = [_GA(obj, "id") for obj in make_iter(candidates) if obj]
         cand_restriction = candidates is not None and Q(pk__in=candidates_id) or Q()
@@ -296,6 +303,52 @@ class ObjectDBManager(TypedObjectManager):
                 return [alias_candidates[ind] for ind in index_matches]
             return []
 
+    def _get_objs_with_key_or_alias_in_index(self, ostring, exact=True,
+                                             candidates=None, typeclasses=None):
+        """
+        Helper for `get_objs_with_key_or_alias`, matching among
+        candidates using their in-memory search name index rather than
+        querying the database.
+
+        Args:
+            ostring (str): A search criterion.
+            exact (bool, optional): Require exact match of ostring
+                (still case-insensitive).
+            candidates (list): Only match among these candidates.
+            typeclasses (list): Only match objects with typeclasses having thess path strings.
+
+        Returns:
+            matches (list): A list of matches of length 0, 1 or more.
+
+        """
+        typeclasses = typeclasses and make_iter(typeclasses)
+        # deleted objects have no pk and can't be found anymore
+        candidates = sorted(set(obj for obj in make_iter(candidates) if obj and
+                                _GA(obj, "id") is not None and
+                                (not typeclasses or _GA(obj, "db_typeclass_path") in typeclasses)),
+                            key=lambda obj: _GA(obj, "id"))
+        ostring = ostring.lower()
+        if exact:
+            return [obj for obj in candidates
+                    if obj.search_names[0] == ostring or ostring in obj.search_names[1]]
+
+        # fuzzy matching
+        index_matches = string_partial_matching([obj.db_key for obj in candidates],
+                                                ostring, ret_index=True)
+        if index_matches:
+            # a match by key
+            return [candidates[ind] for ind in index_matches]
+        # match by alias rather than by key
+        alias_strings = []
+        alias_candidates = []
+        for candidate in candidates:
+            aliases = candidate.search_names[1]
+            if any(ostring in alias for alias in aliases):
+                alias_strings.extend(aliases)
+                alias_candidates.extend([candidate] * len(aliases))
+        index_matches = string_partial_matching(alias_strings, ostring, ret_index=True)
+        return [alias_candidates[ind] for ind in index_matches]
+
     # main search methods and helper functions
 
     def search_object(self, searchdata,
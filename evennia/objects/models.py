@@ -14,6 +14,7 @@ the database object. Like everything else, they can be accessed
 transparently through the decorating TypeClass.
 """
 from builtins import object
+from collections import OrderedDict, defaultdict
 
 from django.conf import settings
 from django.db import models
@@ -22,9 +23,12 @@ from django.core.validators import validate_comma_separated_integer_list
 
 from evennia.typeclasses.models import TypedObject
 from evennia.objects.manager import ObjectDBManager
+from evennia.locks.lockhandler import invalidate_capabilities
 from evennia.utils import logger
 from evennia.utils.utils import (make_iter, dbref, lazy_property)
 
+_CHANNELHANDLER = None
+
 
 class ContentsHandler(object):
     """
@@ -32,6 +36,11 @@ class ContentsHandler(object):
     lookups (this is done very often due to cmdhandler needing to look
     for object-cmdsets). It is stored on the 'contents_cache' property
     of the ObjectDB.
+
+    The contents are kept in arrival order, both all together and
+    sorted into buckets by the `_content_types` of their typeclasses
+    (like "exit", "character" or "object"). Objects with a destination
+    are always put in the "exit" bucket.
     """
 
     def __init__(self, obj):
@@ -44,54 +53,96 @@ class ContentsHandler(object):
 
         """
         self.obj = obj
-        self._pkcache = {}
+        # {pk: None}, used as an ordered set
+        self._pkcache = OrderedDict()
+        # {content_type: {pk: None}}
+        self._typecache = defaultdict(OrderedDict)
         self._idcache = obj.__class__.__instance_cache__
         self.init()
 
-    def init(self):
+    def init(self, prefetch=True):
         """
-        Re-initialize the content cache
+        Re-initialize the content cache.
+
+        Args:
+            prefetch (bool, optional): Also warm the Attribute- and
+                Tag-caches of the contents.
 
         """
-        self._pkcache.update(dict((obj.pk, None) for obj in ObjectDB.objects.filter(db_location=self.obj) if obj.pk))
+        contents = [obj for obj in ObjectDB.objects.filter(db_location=self.obj) if obj.pk]
+        if prefetch:
+            ObjectDB.objects.prefetch_caches(contents)
+        for obj in contents:
+            self.add(obj)
+
+    def _repair(self, pk):
+        """
+        Reload a single content whose instance was flushed from the
+        idmapper cache, or forget it if it is no longer here.
+
+        Args:
+            pk (int): The pk of the object to reload.
+
+        Returns:
+            obj (Object or None): The reloaded object, if still here.
 
-    def get(self, exclude=None):
+        """
+        obj = ObjectDB.objects.filter(pk=pk, db_location=self.obj).first()
+        if obj:
+            return obj
+        self._pkcache.pop(pk, None)
+        for pks in self._typecache.values():
+            pks.pop(pk, None)
+        return None
+
+    def get(self, exclude=None, content_type=None):
         """
         Return the contents of the cache.
 
         Args:
             exclude (Object or list of Object): object(s) to ignore
+            content_type (str or None): Filter list by a content-type. If None, don't filter.
 
         Returns:
             objects (list): the Objects inside this location
 
         """
+        pks = self._typecache.get(content_type, ()) if content_type else self._pkcache
         if exclude:
-            pks = [pk for pk in self._pkcache if pk not in [excl.pk for excl in make_iter(exclude)]]
-        else:
-            pks = self._pkcache
+            exclude = set(excl.pk for excl in make_iter(exclude) if excl)
+            pks = [pk for pk in pks if pk not in exclude]
+        idcache = self._idcache
         try:
-            return [self._idcache[pk] for pk in pks]
+            return [idcache[pk] for pk in pks]
         except KeyError:
             # this can happen if the idmapper cache was cleared for an object
-            # in the contents cache. If so we need to re-initialize and try again.
-            self.init()
-            try:
-                return [self._idcache[pk] for pk in pks]
-            except KeyError:
-                # this means an actual failure of caching. Return real database match.
-                logger.log_err("contents cache failed for %s." % self.obj.key)
-                return list(ObjectDB.objects.filter(db_location=self.obj))
+            # in the contents cache. If so we reload only those missing.
+            objs = []
+            for pk in list(pks):
+                obj = idcache.get(pk) or self._repair(pk)
+                if obj:
+                    objs.append(obj)
+            return objs
 
     def add(self, obj):
         """
-        Add a new object to this location
+        Add a new object to this location, or re-sort an object
+        already here into the right content-type buckets.
 
         Args:
             obj (Object): object to add
 
         """
-        self._pkcache[obj.pk] = None
+        pk = obj.pk
+        content_types = getattr(obj, "_content_types", ())
+        if obj.db_destination_id and "exit" not in content_types:
+            content_types += ("exit",)
+        self._pkcache[pk] = None
+        for content_type, pks in self._typecache.items():
+            if content_type not in content_types:
+                pks.pop(pk, None)
+        for content_type in content_types:
+            self._typecache[content_type][pk] = None
 
     def remove(self, obj):
         """
@@ -102,13 +153,16 @@ class ContentsHandler(object):
 
         """
         self._pkcache.pop(obj.pk, None)
+        for pks in self._typecache.values():
+            pks.pop(obj.pk, None)
 
     def clear(self):
         """
         Clear the contents cache and re-initialize
 
         """
-        self._pkcache = {}
+        self._pkcache = OrderedDict()
+        self._typecache = defaultdict(OrderedDict)
         self.init()
 
 # -------------------------------------------------------------
@@ -198,6 +252,9 @@ class ObjectDB(TypedObject):
     # Database manager
     objects = ObjectDBManager()
 
+    # cached (key, aliases) search index, see `search_names`
+    _search_names = None
+
     # defaults
     __settingsclasspath__ = settings.BASE_OBJECT_TYPECLASS
     __defaultclasspath__ = "evennia.objects.objects.DefaultObject"
@@ -313,7 +370,65 @@ class ObjectDB(TypedObject):
                 # Since we cannot know at this point was old_location was, we
                 # trigger a full-on contents_cache update here.
                 logger.log_warn("db_location direct save triggered contents_cache.init() for all objects!")
-                [o.contents_cache.init() for o in self.__dbclass__.get_all_cached_instances()]
+                [o.contents_cache.init(prefetch=False)
+                 for o in self.__dbclass__.get_all_cached_instances()]
+
+    def at_db_destination_postsave(self, new):
+        """
+        This is called automatically after the destination field was
+        saved, no matter how. It makes sure our location's contents
+        cache knows if we are an exit or not.
+
+        Args:
+            new (bool): Set if this object has not yet been saved before.
+
+        """
+        if self.db_location and not new:
+            self.db_location.contents_cache.add(self)
+
+    def at_db_account_postsave(self, new):
+        """
+        This is called automatically after the account field was saved,
+        no matter how (such as when puppeting or unpuppeting). It
+        invalidates the cached lock capabilities of this object and
+        updates its online status on the channels it subscribes to.
+
+        Args:
+            new (bool): Set if this object has not yet been saved before.
+
+        """
+        global _CHANNELHANDLER
+        if not _CHANNELHANDLER:
+            from evennia.comms.channelhandler import CHANNEL_HANDLER as _CHANNELHANDLER
+        invalidate_capabilities(self)
+        if not new:
+            _CHANNELHANDLER.update_online(self)
+
+    def at_db_key_postsave(self, new):
+        """
+        This is called automatically after the key field was saved,
+        no matter how. It resets the search name index of this object.
+
+        Args:
+            new (bool): Set if this object has not yet been saved before.
+
+        """
+        self._search_names = None
+
+    @property
+    def search_names(self):
+        """
+        The in-memory search index of this object.
+
+        Returns:
+            names (tuple): A tuple `(key, (alias, alias, ...))`, all in
+                lower case. This is cached until the key or aliases change.
+
+        """
+        names = self._search_names
+        if names is None:
+            names = self._search_names = (self.db_key.lower(), tuple(self.aliases.all()))
+        return names
 
     class Meta(object):
         """Define Django meta options"""
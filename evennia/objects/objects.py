@@ -191,6 +191,9 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
     without `obj.save()` having to be called explicitly.
 
     """
+    # used by the location's contents cache to sort objects by type
+    _content_types = ("object",)
+
     objects = ObjectManager()
 
     # on-object properties
@@ -237,7 +240,7 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
         return self.db_account and self.db_account.is_superuser \
             and not self.db_account.attributes.get("_quell")
 
-    def contents_get(self, exclude=None):
+    def contents_get(self, exclude=None, content_type=None):
         """
         Returns the contents of this object, i.e. all
         objects that has this object set as its location.
@@ -246,6 +249,9 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
         Args:
             exclude (Object): Object to exclude from returned
                 contents list
+            content_type (str, optional): Only return contents whose
+                typeclass has this in its `_content_types`, like
+                "object", "character" or "exit".
 
         Returns:
             contents (list): List of contents of this Object.
@@ -254,9 +260,7 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
             Also available as the `contents` property.
 
         """
-        con = self.contents_cache.get(exclude=exclude)
-        # print "contents_get:", self, con, id(self), calledby()  # DEBUG
-        return con
+        return self.contents_cache.get(exclude=exclude, content_type=content_type)
     contents = property(contents_get)
 
     @property
@@ -265,7 +269,7 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
         Returns all exits from this object, i.e. all objects at this
         location having the property destination != `None`.
         """
-        return [exi for exi in self.contents if exi.destination]
+        return [exi for exi in self.contents_get(content_type="exit") if exi.destination]
 
     # main methods
 
@@ -557,6 +561,33 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
             `at_msg_receive` will be called on this Object.
             All extra kwargs will be passed on to the protocol.
 
+        """
+        kwargs = self._prepare_msg(text=text, from_obj=from_obj, options=options, **kwargs)
+        if kwargs is None:
+            # aborted by at_msg_receive
+            return
+
+        # relay to session(s)
+        sessions = make_iter(session) if session else self.sessions.all()
+        for session in sessions:
+            session.data_out(**kwargs)
+
+    def _prepare_msg(self, text=None, from_obj=None, options=None, **kwargs):
+        """
+        Helper method for `msg` and `msg_contents`. Calls the message
+        hooks and sanitizes the outgoing data.
+
+        Args:
+            text (str or tuple, optional): The message to send.
+            from_obj (obj or list, optional): The sending object(s).
+            options (dict, optional): Message-specific option-value pairs.
+        Kwargs:
+            any (string or tuples): Send-command names and their arguments.
+
+        Returns:
+            kwargs (dict or None): The data to send to the Session(s), or
+                `None` if `at_msg_receive` aborted the message.
+
         """
         # try send hooks
         if from_obj:
@@ -569,7 +600,7 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
         try:
             if not self.at_msg_receive(text=text, **kwargs):
                 # if at_msg_receive returns false, we abort message to this object
-                return
+                return None
         except Exception:
             logger.log_trace()
 
@@ -581,11 +612,7 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
                 except Exception:
                     text = repr(text)
             kwargs['text'] = text
-
-        # relay to session(s)
-        sessions = make_iter(session) if session else self.sessions.all()
-        for session in sessions:
-            session.data_out(**kwargs)
+        return kwargs
 
 
     def for_contents(self, func, exclude=None, **kwargs):
@@ -656,7 +683,16 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
             depending on the results of `char.get_display_name(looker)` and
             `npc.get_display_name(looker)` for each particular onlooker
 
+            All recipients receiving the same final message are sent it in
+            one go, so the message is only sent across to the Portal once.
+            Recipients with a custom `msg()` method have it called as
+            normal.
+
         """
+        global _SESSIONS
+        if not _SESSIONS:
+            from evennia.server.sessionhandler import SESSIONS as _SESSIONS
+
         # we also accept an outcommand on the form (message, {kwargs})
         is_outcmd = text and is_iter(text)
         inmessage = text[0] if is_outcmd else text
@@ -666,15 +702,40 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
         if exclude:
             exclude = make_iter(exclude)
             contents = [obj for obj in contents if obj not in exclude]
+
+        # {substitutions: outmessage}, to only format the message once
+        # for every distinct set of display names
+        rendered = {}
+        # {outmessage: [sessions]}
+        multicast = defaultdict(list)
         for obj in contents:
             if mapping:
-                substitutions = {t: sub.get_display_name(obj)
-                                 if hasattr(sub, 'get_display_name')
-                                 else str(sub) for t, sub in mapping.items()}
-                outmessage = inmessage.format(**substitutions)
+                substitutions = tuple(sorted(
+                    (t, sub.get_display_name(obj)
+                     if hasattr(sub, 'get_display_name') else str(sub))
+                    for t, sub in mapping.items()))
+                outmessage = rendered.get(substitutions)
+                if outmessage is None:
+                    outmessage = rendered[substitutions] = inmessage.format(**dict(substitutions))
             else:
                 outmessage = inmessage
-            obj.msg(text=(outmessage, outkwargs), from_obj=from_obj, **kwargs)
+            if getattr(obj.msg, "__func__", None) is not _DEFAULT_MSG:
+                # a custom msg method must be called separately
+                obj.msg(text=(outmessage, outkwargs), from_obj=from_obj, **kwargs)
+                continue
+            sendkwargs = obj._prepare_msg(text=(outmessage, outkwargs),
+                                          from_obj=from_obj, **kwargs)
+            if sendkwargs is not None and sendkwargs.get("text") == (outmessage, outkwargs):
+                multicast[outmessage].extend(obj.sessions.all())
+            elif sendkwargs is not None:
+                # a hook changed the outgoing data; send it separately
+                for session in obj.sessions.all():
+                    session.data_out(**sendkwargs)
+
+        # send each distinct message to all its recipient sessions at once
+        for outmessage, sessions in multicast.items():
+            if sessions:
+                _SESSIONS.data_out_multi(sessions, text=(outmessage, outkwargs), **kwargs)
 
     def move_to(self, destination, quiet=False,
                 emit_to_obj=None, use_destination=True, to_none=False, move_hooks=True,
@@ -933,6 +994,8 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
 
         # Perform the deletion of the object
         super(DefaultObject, self).delete()
+        # drop our search name index
+        self._search_names = None
         return True
 
     def access(self, accessing_obj, access_type='read', default=False, no_superuser_bypass=False, **kwargs):
@@ -1486,7 +1549,10 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
         if not looker:
             return ""
         # get and identify all objects
-        visible = (con for con in self.contents if con != looker and
+        contents = self.contents
+        # warm the attribute/tag caches of all contents with a few queries
+        ObjectDB.objects.prefetch_caches(contents)
+        visible = (con for con in contents if con != looker and
                    con.access(looker, "view"))
         exits, users, things = [], [], defaultdict(list)
         for con in visible:
@@ -1813,6 +1879,10 @@ class DefaultObject(with_metaclass(TypeclassBase, ObjectDB)):
                                        mapping=location_mapping)
 
 
+# used by msg_contents to detect objects with a custom msg method
+_DEFAULT_MSG = DefaultObject.msg.__func__
+
+
 #
 # Base Character object
 #
@@ -1823,6 +1893,8 @@ class DefaultCharacter(DefaultObject):
     a character avatar controlled by an account.
 
     """
+    # used by the location's contents cache to sort objects by type
+    _content_types = ("character",)
 
     def basetype_setup(self):
         """
@@ -1940,6 +2012,8 @@ class DefaultRoom(DefaultObject):
     This is the base room object. It's just like any Object except its
     location is always `None`.
     """
+    # used by the location's contents cache to sort objects by type
+    _content_types = ("room",)
 
     def basetype_setup(self):
         """
@@ -2015,6 +2089,8 @@ class DefaultExit(DefaultObject):
     exits simply by giving the exit-object's name on its own.
 
     """
+    # used by the location's contents cache to sort objects by type
+    _content_types = ("exit",)
 
     exit_command = ExitCommand
     priority = 101
@@ -7,6 +7,8 @@ from random import randint
 import mock
 from anything import Something
 from django.test.utils import override_settings
+from twisted.internet import task
+from evennia.server.models import ServerConfig
 from evennia.utils.test_resources import EvenniaTest
 from evennia.utils.tests.test_evmenu import TestEvMenu
 from evennia.prototypes import spawner, prototypes as protlib
@@ -62,6 +64,41 @@ class TestSpawner(EvenniaTest):
                           _PROTPARENTS["GOBLIN"], _PROTPARENTS["GOBLIN_ARCHWIZARD"],
                           prototype_parents=_PROTPARENTS)], ['goblin grunt', 'goblin archwizard'])
 
+    def test_spawn_bulk(self):
+        prot = {"prototype_key": "bulkprototype",
+                "typeclass": "evennia.objects.objects.DefaultObject",
+                "key": "bulk object",
+                "location": self.room1,
+                "aliases": ["bulky"],
+                "permissions": ["Builder"],
+                "locks": "get:false()",
+                "tags": [("bulktag", "bulkcat", None)],
+                "attrs": [("attr1", ["a", 1, 2], "bulkcat", "")],
+                "attr2": "value2"}
+        objs = spawner.spawn(*[prot] * 5, bulk=True)
+        self.assertEqual(len(set(obj.id for obj in objs)), 5)
+        self.assertEqual(set(protlib.search_objects_with_prototype("bulkprototype")), set(objs))
+        for obj in objs:
+            self.assertEqual(obj.key, "bulk object")
+            self.assertTrue(obj in self.room1.contents)
+            self.assertEqual(obj.aliases.all(), ["bulky"])
+            self.assertEqual(obj.permissions.all(), ["builder"])
+            self.assertEqual(obj.tags.get("bulktag", category="bulkcat"), "bulktag")
+            self.assertEqual(obj.attributes.get("attr1", category="bulkcat"), ["a", 1, 2])
+            self.assertEqual(obj.db.attr2, "value2")
+            self.assertFalse(obj.access(self.char1, "get"))
+            # the default locks from basetype_setup are still there
+            self.assertTrue(obj.locks.get("view"))
+            # check against a fresh load from the database
+            obj.attributes.reset_cache()
+            obj.tags.reset_cache()
+            self.assertEqual(obj.attributes.get("attr1", category="bulkcat"), ["a", 1, 2])
+            self.assertEqual(obj.db.attr2, "value2")
+            self.assertEqual(obj.tags.get("bulktag", category="bulkcat"), "bulktag")
+        # new ids are not reused
+        objs[-1].delete()
+        self.assertNotEqual(spawner.spawn(prot, bulk=True)[0].id, objs[-1].id)
+
 
 class TestUtils(EvenniaTest):
 
@@ -238,6 +275,43 @@ class TestUtils(EvenniaTest):
                           'typeclass': 'evennia.objects.objects.DefaultObject'},
                          new_prot)
 
+    def test_update_objects_in_background(self):
+        prot = {"prototype_key": "bgprototype",
+                "typeclass": "evennia.objects.objects.DefaultObject",
+                "key": "mob",
+                "power": 1}
+        objs = spawner.spawn(*[prot] * 5)
+        prot = dict(prot, power=2, speed=3, tags=[("fast", None, None)])
+        clock = task.Clock()
+        cooperator = task.Cooperator(terminationPredicateFactory=lambda: lambda: True,
+                                     scheduler=lambda step: clock.callLater(1, step))
+        progress = mock.Mock()
+        with mock.patch.object(spawner, "_PROTOTYPE_UPDATE_CHUNK_SIZE", 2), \
+                mock.patch.object(spawner.task, "cooperate", cooperator.cooperate):
+            deferred = spawner.start_prototype_update(prot, progress=progress)
+            self.assertRaises(RuntimeError, spawner.start_prototype_update, prot)
+            clock.advance(1)
+            progress.assert_called_with(2, 5)
+            self.assertEqual([obj.db.power for obj in objs], [2, 2, 1, 1, 1])
+            self.assertEqual([obj.db.speed for obj in objs], [3, 3, None, None, None])
+            self.assertEqual([obj.tags.get("fast") for obj in objs],
+                             ["fast", "fast", None, None, None])
+            # the server reloads; the update is resumed
+            spawner._PROTOTYPE_UPDATES.pop("bgprototype").pause()
+            spawner.resume_prototype_updates()
+            clock.pump([1] * 4)
+            self.assertEqual(progress.call_count, 1)
+            self.assertFalse(spawner._PROTOTYPE_UPDATES)
+            self.assertEqual(ServerConfig.objects.conf_entries("prototype_updates"), {})
+        self.assertEqual([obj.db.power for obj in objs], [2] * 5)
+        self.assertEqual([obj.db.speed for obj in objs], [3] * 5)
+        self.assertEqual([obj.tags.get("fast") for obj in objs], ["fast"] * 5)
+        # check against a fresh load from the database
+        for obj in objs:
+            obj.attributes.reset_cache()
+        self.assertEqual([obj.db.power for obj in objs], [2] * 5)
+        self.assertFalse(deferred.called)
+
 
 class TestProtLib(EvenniaTest):
 
@@ -214,6 +214,38 @@ class ScriptDBManager(TypedObjectManager):
         VALIDATE_ITERATION -= 1
         return nr_started, nr_stopped
 
+    def iter_validate(self, key=None):
+        """
+        Validate all scripts like `validate` does during normal
+        operation, one script per step. This is the server's hourly
+        `script_validation` maintenance job. Scripts stopped while
+        the validation runs are skipped, and each step counts as a
+        validation of its own, so scripts validating others from
+        their hooks don't start another full validation.
+
+        Args:
+            key (str, optional): Validate only scripts with this key.
+
+        Yields:
+            script (Script): Each script, after it was validated.
+
+        """
+        global VALIDATE_ITERATION
+        for script in list(self.get_all_scripts(key=key)):
+            if not script.pk:
+                # stopped since the validation started
+                continue
+            # each step counts as a validation, so nested calls are skipped
+            outer, VALIDATE_ITERATION = VALIDATE_ITERATION, 1
+            try:
+                if script.is_valid():
+                    script.start()
+                else:
+                    script.stop()
+            finally:
+                VALIDATE_ITERATION = outer
+            yield script
+
     def search_script(self, ostring, obj=None, only_timed=False, typeclass=None):
         """
         Search for a particular script.
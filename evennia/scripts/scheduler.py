@@ -0,0 +1,305 @@
+"""
+Script scheduler
+
+Normally every running timed Script has its own `ExtendedLoopingCall`
+and so its own timer in the reactor. With many thousands of timed
+Scripts the reactor's queue of timed calls becomes large and is
+constantly reordered. If `settings.SCRIPT_SCHEDULER` is set, Scripts
+instead step using a `ScheduledTask`, which works like an
+`ExtendedLoopingCall` but is driven by the `SCRIPT_SCHEDULER`, a
+hashed timing wheel run by a single reactor timer.
+
+The wheel is a ring of slots, each covering `resolution` seconds. A
+task due at a given time is put in the slot of the first wheel tick at
+or after that time. Each tick, only the tasks in the slot of that tick
+are checked, and the ones that are due are fired. Tasks due more than
+one turn of the wheel ahead just stay in their slot until their turn
+comes. This makes adding, removing and firing a task take the same
+time no matter how many tasks are scheduled. Tasks fire at most
+`resolution` seconds late.
+
+"""
+from builtins import object, range
+
+import math
+
+from django.conf import settings
+from twisted.internet import reactor
+from twisted.internet.defer import maybeDeferred
+from evennia.utils import logger
+
+__all__ = ("ScriptScheduler", "ScheduledTask", "SCRIPT_SCHEDULER")
+
+_RESOLUTION = settings.SCRIPT_SCHEDULER_RESOLUTION
+# the number of slots in the wheel
+_NUM_SLOTS = 1024
+
+
+class ScriptScheduler(object):
+    """
+    A hashed timing wheel, firing scheduled tasks from one reactor timer.
+
+    """
+
+    def __init__(self, resolution=_RESOLUTION, num_slots=_NUM_SLOTS, clock=None):
+        """
+        Set up the wheel.
+
+        Args:
+            resolution (float, optional): Seconds between wheel ticks.
+            num_slots (int, optional): Number of slots in the wheel.
+            clock (IReactorTime, optional): The clock to use, by default
+                the reactor.
+
+        """
+        self.resolution = float(resolution)
+        self.num_slots = num_slots
+        self.clock = clock or reactor
+        self.slots = [set() for _ in range(num_slots)]
+        # {task: tick} for all scheduled tasks
+        self.ticks = {}
+        # the last tick handled, or None if idle
+        self.current_tick = None
+        self._call = None
+        # statistics
+        self.fired = 0
+
+    def _tick_of(self, when):
+        """
+        Get the first wheel tick at or after a time.
+
+        """
+        return int(math.ceil(when / self.resolution))
+
+    def _schedule_tick(self):
+        """
+        Schedule the reactor timer for the next wheel tick.
+
+        """
+        delay = (self.current_tick + 1) * self.resolution - self.clock.seconds()
+        self._call = self.clock.callLater(max(0, delay), self._tick)
+
+    def _tick(self):
+        """
+        Fire all tasks that are due. This handles all wheel ticks since
+        the last one, in case the reactor was busy for a while.
+
+        """
+        self._call = None
+        now_tick = int(math.floor(self.clock.seconds() / self.resolution + 1e-9))
+        first_tick = self.current_tick + 1
+        # tasks rescheduled while firing will go to later ticks
+        self.current_tick = max(now_tick, self.current_tick)
+        for tick in range(first_tick, min(now_tick, first_tick + self.num_slots - 1) + 1):
+            slot = self.slots[tick % self.num_slots]
+            for task in [task for task in slot if self.ticks[task] <= now_tick]:
+                if task not in self.ticks:
+                    # removed by another task firing before it
+                    continue
+                self.remove(task)
+                self.fired += 1
+                try:
+                    task()
+                except Exception:
+                    logger.log_trace()
+        if self.ticks and not self._call:
+            self._schedule_tick()
+
+    def add(self, task, when):
+        """
+        Schedule a task to be fired. A task can only be scheduled
+        once; adding it again reschedules it.
+
+        Args:
+            task (callable): Called without arguments when due.
+            when (float): The time (as given by the clock) to fire at.
+
+        """
+        self.remove(task)
+        if self.current_tick is None:
+            # start up the wheel
+            self.current_tick = int(math.floor(self.clock.seconds() / self.resolution))
+        tick = max(self._tick_of(when), self.current_tick + 1)
+        self.ticks[task] = tick
+        self.slots[tick % self.num_slots].add(task)
+        if not self._call:
+            self._schedule_tick()
+
+    def remove(self, task):
+        """
+        Unschedule a task.
+
+        Args:
+            task (callable): A task to unschedule. Nothing happens if
+                it was not scheduled.
+
+        """
+        tick = self.ticks.pop(task, None)
+        if tick is not None:
+            self.slots[tick % self.num_slots].discard(task)
+            if not self.ticks:
+                # nothing left to do; stop the wheel
+                if self._call and self._call.active():
+                    self._call.cancel()
+                self._call = None
+                self.current_tick = None
+
+    def stats(self):
+        """
+        Get the scheduler statistics.
+
+        Returns:
+            stats (dict): The number of `scheduled` tasks and the
+                number of times tasks were `fired`.
+
+        """
+        return {"scheduled": len(self.ticks), "fired": self.fired}
+
+
+class ScheduledTask(object):
+    """
+    A repeating task run by a `ScriptScheduler`. It has the same
+    interface as `evennia.scripts.scripts.ExtendedLoopingCall`.
+
+    """
+
+    def __init__(self, f, scheduler=None):
+        """
+        Set up the task.
+
+        Args:
+            f (callable): Called every repeat. If it returns a Deferred,
+                the next repeat is scheduled when that has fired.
+            scheduler (ScriptScheduler, optional): The scheduler to use,
+                by default `SCRIPT_SCHEDULER`.
+
+        """
+        self.f = f
+        self.scheduler = scheduler or SCRIPT_SCHEDULER
+        self.running = False
+        self.interval = None
+        self.starttime = None
+        self.start_delay = None
+        self.callcount = 0
+        # the time of the next call, if scheduled
+        self.due = None
+
+    def _schedule(self, when):
+        """
+        Schedule the next call.
+
+        """
+        self.due = when
+        self.scheduler.add(self, when)
+
+    def _schedule_next(self, result=None):
+        """
+        Schedule the next repeat after a call, skipping any repeats
+        missed because the call (or the reactor) was slow.
+
+        """
+        if self.running and self.due is None:
+            now = self.scheduler.clock.seconds()
+            if self.interval:
+                self._schedule(now + self.interval - ((now - self.starttime) % self.interval))
+            else:
+                self._schedule(now)
+
+    def _failed(self, failure):
+        """
+        Stop on an error in the callback, like a `LoopingCall` does.
+
+        """
+        self.running = False
+        logger.log_err("ScheduledTask %s stopped on error:\n%s" % (self.f, failure.getTraceback()))
+
+    def start(self, interval, now=True, start_delay=None, count_start=0):
+        """
+        Start running the callback every interval seconds.
+
+        Args:
+            interval (int): Repeat interval in seconds.
+            now (bool, optional): Whether to start immediately or after
+                `start_delay` seconds.
+            start_delay (int): The number of seconds before starting.
+                If None, wait interval seconds. Only valid if `now` is `False`.
+            count_start (int): Number of repeats to start at.
+
+        Raises:
+            AssertError: if trying to start a task which is already running.
+            ValueError: If interval is set to an invalid value < 0.
+
+        """
+        assert not self.running, ("Tried to start an already running ScheduledTask.")
+        if interval < 0:
+            raise ValueError("interval must be >= 0")
+        self.running = True
+        self.interval = interval
+        self.starttime = self.scheduler.clock.seconds()
+        self.callcount = max(0, count_start)
+        self.start_delay = start_delay if start_delay is None else max(0, start_delay)
+
+        if now:
+            self()
+        elif self.start_delay is not None:
+            self._schedule(self.starttime + self.start_delay)
+        else:
+            self._schedule(self.starttime + interval)
+
+    def stop(self):
+        """
+        Stop the task.
+
+        Raises:
+            AssertionError: When trying to stop a task that is not running.
+
+        """
+        assert self.running, ("Tried to stop a ScheduledTask that was not running.")
+        self.running = False
+        self.due = None
+        self.scheduler.remove(self)
+
+    def __call__(self):
+        """
+        Tick one step and schedule the next.
+
+        """
+        self.callcount += 1
+        if self.start_delay:
+            self.start_delay = None
+            self.starttime = self.scheduler.clock.seconds()
+        self.due = None
+        maybeDeferred(self.f).addCallbacks(self._schedule_next, self._failed)
+
+    def force_repeat(self):
+        """
+        Force-fire the callback
+
+        Raises:
+            AssertionError: When trying to force a task that is not
+                running.
+
+        """
+        assert self.running, ("Tried to fire a ScheduledTask that was not running.")
+        self.scheduler.remove(self)
+        self.starttime = self.scheduler.clock.seconds()
+        self()
+
+    def next_call_time(self):
+        """
+        Get the next call time.
+
+        Returns:
+            next (float or None): The time in seconds until the next
+                call, or `None` if the task is not running.
+
+        """
+        if self.running:
+            if self.due is None:
+                # being called right now
+                return self.interval
+            return max(0, self.due - self.scheduler.clock.seconds())
+        return None
+
+
+SCRIPT_SCHEDULER = ScriptScheduler()
@@ -7,11 +7,13 @@ ability to run timers.
 
 from twisted.internet.defer import Deferred, maybeDeferred
 from twisted.internet.task import LoopingCall
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import ugettext as _
 from evennia.typeclasses.models import TypeclassBase
 from evennia.scripts.models import ScriptDB
 from evennia.scripts.manager import ScriptManager
+from evennia.scripts.scheduler import ScheduledTask
 from evennia.utils import logger
 from future.utils import with_metaclass
 
@@ -20,6 +22,7 @@ __all__ = ["DefaultScript", "DoNothing", "Store"]
 
 FLUSHING_INSTANCES = False  # whether we're in the process of flushing scripts from the cache
 SCRIPT_FLUSH_TIMERS = {}  # stores timers for scripts that are currently being flushed
+_USE_SCRIPT_SCHEDULER = settings.SCRIPT_SCHEDULER
 
 
 def restart_scripts_after_flush():
@@ -165,13 +168,27 @@ class ScriptBase(with_metaclass(TypeclassBase, ScriptDB)):
         except Exception:
             return False
 
+    def _new_task(self):
+        """
+        Create the task runner stepping the script.
+
+        Returns:
+            task (ExtendedLoopingCall or ScheduledTask): A runner with
+                its own timer, or one driven by the central script
+                scheduler if `settings.SCRIPT_SCHEDULER` is set.
+
+        """
+        if _USE_SCRIPT_SCHEDULER:
+            return ScheduledTask(self._step_task)
+        return ExtendedLoopingCall(self._step_task)
+
     def _start_task(self):
         """
         Start task runner.
 
         """
 
-        self.ndb._task = ExtendedLoopingCall(self._step_task)
+        self.ndb._task = self._new_task()
 
         if self.db._paused_time:
             # the script was paused; restarting
@@ -372,7 +389,7 @@ class DefaultScript(ScriptBase):
     def at_idmapper_flush(self):
         """If we're flushing this object, make sure the LoopingCall is gone too"""
         ret = super(DefaultScript, self).at_idmapper_flush()
-        if ret and self.ndb._task:
+        if ret and self.ndb._task and self.ndb._task.running:
             try:
                 from twisted.internet import reactor
                 global FLUSHING_INSTANCES
@@ -409,7 +426,7 @@ class DefaultScript(ScriptBase):
         if self.is_active and not force_restart:
             # The script is already running, but make sure we have a _task if this is after a cache flush
             if not self.ndb._task and self.db_interval >= 0:
-                self.ndb._task = ExtendedLoopingCall(self._step_task)
+                self.ndb._task = self._new_task()
                 try:
                     start_delay, callcount = SCRIPT_FLUSH_TIMERS[self.id]
                     del SCRIPT_FLUSH_TIMERS[self.id]
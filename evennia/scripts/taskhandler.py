@@ -30,7 +30,10 @@ class TaskHandler(object):
 
     def __init__(self):
         self.tasks = {}
-        self.to_save = {}
+        # ids of tasks added or removed since the last save
+        self._dirty = set()
+        # task ids are never reused while the server runs
+        self.next_id = 1
 
     def load(self):
         """Load from the ServerConfig.
@@ -40,55 +43,79 @@ class TaskHandler(object):
             It populates `self.tasks` according to the ServerConfig.
 
         """
-        to_save = False
+        # each task is stored in its own entry, as a still-serialized task
+        tasks = dict((int(task_id), value) for task_id, value in
+                     ServerConfig.objects.conf_entries("delayed_tasks").items())
         value = ServerConfig.objects.conf("delayed_tasks", default={})
-        if isinstance(value, basestring):
-            tasks = dbunserialize(value)
-        else:
-            tasks = value
+        if value:
+            # all tasks saved as one entry by an older version
+            if isinstance(value, basestring):
+                value = dbunserialize(value)
+            tasks.update(value)
+            self._dirty.update(value)
+            ServerConfig.objects.conf("delayed_tasks", delete=True)
 
-        # At this point, `tasks` contains a dictionary of still-serialized tasks
         for task_id, value in tasks.items():
             date, callback, args, kwargs = dbunserialize(value)
             if isinstance(callback, tuple):
                 # `callback` can be an object and name for instance methods
                 obj, method = callback
                 if obj is None:
-                    to_save = True
+                    self._dirty.add(task_id)
                     continue
 
                 callback = getattr(obj, method)
             self.tasks[task_id] = (date, callback, args, kwargs)
+        if tasks:
+            self.next_id = max(self.next_id, max(tasks) + 1)
 
-        if to_save:
+        if self._dirty:
             self.save()
 
-    def save(self):
-        """Save the tasks in ServerConfig."""
-        for task_id, (date, callback, args, kwargs) in self.tasks.items():
-            if task_id in self.to_save:
-                continue
+    def _serialize(self, task_id):
+        """Serialize a task for saving.
 
-            if getattr(callback, "__self__", None):
-                # `callback` is an instance method
-                obj = callback.__self__
-                name = callback.__name__
-                callback = (obj, name)
+        Args:
+            task_id (int): A valid task ID.
 
-            # Check if callback can be pickled. args and kwargs have been checked
-            safe_callback = None
+        Returns:
+            serialized (str): The serialized task.
 
-            try:
-                dbserialize(callback)
-            except (TypeError, AttributeError):
-                raise ValueError("the specified callback {} cannot be pickled. "
-                                 "It must be a top-level function in a module or an "
-                                 "instance method.".format(callback))
-            else:
-                safe_callback = callback
+        Raises:
+            ValueError: If the callback cannot be pickled.
+
+        """
+        date, callback, args, kwargs = self.tasks[task_id]
+        if getattr(callback, "__self__", None):
+            # `callback` is an instance method
+            obj = callback.__self__
+            name = callback.__name__
+            callback = (obj, name)
+
+        # Check if callback can be pickled. args and kwargs have been checked
+        try:
+            dbserialize(callback)
+        except (TypeError, AttributeError):
+            raise ValueError("the specified callback {} cannot be pickled. "
+                             "It must be a top-level function in a module or an "
+                             "instance method.".format(callback))
+        return dbserialize((date, callback, args, kwargs))
+
+    def save(self):
+        """Save the tasks added or removed since the last save in ServerConfig.
 
-            self.to_save[task_id] = dbserialize((date, safe_callback, args, kwargs))
-        ServerConfig.objects.conf("delayed_tasks", self.to_save)
+        Each task is stored in its own entry, so only the changed
+        tasks are written.
+
+        """
+        to_save, to_delete = {}, []
+        for task_id in self._dirty:
+            if task_id in self.tasks:
+                to_save[task_id] = self._serialize(task_id)
+            else:
+                to_delete.append(task_id)
+        self._dirty = set()
+        ServerConfig.objects.update_conf_entries("delayed_tasks", to_save, to_delete)
 
     def add(self, timedelay, callback, *args, **kwargs):
         """Add a new persistent task in the configuration.
@@ -112,10 +139,8 @@ class TaskHandler(object):
             # Choose a free task_id
             safe_args = []
             safe_kwargs = {}
-            used_ids = self.tasks.keys()
-            task_id = 1
-            while task_id in used_ids:
-                task_id += 1
+            task_id = self.next_id
+            self.next_id += 1
 
             # Check that args and kwargs contain picklable information
             for arg in args:
@@ -139,7 +164,14 @@ class TaskHandler(object):
                     safe_kwargs[key] = value
 
             self.tasks[task_id] = (now + delta, callback, safe_args, safe_kwargs)
-            self.save()
+            self._dirty.add(task_id)
+            try:
+                self.save()
+            except ValueError:
+                # the callback can't be saved; don't keep the task
+                del self.tasks[task_id]
+                self._dirty.discard(task_id)
+                raise
             callback = self.do_task
             args = [task_id]
             kwargs = {}
@@ -158,9 +190,7 @@ class TaskHandler(object):
 
         """
         del self.tasks[task_id]
-        if task_id in self.to_save:
-            del self.to_save[task_id]
-
+        self._dirty.add(task_id)
         self.save()
 
     def do_task(self, task_id):
@@ -174,9 +204,7 @@ class TaskHandler(object):
 
         """
         date, callback, args, kwargs = self.tasks.pop(task_id)
-        if task_id in self.to_save:
-            del self.to_save[task_id]
-
+        self._dirty.add(task_id)
         self.save()
         callback(*args, **kwargs)
 
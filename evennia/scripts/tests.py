@@ -1,8 +1,18 @@
 # this is an optimized version only available in later Django versions
 from unittest import TestCase
+from mock import Mock, patch
+from twisted.internet import task
+from evennia.scripts import tickerhandler, taskhandler, scripts, scheduler
 from evennia.scripts.models import ScriptDB, ObjectDoesNotExist
+from evennia.server.models import ServerConfig
 from evennia.utils.create import create_script
 from evennia.scripts.scripts import DoNothing
+from evennia.utils.dbserialize import dbserialize
+
+
+def _callback(*args, **kwargs):
+    "Ticker/task callback for the tests"
+    pass
 
 
 class TestScriptDB(TestCase):
@@ -41,3 +51,219 @@ class TestScriptDB(TestCase):
         "Can deleted scripts be said to be valid?"
         self.scr.delete()
         self.assertFalse(self.scr.is_valid())  # assertRaises? See issue #509
+
+    def test_iter_validate(self):
+        "Validation one script at a time"
+        invalid = create_script(DoNothing, key="invalid_script")
+        invalid.is_valid = lambda: False
+        validation = ScriptDB.objects.iter_validate(key="invalid_script")
+        self.assertEqual(next(validation), invalid)
+        self.assertFalse(invalid.pk)
+        self.assertEqual(list(validation), [])
+        self.assertTrue(self.scr in list(ScriptDB.objects.iter_validate()))
+        self.assertTrue(self.scr.is_active)
+
+
+class TestTicker(TestCase):
+    "Check the phased and time-budgeted ticking of a Ticker"
+
+    def setUp(self):
+        self.clock = task.Clock()
+        self.called = []
+
+    def _add_subscribers(self, ticker, num):
+        def _callback(num):
+            self.called.append(num)
+        for inum in range(num):
+            store_key = (None, None, "tests.callback", ticker.interval, "sub%i" % inum, False)
+            ticker.add(store_key, inum, _callback=_callback, _obj=None)
+
+    def test_phases(self):
+        with patch.object(tickerhandler, "_TICKER_PHASE_SLOTS", 3):
+            ticker = tickerhandler.Ticker(6)
+        ticker.task.clock = self.clock
+        self._add_subscribers(ticker, 30)
+        self.assertEqual(ticker.task.interval, 2.0)
+        phases = []
+        for _ in range(3):
+            self.called = []
+            self.clock.advance(2)
+            self.assertEqual(len(self.called), len(ticker._phases[len(phases)]))
+            phases.append(set(self.called))
+        self.assertEqual(set.union(*phases), set(range(30)))
+        self.assertEqual(sum(len(phase) for phase in phases), 30)
+        # every subscriber ticks in the same phase every interval
+        self.called = []
+        self.clock.advance(2)
+        self.assertEqual(set(self.called), phases[0])
+        ticker.remove(ticker._phases[0].copy().pop())
+        self.assertEqual(sum(len(phase) for phase in ticker._phases), 29)
+        stats = ticker.stats()
+        self.assertEqual((stats["subscribers"], stats["slots"], stats["ticks"]), (29, 3, 4))
+        ticker.stop()
+
+    def test_time_budget(self):
+        now = [0.0]
+
+        def _callback(num):
+            # each call takes a second
+            now[0] += 1.0
+            self.called.append(num)
+
+        reactor = task.Clock()
+        with patch.object(tickerhandler, "_TICKER_TIME_BUDGET", 1.5), \
+                patch.object(tickerhandler, "reactor", reactor), \
+                patch.object(tickerhandler, "time", Mock(time=lambda: now[0])):
+            ticker = tickerhandler.Ticker(10)
+            ticker.task.clock = self.clock
+            for inum in range(5):
+                ticker.add((None, None, "tests.callback", 10, "sub%i" % inum, False),
+                           inum, _callback=_callback, _obj=None)
+            self.clock.advance(10)
+            self.assertEqual(len(self.called), 2)
+            self.assertTrue(ticker._is_ticking)
+            # the rest are ticked in later reactor iterations
+            reactor.advance(0)
+            self.assertEqual(sorted(self.called), range(5))
+        self.assertFalse(ticker._is_ticking)
+        stats = ticker.stats()
+        self.assertEqual((stats["ticks"], stats["overruns"], stats["max"]), (1, 1, 5.0))
+        ticker.stop()
+
+
+class TestTickerHandlerStorage(TestCase):
+    "Check that ticker subscriptions are saved one by one"
+
+    def setUp(self):
+        self.handler = tickerhandler.TickerHandler(save_name="test_tickers")
+
+    def tearDown(self):
+        self.handler.clear()
+        ServerConfig.objects.update_conf_entries(
+            "test_tickers", delete=ServerConfig.objects.conf_entries("test_tickers"))
+
+    def test_save_restore(self):
+        update = ServerConfig.objects.update_conf_entries
+        with patch.object(ServerConfig.objects, "update_conf_entries", Mock(wraps=update)) as mock:
+            for inum in range(3):
+                self.handler.add(100, _callback, idstring="sub%i" % inum)
+            self.assertEqual([len(call[0][1]) for call in mock.call_args_list], [1, 1, 1])
+            self.handler.remove(100, _callback, idstring="sub0")
+            self.assertEqual(mock.call_args[0][1:], ({}, set([self.handler._storage_name(
+                self.handler._store_key(None, "evennia.scripts.tests._callback", 100,
+                                        _callback, "sub0"))])))
+        self.assertEqual(len(ServerConfig.objects.conf_entries("test_tickers")), 2)
+        self.handler.save()
+        self.handler.ticker_pool.stop()
+
+        handler = tickerhandler.TickerHandler(save_name="test_tickers")
+        handler.restore()
+        self.assertEqual(sorted(key[4] for key in handler.ticker_storage), ["sub1", "sub2"])
+        self.assertEqual(handler.ticker_pool.tickers[100].subscriptions.keys(),
+                         handler.ticker_storage.keys())
+        handler.clear()
+        self.assertEqual(ServerConfig.objects.conf_entries("test_tickers"), {})
+
+    def test_restore_legacy(self):
+        store_key = self.handler._store_key(None, "evennia.scripts.tests._callback", 100,
+                                            _callback, "legacy")
+        ServerConfig.objects.conf(key="test_tickers", value=dbserialize(
+            {store_key: ((), {"_callback": _callback, "_obj": None})}))
+        self.handler.restore()
+        self.assertEqual(self.handler.ticker_storage.keys(), [store_key])
+        self.assertEqual(ServerConfig.objects.conf_entries("test_tickers").keys(),
+                         [self.handler._storage_name(store_key)])
+        self.assertIsNone(ServerConfig.objects.conf(key="test_tickers"))
+
+
+class TestTaskHandler(TestCase):
+    "Check the storage and id allocation of persistent tasks"
+
+    def setUp(self):
+        self.handler = taskhandler.TaskHandler()
+        self.patcher = patch.object(taskhandler, "deferLater", Mock())
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        ServerConfig.objects.update_conf_entries(
+            "delayed_tasks", delete=ServerConfig.objects.conf_entries("delayed_tasks"))
+
+    def test_add_remove(self):
+        self.handler.add(100, _callback, 1, persistent=True)
+        self.handler.add(100, _callback, 2, persistent=True)
+        self.handler.remove(1)
+        self.handler.add(100, _callback, 3, persistent=True)
+        # ids are not reused
+        self.assertEqual(sorted(self.handler.tasks), [2, 3])
+        self.assertEqual(sorted(ServerConfig.objects.conf_entries("delayed_tasks")), ["2", "3"])
+        self.handler.do_task(2)
+        self.assertEqual(ServerConfig.objects.conf_entries("delayed_tasks").keys(), ["3"])
+
+        handler = taskhandler.TaskHandler()
+        handler.load()
+        self.assertEqual(handler.tasks[3][1:], (_callback, [3], {}))
+        self.assertEqual(handler.next_id, 4)
+
+
+class TestScriptScheduler(TestCase):
+    "Check the timing wheel driving scheduled script repeats"
+
+    def setUp(self):
+        self.clock = task.Clock()
+        self.scheduler = scheduler.ScriptScheduler(resolution=1, num_slots=8, clock=self.clock)
+        self.calls = []
+        self.task = scheduler.ScheduledTask(lambda: self.calls.append(self.clock.seconds()),
+                                            scheduler=self.scheduler)
+
+    def test_repeat(self):
+        self.task.start(5, now=False)
+        self.clock.pump([1] * 16)
+        self.assertEqual(self.calls, [5, 10, 15])
+        self.assertEqual(self.task.callcount, 3)
+        self.assertEqual(self.task.next_call_time(), 4)
+        self.task.force_repeat()
+        self.assertEqual(self.calls[-1], 16)
+        self.assertEqual(self.task.next_call_time(), 5)
+        self.task.stop()
+        self.clock.pump([1] * 10)
+        self.assertEqual(len(self.calls), 4)
+        self.assertEqual(self.scheduler.ticks, {})
+        self.assertFalse(self.clock.getDelayedCalls())
+
+    def test_long_interval(self):
+        # longer than one turn of the wheel
+        self.task.start(20, now=False, start_delay=3, count_start=2)
+        self.clock.pump([0.5] * 100)
+        self.assertEqual(self.calls, [3, 23, 43])
+        self.assertEqual(self.task.callcount, 5)
+        # skips missed repeats after a stall
+        self.clock.advance(50)
+        self.assertEqual(self.calls[-1], 100)
+        self.assertEqual(self.task.next_call_time(), 3)
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.task.stop()
+
+    def test_script(self):
+        with patch.object(scripts, "_USE_SCRIPT_SCHEDULER", True), \
+                patch.object(scheduler.SCRIPT_SCHEDULER, "clock", self.clock):
+            script = create_script(DoNothing, key="scheduled_script", interval=10)
+            # the first repeat was done when it started
+            self.assertTrue(isinstance(script.ndb._task, scheduler.ScheduledTask))
+            script.at_repeat = Mock()
+            self.clock.pump([5, 5])
+            self.assertEqual(script.at_repeat.call_count, 1)
+            self.clock.advance(4)
+            self.assertEqual(script.time_until_next_repeat(), 6)
+            script.pause()
+            self.assertEqual((script.db._paused_time, script.db._paused_callcount), (6, 2))
+            self.clock.advance(100)
+            self.assertEqual(script.at_repeat.call_count, 1)
+            script.unpause()
+            self.clock.advance(6)
+            self.assertEqual(script.at_repeat.call_count, 2)
+            script.force_repeat()
+            self.assertEqual(script.at_repeat.call_count, 3)
+            self.assertEqual(script.time_until_next_repeat(), 10)
+            script.stop()
+            self.assertFalse(scheduler.SCRIPT_SCHEDULER.ticks)
@@ -46,6 +46,12 @@ If either or both `idstring` or `persistent` has been changed from their default
 must be supplied to the `TICKER_HANDLER.remove` call to properly identify the ticker
 to remove.
 
+With many subscribers on the same interval, use `settings.TICKER_PHASE_SLOTS` to
+spread their ticks out over the interval rather than ticking them all at once, and/or
+`settings.TICKER_TIME_BUDGET` to let the server handle other events in the middle
+of a long tick. The timing of each ticker is available from `TICKER_HANDLER.stats()`
+and is shown by the `@tickers` command.
+
 The TickerHandler's functionality can be overloaded by modifying the
 Ticker class and then changing TickerPool and TickerHandler to use the
 custom classes
@@ -63,12 +69,20 @@ class MyTickerHandler(TickerHandler):
 If one wants to duplicate TICKER_HANDLER's auto-saving feature in
 a  custom handler one can make a custom `AT_STARTSTOP_MODULE` entry to
 call the handler's `save()` and `restore()` methods when the server reboots.
+Each subscription is saved as its own `ServerConfig` entry, so adding or
+removing a subscription only writes that one entry to the database.
 
 """
 import inspect
-from builtins import object
+import time
+import zlib
+from hashlib import md5
+from builtins import object, range
+from collections import deque
 
+from twisted.internet import reactor, task
 from twisted.internet.defer import inlineCallbacks
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from evennia.scripts.scripts import ExtendedLoopingCall
 from evennia.server.models import ServerConfig
@@ -79,6 +93,11 @@ from evennia.utils import variable_from_module
 _GA = object.__getattribute__
 _SA = object.__setattr__
 
+_TICKER_PHASE_SLOTS = settings.TICKER_PHASE_SLOTS
+_TICKER_TIME_BUDGET = settings.TICKER_TIME_BUDGET
+# how many of the latest tick times to keep for the statistics
+_NUM_TICK_TIMES = 100
+
 
 _ERROR_ADD_TICKER = \
     """TickerHandler: Tried to add an invalid ticker:
@@ -91,12 +110,32 @@ class Ticker(object):
     Represents a repeatedly running task that calls
     hooks repeatedly. Overload `_callback` to change the
     way it operates.
+
+    If `settings.TICKER_PHASE_SLOTS` is > 1, the subscribers are spread
+    out over that many phases, one of which is ticked every
+    `interval / slots` seconds. A subscriber's phase is given by a hash
+    of its store key, so it's the same every time.
+
     """
 
+    def _phase_of(self, store_key):
+        """
+        Get the phase slot of a subscription.
+
+        Args:
+            store_key (tuple): Unique store key.
+
+        Returns:
+            phase (int): The phase slot to tick the subscription in.
+
+        """
+        return zlib.crc32(repr(store_key)) % self.slots
+
     @inlineCallbacks
     def _callback(self):
         """
-        This will be called repeatedly every `self.interval` seconds.
+        This will be called repeatedly every `self.interval` seconds
+        (or `self.interval / self.slots` seconds if phased).
         `self.subscriptions` contain tuples of (obj, args, kwargs) for
         each subscribing object.
 
@@ -113,7 +152,24 @@ class Ticker(object):
         self._to_add = []
         self._to_remove = []
         self._is_ticking = True
-        for store_key, (args, kwargs) in self.subscriptions.iteritems():
+        if self.slots > 1:
+            store_keys = list(self._phases[self._phase])
+            self._phase = (self._phase + 1) % self.slots
+        else:
+            store_keys = list(self.subscriptions)
+        budget = self.time_budget
+        worktime = 0.0
+        start = time.time()
+        for store_key in store_keys:
+            if budget and time.time() - start > budget:
+                # let the reactor handle other events before continuing
+                worktime += time.time() - start
+                yield task.deferLater(reactor, 0, lambda: None)
+                start = time.time()
+            if store_key not in self.subscriptions:
+                # the ticker was stopped in the meantime
+                continue
+            args, kwargs = self.subscriptions[store_key]
             callback = yield kwargs.pop("_callback", "at_tick")
             obj = yield kwargs.pop("_obj", None)
             try:
@@ -137,6 +193,8 @@ class Ticker(object):
                 # make sure to re-store
                 kwargs["_callback"] = callback
                 kwargs["_obj"] = obj
+        worktime += time.time() - start
+        self._record_tick(worktime)
         # cleanup - we do this here to avoid changing the subscription dict while it loops
         self._is_ticking = False
         for store_key in self._to_remove:
@@ -146,6 +204,20 @@ class Ticker(object):
         self._to_remove = []
         self._to_add = []
 
+    def _record_tick(self, worktime):
+        """
+        Update the tick statistics.
+
+        Args:
+            worktime (float): The seconds spent ticking subscribers
+                during the last tick.
+
+        """
+        self.ticks += 1
+        self.tick_times.append(worktime)
+        if worktime > (self.time_budget or float(self.interval) / self.slots):
+            self.overruns += 1
+
     def __init__(self, interval):
         """
         Set up the ticker
@@ -156,9 +228,17 @@ class Ticker(object):
         """
         self.interval = interval
         self.subscriptions = {}
+        self.slots = max(1, int(_TICKER_PHASE_SLOTS))
+        self.time_budget = _TICKER_TIME_BUDGET
+        self._phases = [set() for _ in range(self.slots)]
+        self._phase = 0
         self._is_ticking = False
         self._to_remove = []
         self._to_add = []
+        # statistics
+        self.ticks = 0
+        self.overruns = 0
+        self.tick_times = deque(maxlen=_NUM_TICK_TIMES)
         # set up a twisted asynchronous repeat call
         self.task = ExtendedLoopingCall(self._callback)
 
@@ -176,7 +256,8 @@ class Ticker(object):
             if not subs:
                 self.task.stop()
         elif subs:
-            self.task.start(self.interval, now=False, start_delay=start_delay)
+            self.task.start(float(self.interval) / self.slots, now=False,
+                            start_delay=start_delay)
 
     def add(self, store_key, *args, **kwargs):
         """
@@ -198,6 +279,8 @@ class Ticker(object):
         else:
             start_delay = kwargs.pop("_start_delay", None)
             self.subscriptions[store_key] = (args, kwargs)
+            if self.slots > 1:
+                self._phases[self._phase_of(store_key)].add(store_key)
             self.validate(start_delay=start_delay)
 
     def remove(self, store_key):
@@ -214,6 +297,8 @@ class Ticker(object):
             self._to_remove.append(store_key)
         else:
             self.subscriptions.pop(store_key, False)
+            if self.slots > 1:
+                self._phases[self._phase_of(store_key)].discard(store_key)
             self.validate()
 
     def stop(self):
@@ -222,8 +307,30 @@ class Ticker(object):
 
         """
         self.subscriptions = {}
+        self._phases = [set() for _ in range(self.slots)]
         self.validate()
 
+    def stats(self):
+        """
+        Get the timing statistics of the ticker.
+
+        Returns:
+            stats (dict): The number of `subscribers`, phase `slots`,
+                `ticks` run and `overruns` (ticks that took longer than
+                `settings.TICKER_TIME_BUDGET` or, if that is unset, the
+                time until the next tick), as well as the `p50`, `p99`
+                and `max` seconds spent per tick over the last ticks
+                (`None` if it didn't tick yet).
+
+        """
+        times = sorted(self.tick_times)
+        num = len(times)
+        return {"subscribers": len(self.subscriptions), "slots": self.slots,
+                "ticks": self.ticks, "overruns": self.overruns,
+                "p50": times[num // 2] if times else None,
+                "p99": times[min(num - 1, num * 99 // 100)] if times else None,
+                "max": times[-1] if times else None}
+
 
 class TickerPool(object):
     """
@@ -303,13 +410,15 @@ class TickerHandler(object):
         """
         Initialize handler
 
-        save_name (str, optional): The name of the ServerConfig
-            instance to store the handler state persistently.
+        save_name (str, optional): The prefix of the ServerConfig
+            entries storing the handler state persistently.
 
         """
         self.ticker_storage = {}
         self.save_name = save_name
         self.ticker_pool = self.ticker_pool_class()
+        # store keys of subscriptions changed since the last save
+        self._dirty = set()
 
     def _get_callback(self, callback):
         """
@@ -375,34 +484,66 @@ class TickerHandler(object):
         outpath = path if path and isinstance(path, basestring) else None
         return (packed_obj, methodname, outpath, interval, idstring, persistent)
 
+    def _storage_name(self, store_key):
+        """
+        Get the name of the database entry storing a subscription.
+
+        Args:
+            store_key (tuple): Unique store key.
+
+        Returns:
+            name (str): A hash of the store key.
+
+        """
+        return md5(repr(store_key)).hexdigest()
+
+    def _save_changes(self, delete=()):
+        """
+        Write the subscriptions changed since the last save to the
+        database. Each subscription is stored as its own `ServerConfig`
+        entry, so only the changed ones need writing.
+
+        Args:
+            delete (iterable, optional): Names of additional database
+                entries to remove.
+
+        """
+        to_save, to_delete = {}, set(delete)
+        for store_key in self._dirty:
+            name = self._storage_name(store_key)
+            if store_key not in self.ticker_storage:
+                to_delete.add(name)
+                continue
+            args, kwargs = self.ticker_storage[store_key]
+            obj = kwargs.get("_obj")
+            if ((store_key[1] and obj and obj.pk and
+                    hasattr(obj, store_key[1])) or     # a valid method with existing obj
+                    store_key[2]):                     # a path given
+                to_save[name] = dbserialize((store_key, args, kwargs))
+            else:
+                # the subscription lost its object in the interim
+                to_delete.add(name)
+        self._dirty = set()
+        if to_save or to_delete:
+            ServerConfig.objects.update_conf_entries(self.save_name, to_save, to_delete)
+
     def save(self):
         """
-        Save ticker_storage as a serialized string into a temporary
-        ServerConf field. Whereas saving is done on the fly, if called
-        by server when it shuts down, the current timer of each ticker
+        Save all subscriptions changed since the last save to the
+        database. Whereas saving is done on the fly, if called by
+        server when it shuts down, the current timer of each ticker
         will be saved so it can start over from that point.
 
         """
+        self._save_changes()
         if self.ticker_storage:
             # get the current times so the tickers can be restarted with a delay later
             start_delays = dict((interval, ticker.task.next_call_time())
                                 for interval, ticker in self.ticker_pool.tickers.items())
-
-            # remove any subscriptions that lost its object in the interim
-            to_save = {store_key: (args, kwargs) for store_key, (args, kwargs) in self.ticker_storage.items()
-                       if ((store_key[1] and ("_obj" in kwargs and kwargs["_obj"].pk) and
-                            hasattr(kwargs["_obj"], store_key[1])) or    # a valid method with existing obj
-                           store_key[2])}  # a path given
-
-            # update the timers for the tickers
-            for store_key, (args, kwargs) in to_save.items():
-                interval = store_key[1]
-                # this is a mutable, so it's updated in-place in ticker_storage
-                kwargs["_start_delay"] = start_delays.get(interval, None)
-            ServerConfig.objects.conf(key=self.save_name, value=dbserialize(to_save))
+            ServerConfig.objects.conf(key=self.save_name + "_delays", value=start_delays)
         else:
             # make sure we have nothing lingering in the database
-            ServerConfig.objects.conf(key=self.save_name, delete=True)
+            ServerConfig.objects.conf(key=self.save_name + "_delays", delete=True)
 
     def restore(self, server_reload=True):
         """
@@ -417,46 +558,58 @@ class TickerHandler(object):
 
         """
         # load stored command instructions and use them to re-initialize handler
-        restored_tickers = ServerConfig.objects.conf(key=self.save_name)
-        if restored_tickers:
-            # the dbunserialize will convert all serialized dbobjs to real objects
-
-            restored_tickers = dbunserialize(restored_tickers)
-            self.ticker_storage = {}
-            for store_key, (args, kwargs) in restored_tickers.iteritems():
-                try:
-                    # at this point obj is the actual object (or None) due to how
-                    # the dbunserialize works
-                    obj, callfunc, path, interval, idstring, persistent = store_key
-                    if not persistent and not server_reload:
-                        # this ticker will not be restarted
-                        continue
-                    if isinstance(callfunc, basestring) and not obj:
-                        # methods must have an existing object
-                        continue
-                    # we must rebuild the store_key here since obj must not be
-                    # stored as the object itself for the store_key to be hashable.
-                    store_key = self._store_key(obj, path, interval, callfunc, idstring, persistent)
-
-                    if obj and callfunc:
-                        kwargs["_callback"] = callfunc
-                        kwargs["_obj"] = obj
-                    elif path:
-                        modname, varname = path.rsplit(".", 1)
-                        callback = variable_from_module(modname, varname)
-                        kwargs["_callback"] = callback
-                        kwargs["_obj"] = None
-                    else:
-                        # Neither object nor path - discard this ticker
-                        log_err("Tickerhandler: Removing malformed ticker: %s" % str(store_key))
-                        continue
-                except Exception:
-                    # this suggests a malformed save or missing objects
-                    log_trace("Tickerhandler: Removing malformed ticker: %s" % str(store_key))
+        entries = ServerConfig.objects.conf_entries(self.save_name)
+        start_delays = ServerConfig.objects.conf(key=self.save_name + "_delays", default={})
+        # the dbunserialize will convert all serialized dbobjs to real objects
+        restored_tickers = [dbunserialize(entry) for entry in entries.values()]
+        legacy_tickers = ServerConfig.objects.conf(key=self.save_name)
+        if legacy_tickers:
+            # all subscriptions saved as one entry by an older version
+            restored_tickers.extend((store_key, args, kwargs) for store_key, (args, kwargs)
+                                    in dbunserialize(legacy_tickers).iteritems())
+            ServerConfig.objects.conf(key=self.save_name, delete=True)
+        self.ticker_storage = {}
+        for store_key, args, kwargs in restored_tickers:
+            try:
+                # at this point obj is the actual object (or None) due to how
+                # the dbunserialize works
+                obj, callfunc, path, interval, idstring, persistent = store_key
+                if not persistent and not server_reload:
+                    # this ticker will not be restarted
+                    continue
+                if isinstance(callfunc, basestring) and not obj:
+                    # methods must have an existing object
+                    continue
+                # we must rebuild the store_key here since obj must not be
+                # stored as the object itself for the store_key to be hashable.
+                store_key = self._store_key(obj, path, interval, callfunc, idstring, persistent)
+
+                if obj and callfunc:
+                    kwargs["_callback"] = callfunc
+                    kwargs["_obj"] = obj
+                elif path:
+                    modname, varname = path.rsplit(".", 1)
+                    callback = variable_from_module(modname, varname)
+                    kwargs["_callback"] = callback
+                    kwargs["_obj"] = None
+                else:
+                    # Neither object nor path - discard this ticker
+                    log_err("Tickerhandler: Removing malformed ticker: %s" % str(store_key))
                     continue
-                # if we get here we should create a new ticker
-                self.ticker_storage[store_key] = (args, kwargs)
-                self.ticker_pool.add(store_key, *args, **kwargs)
+            except Exception:
+                # this suggests a malformed save or missing objects
+                log_trace("Tickerhandler: Removing malformed ticker: %s" % str(store_key))
+                continue
+            # if we get here we should create a new ticker
+            kwargs.pop("_start_delay", None)
+            self.ticker_storage[store_key] = (args, kwargs)
+            self.ticker_pool.add(store_key, *args,
+                                 **dict(kwargs, _start_delay=start_delays.get(interval)))
+            if self._storage_name(store_key) not in entries:
+                self._dirty.add(store_key)
+        # clean out the entries of tickers that were not restored
+        self._save_changes(delete=set(entries) - set(self._storage_name(store_key)
+                                                     for store_key in self.ticker_storage))
 
     def add(self, interval=60, callback=None, idstring="", persistent=True, *args, **kwargs):
         """
@@ -499,7 +652,8 @@ class TickerHandler(object):
         kwargs["_callback"] = callfunc  # either method-name or callable
         self.ticker_storage[store_key] = (args, kwargs)
         self.ticker_pool.add(store_key, *args, **kwargs)
-        self.save()
+        self._dirty.add(store_key)
+        self._save_changes()
 
     def remove(self, interval=60, callback=None, idstring="", persistent=True):
         """
@@ -522,7 +676,8 @@ class TickerHandler(object):
         to_remove = self.ticker_storage.pop(store_key, None)
         if to_remove:
             self.ticker_pool.remove(store_key)
-            self.save()
+            self._dirty.add(store_key)
+            self._save_changes()
 
     def clear(self, interval=None):
         """
@@ -537,12 +692,10 @@ class TickerHandler(object):
 
         """
         self.ticker_pool.stop(interval)
-        if interval:
-            self.ticker_storage = dict((store_key, store_key)
-                                       for store_key in self.ticker_storage
-                                       if store_key[1] != interval)
-        else:
-            self.ticker_storage = {}
+        for store_key in list(self.ticker_storage):
+            if not interval or store_key[3] == interval:
+                del self.ticker_storage[store_key]
+                self._dirty.add(store_key)
         self.save()
 
     def all(self, interval=None):
@@ -570,6 +723,18 @@ class TickerHandler(object):
                 return {interval: ticker.subscriptions}
             return None
 
+    def stats(self):
+        """
+        Get the timing statistics of all tickers.
+
+        Returns:
+            stats (dict): `{interval: stats, ...}`, where `stats` is
+                the dict returned by `Ticker.stats`.
+
+        """
+        return dict((interval, ticker.stats())
+                    for interval, ticker in self.ticker_pool.tickers.iteritems())
+
     def all_display(self):
         """
         Get all tickers on an easily displayable form.
@@ -125,23 +125,39 @@ class AMPServerClientProtocol(amp.AMPMultiConnectionProtocol):
 
         Notes:
             Data will be sent across the wire pickled as a tuple
-            (sessid, kwargs).
+            (sessid, kwargs). Any batched messages are sent first, to
+            retain the order of messages.
 
         """
-        return self.callRemote(command, packed_data=amp.dumps((sessid, kwargs))).addErrback(
-                self.errback, command.key)
+        self.flush_batch()
+        return self.send_packed(command, amp.dumps((sessid, kwargs)))
 
     def send_MsgServer2Portal(self, session, **kwargs):
         """
         Access method - executed on the Server for sending data
-            to Portal.
+            to Portal. Messages are batched and sent at the end of
+            the current reactor tick.
 
         Args:
             session (Session): Unique Session.
             kwargs (any, optiona): Extra data.
 
         """
-        return self.data_to_portal(amp.MsgServer2Portal, session.sessid, **kwargs)
+        return self.send_batched(amp.MsgServer2Portal, session.sessid, **kwargs)
+
+    def send_MsgServer2PortalMulti(self, sessions, **kwargs):
+        """
+        Access method - executed on the Server for sending the same
+            data to many sessions. The data is sent to the Portal only
+            once, together with a list of recipients.
+
+        Args:
+            sessions (list): Sessions to send to.
+            kwargs (any, optional): Extra data.
+
+        """
+        return self.send_batched(amp.MsgServer2Portal,
+                                 [session.sessid for session in sessions], **kwargs)
 
     def send_AdminServer2Portal(self, session, operation="", **kwargs):
         """
@@ -173,13 +189,19 @@ class AMPServerClientProtocol(amp.AMPMultiConnectionProtocol):
         on the Server.
 
         Args:
-            packed_data (str): Data to receive (a pickled tuple (sessid,kwargs))
+            packed_data (str): Data to receive (a pickled tuple (sessid,kwargs)
+                or a list of such tuples).
 
         """
-        sessid, kwargs = self.data_in(packed_data)
-        session = self.factory.server.sessions.get(sessid, None)
-        if session:
-            self.factory.server.sessions.data_in(session, **kwargs)
+        sessions = self.factory.server.sessions
+        for sessid, kwargs in self.data_in_batch(packed_data):
+            session = sessions.get(sessid, None)
+            if session:
+                try:
+                    sessions.data_in(session, **kwargs)
+                except Exception:
+                    # don't let one failing message stop the rest of the batch
+                    logger.log_trace()
         return {}
 
     @amp.AdminPortal2Server.responder
@@ -236,6 +258,9 @@ class AMPServerClientProtocol(amp.AMPMultiConnectionProtocol):
             # shutdown in stop mode
             server_sessionhandler.server.shutdown(mode='shutdown')
 
+        elif operation == amp.PSTATS:  # portal output statistics
+            server_sessionhandler.portal_output_stats(kwargs.get("stats", {}))
+
         else:
             raise Exception("operation %(op)s not recognized." % {'op': operation})
         return {}
@@ -0,0 +1,198 @@
+"""
+Server maintenance jobs
+
+The server regularly runs a few housekeeping jobs, like flushing the
+idmapper cache and validating scripts. Each job is a generator doing
+one small slice of its work per step. The steps are run cooperatively
+with `twisted.internet.task.cooperate`, which only runs them for a
+short time each reactor tick, so even a job touching every script in
+a large database never stalls the server.
+
+The jobs are kept by the `MAINTENANCE_HANDLER`. It is ticked once a
+minute by the server's maintenance task and starts each job as its
+interval comes up. The jobs and their last runtimes can be viewed
+in-game with the `@maintenance` command.
+
+"""
+from builtins import object
+
+import time
+from collections import OrderedDict
+
+from twisted.internet import task
+from evennia.utils import logger
+
+
+class MaintenanceJob(object):
+    """
+    A maintenance job, running a generator cooperatively.
+
+    """
+
+    def __init__(self, key, interval, func, desc=""):
+        """
+        Set up the job.
+
+        Args:
+            key (str): Unique name of the job.
+            interval (int): Run the job every this many maintenance
+                ticks (minutes).
+            func (callable): Called without arguments to start the job.
+                It should return an iterator, doing a bounded slice of
+                the job's work for every item it yields.
+            desc (str, optional): A description of the job.
+
+        """
+        self.key = key
+        self.interval = interval
+        self.func = func
+        self.desc = desc
+        self.task = None
+        # statistics
+        self.runs = 0
+        self.errors = 0
+        self.last_start = None
+        self.last_duration = None
+        self.last_runtime = None
+        self.last_steps = None
+        self._runtime = 0.0
+        self._steps = 0
+
+    @property
+    def running(self):
+        "If the job is currently running."
+        return self.task is not None
+
+    def _iterate(self, iterator):
+        """
+        Step through the job, timing each step.
+
+        """
+        while True:
+            start = time.time()
+            try:
+                next(iterator)
+            except StopIteration:
+                self._runtime += time.time() - start
+                return
+            self._runtime += time.time() - start
+            self._steps += 1
+            yield
+
+    def _done(self, result, error=None):
+        """
+        Record the statistics of a finished run.
+
+        """
+        self.last_duration = time.time() - self.last_start
+        self.last_runtime = self._runtime
+        self.last_steps = self._steps
+        self.task = None
+        if error:
+            self.errors += 1
+            logger.log_err("Maintenance job '%s' failed:\n%s" % (self.key, error.getTraceback()))
+
+    def start(self):
+        """
+        Start the job, unless it's still running since last time.
+
+        Returns:
+            deferred (Deferred or None): Fires when the job is done,
+                or `None` if the job was already running.
+
+        """
+        if self.task:
+            return None
+        self.runs += 1
+        self.last_start = time.time()
+        self._runtime, self._steps = 0.0, 0
+        self.task = task.cooperate(self._iterate(iter(self.func())))
+        deferred = self.task.whenDone()
+        deferred.addCallbacks(self._done, lambda error: self._done(None, error=error))
+        return deferred
+
+    def stats(self):
+        """
+        Get the job's statistics.
+
+        Returns:
+            stats (dict): The number of `runs` and `errors`, if it's
+                `running`, as well as the `last_start` time, the
+                wall-clock `last_duration`, the `last_runtime` actually
+                spent working and the number of `last_steps` taken for
+                the last finished run (`None` if it never finished).
+
+        """
+        return {"runs": self.runs, "errors": self.errors, "running": self.running,
+                "last_start": self.last_start, "last_duration": self.last_duration,
+                "last_runtime": self.last_runtime, "last_steps": self.last_steps}
+
+
+class MaintenanceHandler(object):
+    """
+    Keeps the maintenance jobs and starts them as they come up.
+
+    """
+
+    def __init__(self):
+        self.jobs = OrderedDict()
+
+    def add(self, key, interval, func, desc=""):
+        """
+        Add a maintenance job, replacing any job with the same key.
+
+        Args:
+            key (str): Unique name of the job.
+            interval (int): Run the job every this many maintenance
+                ticks (minutes).
+            func (callable): Called without arguments to start the job,
+                returning an iterator doing the work in small steps.
+            desc (str, optional): A description of the job.
+
+        Returns:
+            job (MaintenanceJob): The new job.
+
+        """
+        job = MaintenanceJob(key, interval, func, desc=desc)
+        self.jobs[key] = job
+        return job
+
+    def get(self, key):
+        """
+        Get a job by key.
+
+        Args:
+            key (str): The job's name.
+
+        Returns:
+            job (MaintenanceJob or None): The job, if it exists.
+
+        """
+        return self.jobs.get(key)
+
+    def all(self):
+        """
+        Get all jobs.
+
+        Returns:
+            jobs (list): All `MaintenanceJob`s, in the order they were added.
+
+        """
+        return list(self.jobs.values())
+
+    def tick(self, count):
+        """
+        Start all jobs whose interval comes up at this tick. This is
+        called once per minute by the server.
+
+        Args:
+            count (int): The number of maintenance ticks since the
+                server started.
+
+        """
+        for job in self.jobs.values():
+            if count % job.interval == 0:
+                job.start()
+
+
+MAINTENANCE_HANDLER = MaintenanceHandler()
@@ -1,7 +1,17 @@
 """
 Custom manager for ServerConfig objects.
 """
-from django.db import models
+from builtins import range
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from django.db import models, transaction
+
+# max keys per `db_key__in` query (sqlite allows at most 999 parameters)
+_KEY_CHUNK_SIZE = 500
 
 
 class ServerConfigManager(models.Manager):
@@ -51,3 +61,48 @@ class ServerConfigManager(models.Manager):
                 return default
             return conf[0].value
         return None
+
+    def conf_entries(self, prefix):
+        """
+        Get all config values stored as entries under a prefix, with
+        one database query.
+
+        Args:
+            prefix (str): The prefix the entries were stored under
+                with `update_conf_entries`.
+
+        Returns:
+            entries (dict): `{name: value, ...}` for all entries.
+
+        """
+        start = len(prefix) + 1
+        return dict((conf.db_key[start:], conf.value)
+                    for conf in self.filter(db_key__startswith=prefix + "/"))
+
+    def update_conf_entries(self, prefix, values=None, delete=None):
+        """
+        Store, update and delete many config values under a prefix at
+        once. Each value is stored as its own config entry, with the
+        key `prefix/name`, so only the entries given need writing.
+
+        Args:
+            prefix (str): The prefix for the entries.
+            values (dict, optional): `{name: value, ...}` to create or
+                update. The complete key (`prefix/name`) must fit the
+                64 characters allowed for a config key.
+            delete (iterable, optional): Names of entries to delete.
+
+        """
+        keyed = dict(("%s/%s" % (prefix, name), pickle.dumps(value))
+                     for name, value in (values or {}).items())
+        delete = ["%s/%s" % (prefix, name) for name in delete or ()]
+        with transaction.atomic():
+            for ichunk in range(0, len(delete), _KEY_CHUNK_SIZE):
+                self.filter(db_key__in=delete[ichunk:ichunk + _KEY_CHUNK_SIZE]).delete()
+            keys = list(keyed)
+            for ichunk in range(0, len(keys), _KEY_CHUNK_SIZE):
+                for conf in self.filter(db_key__in=keys[ichunk:ichunk + _KEY_CHUNK_SIZE]):
+                    conf.db_value = keyed.pop(conf.db_key)
+                    conf.save(update_fields=["db_value"])
+            self.bulk_create([self.model(db_key=key, db_value=value)
+                              for key, value in keyed.items()])
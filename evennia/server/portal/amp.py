@@ -10,14 +10,16 @@ import time
 from twisted.protocols import amp
 from collections import defaultdict, namedtuple
 from cStringIO import StringIO
-from itertools import count
+from itertools import count, groupby
 import zlib  # Used in Compressed class
 try:
     import cPickle as pickle
 except ImportError:
     import pickle
 
+from twisted.internet import reactor
 from twisted.internet.defer import DeferredList, Deferred
+from django.conf import settings
 from evennia.utils.utils import to_str, variable_from_module
 
 # delayed import
@@ -43,12 +45,22 @@ PSHUTD = chr(16)       # portal (+server) shutdown
 SSHUTD = chr(17)       # server shutdown
 PSTATUS = chr(18)      # ping server or portal status
 SRESET = chr(19)       # server shutdown in reset mode
+PSTATS = chr(20)       # portal output buffer statistics
 
 NUL = b'\0'
 NULNUL = '\0\0'
 
 AMP_MAXLEN = amp.MAX_VALUE_LENGTH    # max allowed data length in AMP protocol (cannot be changed)
 
+# codec headers, marking how a string was encoded on the wire. Strings
+# without a header are assumed to be zlib-compressed (older Evennia).
+RAW_HEADER = chr(1)
+ZLIB_HEADER = chr(2)
+
+_AMP_BATCH_MESSAGES = settings.AMP_BATCH_MESSAGES
+# max number of session messages to group in one AMP message
+_AMP_BATCH_MAXSIZE = 1000
+
 # buffers
 _SENDBATCH = defaultdict(list)
 _MSGBUFFER = defaultdict(list)
@@ -99,6 +111,154 @@ def catch_traceback(func):
     return decorator
 
 
+# Codecs for the wire format
+
+class AMPCodec(object):
+    """
+    Encodes data for sending across the AMP connection and keeps
+    statistics of the traffic. This base codec sends the data as-is.
+
+    """
+    key = "none"
+
+    def __init__(self):
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        Reset the traffic statistics.
+
+        """
+        self.start_time = time.time()
+        self.nmessages = 0
+        self.nboxes = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _encode(self, data):
+        """
+        Encode data, adding a codec header. Override in child codecs.
+
+        Args:
+            data (str): The data to encode.
+
+        Returns:
+            encoded (str): The encoded data, starting with a codec header.
+
+        """
+        return RAW_HEADER + data
+
+    def encode(self, data):
+        """
+        Encode data for sending over the wire.
+
+        Args:
+            data (str): The data to encode.
+
+        Returns:
+            encoded (str): The data to send over the wire.
+
+        """
+        encoded = self._encode(data)
+        self.bytes_in += len(data)
+        self.bytes_out += len(encoded)
+        return encoded
+
+    def decode(self, data):
+        """
+        Decode data received from the wire. This can decode data from any
+        codec, since the encoding is given by the codec header.
+
+        Args:
+            data (str): Encoded data from the wire.
+
+        Returns:
+            decoded (str): The decoded data.
+
+        """
+        header = data[:1]
+        if header == RAW_HEADER:
+            return data[1:]
+        elif header == ZLIB_HEADER:
+            return zlib.decompress(data[1:])
+        # no header; legacy zlib-compressed data
+        return zlib.decompress(data)
+
+    def add_messages(self, nmessages):
+        """
+        Count session messages sent in one AMP box.
+
+        Args:
+            nmessages (int): Number of session messages sent.
+
+        """
+        self.nboxes += 1
+        self.nmessages += nmessages
+
+    def stats(self):
+        """
+        Get traffic statistics for this codec.
+
+        Returns:
+            stats (dict): Statistics since start or the last reset.
+
+        """
+        elapsed = max(time.time() - self.start_time, 1e-6)
+        return {"codec": self.key,
+                "messages": self.nmessages,
+                "boxes": self.nboxes,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "messages_per_sec": self.nmessages / elapsed,
+                "bytes_per_sec": self.bytes_out / elapsed}
+
+
+class ZlibAMPCodec(AMPCodec):
+    """
+    Compresses data larger than a given threshold with zlib. Smaller
+    data is sent as-is since the compression overhead is not worth it.
+
+    """
+    key = "zlib"
+
+    def __init__(self, threshold=None, level=None):
+        """
+        Args:
+            threshold (int, optional): Only compress data of this size
+                or larger. Defaults to `settings.AMP_COMPRESSION_THRESHOLD`.
+            level (int, optional): zlib compression level (1-9). Defaults
+                to `settings.AMP_COMPRESSION_LEVEL`.
+
+        """
+        super(ZlibAMPCodec, self).__init__()
+        self.threshold = settings.AMP_COMPRESSION_THRESHOLD if threshold is None else threshold
+        self.level = settings.AMP_COMPRESSION_LEVEL if level is None else level
+
+    def _encode(self, data):
+        if len(data) < self.threshold:
+            return RAW_HEADER + data
+        return ZLIB_HEADER + zlib.compress(data, self.level)
+
+
+AMP_CODECS = {AMPCodec.key: AMPCodec, ZlibAMPCodec.key: ZlibAMPCodec}
+
+_CODEC = None
+
+
+def get_codec():
+    """
+    Get the AMP codec used by this process, as set by `settings.AMP_CODEC`.
+
+    Returns:
+        codec (AMPCodec): The codec.
+
+    """
+    global _CODEC
+    if not _CODEC:
+        _CODEC = AMP_CODECS.get(settings.AMP_CODEC, ZlibAMPCodec)()
+    return _CODEC
+
+
 # AMP Communication Command types
 
 class Compressed(amp.String):
@@ -113,44 +273,46 @@ class Compressed(amp.String):
     def fromBox(self, name, strings, objects, proto):
         """
         Converts from box string representation to python. We read back too-long batched data and
-        put it back together here.
+        put it back together here, before decoding it.
 
         """
         value = StringIO()
-        value.write(self.fromStringProto(strings.get(name), proto))
+        value.write(strings.get(name))
         for counter in count(2):
             # count from 2 upwards
             chunk = strings.get("%s.%d" % (name, counter))
             if chunk is None:
                 break
-            value.write(self.fromStringProto(chunk, proto))
-        objects[name] = value.getvalue()
+            value.write(chunk)
+        objects[name] = self.fromString(value.getvalue())
 
     def toBox(self, name, strings, objects, proto):
         """
         Convert from python object to string box representation.
-        we break up too-long data snippets into multiple batches here.
+        The data is encoded as a whole and then broken up into
+        multiple batches here if it is too long.
 
         """
-        value = StringIO(objects[name])
-        strings[name] = self.toStringProto(value.read(AMP_MAXLEN), proto)
+        value = StringIO(self.toString(objects[name]))
+        strings[name] = value.read(AMP_MAXLEN)
         for counter in count(2):
             chunk = value.read(AMP_MAXLEN)
             if not chunk:
                 break
-            strings["%s.%d" % (name, counter)] = self.toStringProto(chunk, proto)
+            strings["%s.%d" % (name, counter)] = chunk
 
     def toString(self, inObject):
         """
-        Convert to send as a string on the wire, with compression.
+        Convert to send as a string on the wire, encoded (normally
+        compressed) by the AMP codec.
         """
-        return zlib.compress(super(Compressed, self).toString(inObject), 9)
+        return get_codec().encode(super(Compressed, self).toString(inObject))
 
     def fromString(self, inString):
         """
-        Convert (decompress) from the string-representation on the wire to Python.
+        Convert (decode) from the string-representation on the wire to Python.
         """
-        return super(Compressed, self).fromString(zlib.decompress(inString))
+        return super(Compressed, self).fromString(get_codec().decode(inString))
 
 
 class MsgLauncher2Portal(amp.Command):
@@ -268,6 +430,7 @@ class AMPMultiConnectionProtocol(amp.AMP):
         self.send_reset_time = time.time()
         self.send_mode = True
         self.send_task = None
+        self.send_batch = []
         self.multibatches = 0
 
     def dataReceived(self, data):
@@ -358,6 +521,98 @@ class AMPMultiConnectionProtocol(amp.AMP):
         """
         return loads(packed_data)
 
+    def data_in_batch(self, packed_data):
+        """
+        Process incoming packed session data, which may hold a batch
+        of messages to several sessions.
+
+        Args:
+            packed_data (bytes): Packed data.
+
+        Returns:
+            messages (list): A list of `(sessid, kwargs)` tuples.
+
+        Notes:
+            A message may be multicast to several sessions by giving a
+            list of sessids instead of a single one. Such messages are
+            expanded to one `(sessid, kwargs)` tuple per session here,
+            all sharing the same `kwargs`.
+
+        """
+        data = loads(packed_data)
+        if not isinstance(data, list):
+            data = [data]
+        messages = []
+        for sessid, kwargs in data:
+            if isinstance(sessid, list):
+                # a multicast message
+                messages.extend((multi_sessid, kwargs) for multi_sessid in sessid)
+            else:
+                messages.append((sessid, kwargs))
+        return messages
+
+    def send_packed(self, command, packed_data):
+        """
+        Send already packed data across the wire.
+
+        Args:
+            command (AMP Command): A protocol send command.
+            packed_data (str): Data packed with `dumps`.
+
+        Returns:
+            deferred (deferred or None): A deferred with an errback.
+
+        """
+        return self.callRemote(command, packed_data=packed_data).addErrback(
+                self.errback, command.key)
+
+    def send_batched(self, command, sessid, **kwargs):
+        """
+        Queue a session message to be sent at the end of the current
+        reactor tick. All messages queued during the same tick are
+        then sent together in as few AMP messages as possible.
+
+        Args:
+            command (AMP Command): A protocol send command.
+            sessid (int): A unique Session id.
+            kwargs (any): Any data to pickle into the command.
+
+        Notes:
+            If `settings.AMP_BATCH_MESSAGES` is not set, the message is
+            sent immediately.
+
+        """
+        if not _AMP_BATCH_MESSAGES:
+            get_codec().add_messages(1)
+            return self.send_packed(command, dumps((sessid, kwargs)))
+        self.send_batch.append((command, (sessid, kwargs)))
+        if len(self.send_batch) >= _AMP_BATCH_MAXSIZE:
+            self.flush_batch()
+        elif not self.send_task:
+            self.send_task = reactor.callLater(0, self.flush_batch)
+
+    def flush_batch(self):
+        """
+        Send all queued session messages. This is called automatically
+        at the end of the reactor tick, and should also be called
+        before sending anything that must arrive after the queued
+        messages (like a disconnect instruction).
+
+        """
+        if self.send_task and self.send_task.active():
+            self.send_task.cancel()
+        self.send_task = None
+        batch, self.send_batch = self.send_batch, []
+        codec = get_codec()
+        for command, group in groupby(batch, key=lambda tup: tup[0]):
+            messages = [tup[1] for tup in group]
+            codec.add_messages(len(messages))
+            if len(messages) == 1:
+                # send on the normal single-message form
+                self.send_packed(command, dumps(messages[0]))
+            else:
+                self.send_packed(command, dumps(messages))
+
     def broadcast(self, command, sessid, **kwargs):
         """
         Send data across the wire to all connections.
@@ -133,16 +133,32 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
 
         Notes:
             Data will be sent across the wire pickled as a tuple
-            (sessid, kwargs).
+            (sessid, kwargs). Any batched messages are sent first, to
+            retain the order of messages.
+
+        """
+        self.flush_batch()
+        return self.send_packed(command, amp.dumps((sessid, kwargs)))
+
+    def send_packed(self, command, packed_data):
+        """
+        Send packed data across the wire to the Server.
+
+        Args:
+            command (AMP Command): A protocol send command.
+            packed_data (str): Data packed with `amp.dumps`.
+
+        Returns:
+            deferred (deferred or None): A deferred with an errback.
 
         """
         if self.factory.server_connection:
             return self.factory.server_connection.callRemote(
-                        command, packed_data=amp.dumps((sessid, kwargs))).addErrback(
+                        command, packed_data=packed_data).addErrback(
                             self.errback, command.key)
         else:
             # if no server connection is available, broadcast
-            return self.broadcast(command, sessid, packed_data=amp.dumps((sessid, kwargs)))
+            return self.broadcast(command, None, packed_data=packed_data)
 
     def start_server(self, server_twistd_cmd):
         """
@@ -242,8 +258,12 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
         Returns:
             deferred (Deferred): Asynchronous return.
 
+        Notes:
+            Messages are batched and sent at the end of the current
+            reactor tick.
+
         """
-        return self.data_to_server(amp.MsgPortal2Server, session.sessid, **kwargs)
+        return self.send_batched(amp.MsgPortal2Server, session.sessid, **kwargs)
 
     def send_AdminPortal2Server(self, session, operation="", **kwargs):
         """
@@ -353,16 +373,20 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
         This method is executed on the Portal.
 
         Args:
-            packed_data (str): Pickled data (sessid, kwargs) coming over the wire.
-
-        """
-        try:
-            sessid, kwargs = self.data_in(packed_data)
-            session = self.factory.portal.sessions.get(sessid, None)
-            if session:
-                self.factory.portal.sessions.data_out(session, **kwargs)
-        except Exception:
-            logger.log_trace("packed_data len {}".format(len(packed_data)))
+            packed_data (str): Pickled data (sessid, kwargs) coming over the wire,
+                or a list of such tuples.
+
+        """
+        sessions = self.factory.portal.sessions
+        # multicast data is rendered once per protocol and settings
+        with sessions.shared_rendering():
+            for sessid, kwargs in self.data_in_batch(packed_data):
+                try:
+                    session = sessions.get(sessid, None)
+                    if session:
+                        sessions.data_out(session, **kwargs)
+                except Exception:
+                    logger.log_trace("packed_data len {}".format(len(packed_data)))
         return {}
 
     @amp.AdminServer2Portal.responder
@@ -441,6 +465,11 @@ class AMPServerProtocol(amp.AMPMultiConnectionProtocol):
                         logger.log_trace()
                 self.factory.server_connect_callbacks = []
 
+        elif operation == amp.PSTATS:  # portal output statistics
+            # server wants the output buffer statistics of our sessions
+            self.send_AdminPortal2Server(amp.DUMMYSESSION, amp.PSTATS,
+                                         stats=portal_sessionhandler.output_stats())
+
         elif operation == amp.SSYNC:  # server_session_sync
             # server wants to save session data to the portal,
             # maybe because it's about to shut down.
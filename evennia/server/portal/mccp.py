@@ -71,6 +71,8 @@ class Mccp(object):
 
         """
         if hasattr(self.protocol, 'zlib'):
+            # write what was buffered while still compressing
+            self.protocol.output.flush()
             del self.protocol.zlib
         self.protocol.protocol_flags['MCCP'] = False
         self.protocol.handshake_done()
@@ -86,5 +88,7 @@ class Mccp(object):
         """
         self.protocol.protocol_flags['MCCP'] = True
         self.protocol.requestNegotiation(MCCP, '')
+        # the negotiation itself must be sent uncompressed
+        self.protocol.output.flush()
         self.protocol.zlib = zlib.compressobj(9)
         self.protocol.handshake_done()
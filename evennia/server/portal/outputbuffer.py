@@ -0,0 +1,95 @@
+"""
+Output buffering
+
+This collects all data a Portal session writes to its client during
+one reactor tick (or a short, fixed delay) and writes it out in one
+go. For telnet this means only one MCCP compression flush and one
+socket write for a whole batch of messages, for the websocket client
+it means a single frame.
+
+The buffering is turned on with `settings.PORTAL_OUTPUT_BUFFER`. It is
+used by the protocols creating an OutputBuffer and passing all their
+writes through it.
+
+"""
+from builtins import object
+from django.conf import settings
+from twisted.internet import reactor
+
+_BUFFER_ENABLED = settings.PORTAL_OUTPUT_BUFFER
+_BUFFER_SIZE = settings.PORTAL_OUTPUT_BUFFER_SIZE
+_BUFFER_DELAY = settings.PORTAL_OUTPUT_BUFFER_DELAY
+
+
+class OutputBuffer(object):
+    """
+    Collects data written to a protocol and hands it on to a writer
+    function in batches. Add this to a variable on the protocol.
+
+    """
+
+    def __init__(self, protocol, writer, enabled=None):
+        """
+        Initialize the buffer.
+
+        Args:
+            protocol (Protocol): The active protocol instance.
+            writer (callable): Called as `writer(chunks)` with a list of
+                the data written since the last flush, in order. It
+                should send all of it to the client at once.
+            enabled (bool, optional): If buffering is used. Defaults to
+                `settings.PORTAL_OUTPUT_BUFFER`.
+
+        """
+        self.protocol = protocol
+        self.writer = writer
+        self.enabled = _BUFFER_ENABLED if enabled is None else enabled
+        self.chunks = []
+        self.size = 0
+        self.flush_call = None
+        # statistics
+        self.messages = 0
+        self.writes = 0
+
+    def write(self, data):
+        """
+        Buffer data for sending. It is written when the buffer is
+        flushed at the end of this reactor tick (or after
+        `settings.PORTAL_OUTPUT_BUFFER_DELAY` seconds), or right away
+        if the buffer grows too big.
+
+        Args:
+            data (str): The data to send.
+
+        """
+        self.messages += 1
+        self.chunks.append(data)
+        self.size += len(data)
+        if not self.enabled or self.size >= _BUFFER_SIZE:
+            self.flush()
+        elif not self.flush_call:
+            self.flush_call = reactor.callLater(_BUFFER_DELAY, self.flush)
+
+    def flush(self):
+        """
+        Send all buffered data to the client.
+
+        """
+        if self.flush_call and self.flush_call.active():
+            self.flush_call.cancel()
+        self.flush_call = None
+        if self.chunks:
+            chunks, self.chunks, self.size = self.chunks, [], 0
+            self.writes += 1
+            self.writer(chunks)
+
+    def stats(self):
+        """
+        Report on the buffer's use.
+
+        Returns:
+            stats (dict): The number of `messages` written to the
+                buffer and the number of `writes` to the client.
+
+        """
+        return {"messages": self.messages, "writes": self.writes}
@@ -122,6 +122,8 @@ class Portal(object):
         # by Ctrl-C, reboot etc.
         reactor.addSystemEventTrigger('before', 'shutdown',
                                       self.shutdown, _reactor_stopping=True, _stop_server=True)
+        # write eventual buffered log lines
+        reactor.addSystemEventTrigger('after', 'shutdown', logger.flush_log_files)
 
     def _get_backup_server_twistd_cmd(self):
         """
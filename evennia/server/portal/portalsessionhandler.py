@@ -6,6 +6,7 @@ from __future__ import division
 
 import time
 from collections import deque, namedtuple
+from contextlib import contextmanager
 from twisted.internet import reactor
 from django.conf import settings
 from evennia.server.sessionhandler import SessionHandler, PCONN, PDISCONN, \
@@ -62,6 +63,9 @@ class PortalSessionHandler(SessionHandler):
         self.connection_last = self.uptime
         self.connection_task = None
 
+        # {(protocol_key, key): rendered} while in shared_rendering()
+        self._render_cache = None
+
     def at_server_connection(self):
         """
         Called when the Portal establishes connection with the Server.
@@ -398,6 +402,59 @@ class PortalSessionHandler(SessionHandler):
             self.portal.amp_protocol.send_MsgPortal2Server(session,
                                                            **kwargs)
 
+    @contextmanager
+    def shared_rendering(self):
+        """
+        Context manager for relaying a batch of outgoing data. While
+        active, data is only rendered once for all sessions of the
+        same protocol and with the same rendering settings (color,
+        MXP etc), see `render`.
+
+        """
+        self._render_cache = {}
+        try:
+            yield
+        finally:
+            self._render_cache = None
+
+    def render(self, session, key, renderer, *args):
+        """
+        Render outgoing data for a session. Inside `shared_rendering`
+        the result is shared with other sessions given the same data.
+
+        Args:
+            session (PortalSession): The session to render for.
+            key (tuple or None): Identifies the data and all settings
+                affecting the result. If `None`, nothing is shared.
+            renderer (callable): Called as `renderer(*args)` to render.
+            *args (any): Passed to `renderer`.
+
+        Returns:
+            rendered (any): The return of `renderer`.
+
+        """
+        cache = self._render_cache
+        if cache is None or key is None:
+            return renderer(*args)
+        key = (session.protocol_key, key)
+        try:
+            return cache[key]
+        except KeyError:
+            rendered = cache[key] = renderer(*args)
+            return rendered
+
+    def output_stats(self):
+        """
+        Get the output buffer statistics of all sessions.
+
+        Returns:
+            stats (dict): `{sessid: {"messages": int, "writes": int}}` for
+                all sessions with an output buffer.
+
+        """
+        return dict((sessid, session.output.stats()) for sessid, session in self.items()
+                    if hasattr(session, "output"))
+
     def data_out(self, session, **kwargs):
         """
         Called by server for having the portal relay messages and data
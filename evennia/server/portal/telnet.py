@@ -17,6 +17,7 @@ from evennia.server.session import Session
 from evennia.server.portal import ttype, mssp, telnet_oob, naws, suppress_ga
 from evennia.server.portal.mccp import Mccp, mccp_compress, MCCP
 from evennia.server.portal.mxp import Mxp, mxp_parse
+from evennia.server.portal.outputbuffer import OutputBuffer
 from evennia.utils import ansi
 from evennia.utils.utils import to_str
 
@@ -53,6 +54,8 @@ class TelnetProtocol(Telnet, StatefulTelnetProtocol, Session):
         """
         # initialize the session
         self.line_buffer = ""
+        # all writes go through the output buffer
+        self.output = OutputBuffer(self, self._write_output)
         client_address = self.transport.client
         client_address = client_address[0] if client_address else None
         # this number is counted down for every handshake that completes.
@@ -195,6 +198,7 @@ class TelnetProtocol(Telnet, StatefulTelnetProtocol, Session):
 
         """
         self.sessionhandler.disconnect(self)
+        self.output.flush()
         self.transport.loseConnection()
 
     def applicationDataReceived(self, data):
@@ -233,24 +237,53 @@ class TelnetProtocol(Telnet, StatefulTelnetProtocol, Session):
     def _write(self, data):
         """hook overloading the one used in plain telnet"""
         data = data.replace('\n', '\r\n').replace('\r\r\n', '\r\n')
-        super(TelnetProtocol, self)._write(mccp_compress(self, data))
+        self.output.write(data)
 
-    def sendLine(self, line):
+    def _write_output(self, chunks):
         """
-        Hook overloading the one used by linereceiver.
+        Write data from the output buffer to the transport, compressing
+        it all with one MCCP flush.
+
+        Args:
+            chunks (list): The data to write, in order.
+
+        """
+        self.transport.write(mccp_compress(self, "".join(chunks)))
+
+    def _format_line(self, line, forcedendline=True, nogoahead=True):
+        """
+        Prepare a line for sending.
 
         Args:
             line (str): Line to send.
+            forcedendline (bool, optional): Make sure the line ends
+                with a line break.
+            nogoahead (bool, optional): Don't end with a GA.
+
+        Returns:
+            line (str): The line to write to the transport.
 
         """
         # escape IAC in line mode, and correctly add \r\n (the TELNET end-of-line)
         line = line.replace(IAC, IAC + IAC)
         line = line.replace('\n', '\r\n')
-        if not line.endswith("\r\n") and self.protocol_flags.get("FORCEDENDLINE", True):
+        if not line.endswith("\r\n") and forcedendline:
             line += "\r\n"
-        if not self.protocol_flags.get("NOGOAHEAD", True):
+        if not nogoahead:
             line += IAC + GA
-        return self.transport.write(mccp_compress(self, line))
+        return line
+
+    def sendLine(self, line):
+        """
+        Hook overloading the one used by linereceiver.
+
+        Args:
+            line (str): Line to send.
+
+        """
+        return self.output.write(self._format_line(line,
+                                                   self.protocol_flags.get("FORCEDENDLINE", True),
+                                                   self.protocol_flags.get("NOGOAHEAD", True)))
 
     # Session hooks
 
@@ -327,50 +360,74 @@ class TelnetProtocol(Telnet, StatefulTelnetProtocol, Session):
         echo = options.get("echo", None)
         mxp = options.get("mxp", flags.get("MXP", False))
         screenreader = options.get("screenreader", flags.get("SCREENREADER", False))
+        prompt = options.get("send_prompt", False)
+
+        if echo is not None and not prompt:
+            # turn on/off echo. Note that this is a bit turned around since we use
+            # echo as if we are "turning off the client's echo" when telnet really
+            # handles it the other way around.
+            if echo:
+                # by telling the client that WE WON'T echo, the client knows
+                # that IT should echo. This is the expected behavior from
+                # our perspective.
+                self.output.write(IAC + WONT + ECHO)
+            else:
+                # by telling the client that WE WILL echo, the client can
+                # safely turn OFF its OWN echo.
+                self.output.write(IAC + WILL + ECHO)
 
+        # the same text is only rendered once for all sessions with the same settings
+        profile = (xterm256, raw, nocolor, mxp, screenreader, prompt,
+                   flags.get("FORCEDENDLINE", True), flags.get("NOGOAHEAD", True))
+        self.output.write(self.sessionhandler.render(
+            self, (text, ) + profile, self._render_text, text, *profile))
+
+    def _render_text(self, text, xterm256, raw, nocolor, mxp, screenreader, prompt,
+                     forcedendline, nogoahead):
+        """
+        Render text for sending. The result only depends on the
+        arguments, so it can be shared between sessions.
+
+        Args:
+            text (str): The text to send.
+            xterm256 (bool): Use xterm256 colors.
+            raw (bool): Send the text without ansi processing.
+            nocolor (bool): Strip all color.
+            mxp (bool): Use MXP links.
+            screenreader (bool): Clean up the text for screenreaders.
+            prompt (bool): Send the text as a prompt.
+            forcedendline (bool): End the text with a line break.
+            nogoahead (bool): Don't end the text with a GA.
+
+        Returns:
+            data (str): The data to write.
+
+        """
         if screenreader:
             # screenreader mode cleans up output
             text = ansi.parse_ansi(text, strip_ansi=True, xterm256=False, mxp=False)
             text = _RE_SCREENREADER_REGEX.sub("", text)
 
-        if options.get("send_prompt"):
+        if prompt:
             # send a prompt instead.
-            prompt = text
             if not raw:
                 # processing
-                prompt = ansi.parse_ansi(_RE_N.sub("", prompt) + ("||n" if prompt.endswith("|") else "|n"),
-                                         strip_ansi=nocolor, xterm256=xterm256)
-                if mxp:
-                    prompt = mxp_parse(prompt)
-            prompt = prompt.replace(IAC, IAC + IAC).replace('\n', '\r\n')
-            prompt += IAC + GA
-            self.transport.write(mccp_compress(self, prompt))
-        else:
-            if echo is not None:
-                # turn on/off echo. Note that this is a bit turned around since we use
-                # echo as if we are "turning off the client's echo" when telnet really
-                # handles it the other way around.
-                if echo:
-                    # by telling the client that WE WON'T echo, the client knows
-                    # that IT should echo. This is the expected behavior from
-                    # our perspective.
-                    self.transport.write(mccp_compress(self, IAC + WONT + ECHO))
-                else:
-                    # by telling the client that WE WILL echo, the client can
-                    # safely turn OFF its OWN echo.
-                    self.transport.write(mccp_compress(self, IAC + WILL + ECHO))
-            if raw:
-                # no processing
-                self.sendLine(text)
-                return
-            else:
-                # we need to make sure to kill the color at the end in order
-                # to match the webclient output.
-                linetosend = ansi.parse_ansi(_RE_N.sub("", text) + ("||n" if text.endswith("|") else "|n"),
-                                             strip_ansi=nocolor, xterm256=xterm256, mxp=mxp)
+                text = ansi.parse_ansi(_RE_N.sub("", text) + ("||n" if text.endswith("|") else "|n"),
+                                       strip_ansi=nocolor, xterm256=xterm256)
                 if mxp:
-                    linetosend = mxp_parse(linetosend)
-                self.sendLine(linetosend)
+                    text = mxp_parse(text)
+            text = text.replace(IAC, IAC + IAC).replace('\n', '\r\n')
+            return text + IAC + GA
+        if raw:
+            # no processing
+            return self._format_line(text, forcedendline, nogoahead)
+        # we need to make sure to kill the color at the end in order
+        # to match the webclient output.
+        linetosend = ansi.parse_ansi(_RE_N.sub("", text) + ("||n" if text.endswith("|") else "|n"),
+                                     strip_ansi=nocolor, xterm256=xterm256, mxp=mxp)
+        if mxp:
+            linetosend = mxp_parse(linetosend)
+        return self._format_line(linetosend, forcedendline, nogoahead)
 
     def send_prompt(self, *args, **kwargs):
         """
@@ -8,11 +8,14 @@ try:
 except ImportError:
     import unittest
 
-from mock import Mock
+from mock import Mock, patch
+from random import randint
 import string
-from evennia.server.portal import irc
+import zlib
+from evennia.server.portal import irc, amp
 
 from twisted.conch.telnet import IAC, WILL, DONT, SB, SE, NAWS, DO
+from twisted.internet import task
 from twisted.test import proto_helpers
 from twisted.trial.unittest import TestCase as TwistedTestCase
 
@@ -22,6 +25,7 @@ from .suppress_ga import SUPPRESS_GA
 from .naws import DEFAULT_HEIGHT, DEFAULT_WIDTH
 from .ttype import TTYPE, IS
 from .mccp import MCCP
+from .outputbuffer import OutputBuffer
 from .mssp import MSSP
 from .mxp import MXP
 from .telnet_oob import MSDP, MSDP_VAL, MSDP_VAR
@@ -149,3 +153,107 @@ class TestTelnet(TwistedTestCase):
         self.proto.nop_keep_alive.stop()
         self.proto._handshake_delay.cancel()
         return d
+
+    def test_output_buffer(self):
+        self.proto.transport = self.transport
+        self.proto.protocol_flags = {}
+        self.proto.output = OutputBuffer(self.proto, self.proto._write_output, enabled=True)
+        # as if mccp was negotiated
+        self.proto.zlib = zlib.compressobj(9)
+        clock = task.Clock()
+        with patch("evennia.server.portal.outputbuffer.reactor", clock):
+            for num in range(3):
+                self.proto.sendLine("line %i" % num)
+            self.assertEqual(self.transport.value(), "")
+            clock.advance(0)
+        # all lines are sent with one compression flush
+        self.assertEqual(self.proto.output.stats(), {"messages": 3, "writes": 1})
+        self.assertEqual(zlib.decompressobj().decompress(self.transport.value()),
+                         "line 0\r\nline 1\r\nline 2\r\n")
+
+    def test_shared_rendering(self):
+        from evennia.utils import ansi
+        protos = []
+        for num in range(2):
+            proto = TelnetProtocol()
+            proto.transport = proto_helpers.StringTransport()
+            proto.protocol_flags = {"TTYPE": True, "ANSI": True}
+            proto.protocol_key = "telnet"
+            proto.sessionhandler = PORTAL_SESSIONS
+            proto.output = OutputBuffer(proto, proto._write_output, enabled=False)
+            protos.append(proto)
+        with patch("evennia.server.portal.telnet.ansi.parse_ansi", wraps=ansi.parse_ansi) as parse_ansi:
+            with PORTAL_SESSIONS.shared_rendering():
+                for proto in protos:
+                    proto.send_text("|rHello", options={})
+            self.assertEqual(parse_ansi.call_count, 1)
+            # outside a batch every session renders for itself
+            protos[0].send_text("|rHello", options={})
+            self.assertEqual(parse_ansi.call_count, 2)
+        self.assertEqual(protos[0].transport.value(), "\033[1m\033[31mHello\033[0m\r\n" * 2)
+        self.assertEqual(protos[1].transport.value(), "\033[1m\033[31mHello\033[0m\r\n")
+
+
+class TestAMP(TestCase):
+
+    def test_codecs(self):
+        codec = amp.ZlibAMPCodec(threshold=100, level=1)
+        short, long = "short message", "long message " * 20
+        self.assertEqual(codec.encode(short), amp.RAW_HEADER + short)
+        encoded = codec.encode(long)
+        self.assertEqual(encoded[0], amp.ZLIB_HEADER)
+        self.assertTrue(len(encoded) < len(long))
+        self.assertEqual(codec.decode(encoded), long)
+        self.assertEqual(amp.AMPCodec().decode(encoded), long)
+        # legacy zlib data without a header
+        self.assertEqual(codec.decode(zlib.compress(long, 9)), long)
+        stats = codec.stats()
+        self.assertEqual(stats["bytes_in"], len(short) + len(long))
+        self.assertEqual(stats["bytes_out"], len(short) + 1 + len(encoded))
+
+    def test_long_payload(self):
+        # incompressible data, larger than the max length of an AMP value
+        payload = "".join(chr(randint(0, 255)) for _ in range(70000))
+        argument = amp.Compressed()
+        for codec in (amp.AMPCodec(), amp.ZlibAMPCodec(threshold=100, level=1)):
+            with patch.object(amp, "_CODEC", codec):
+                strings, objects = {}, {}
+                argument.toBox("packed_data", strings, {"packed_data": payload}, None)
+                self.assertEqual(sorted(strings), ["packed_data", "packed_data.2"])
+                self.assertTrue(all(len(chunk) <= amp.AMP_MAXLEN for chunk in strings.values()))
+                argument.fromBox("packed_data", strings, objects, None)
+                self.assertEqual(objects["packed_data"], payload)
+
+    def test_batching(self):
+        clock = task.Clock()
+        proto = amp.AMPMultiConnectionProtocol()
+        proto.send_packed = Mock()
+        with patch.object(amp, "reactor", clock):
+            proto.send_batched(amp.MsgServer2Portal, 1, text="foo")
+            proto.send_batched(amp.MsgServer2Portal, 2, text="bar")
+            proto.send_batched(amp.MsgServer2Portal, 1, text="baz")
+            self.assertFalse(proto.send_packed.called)
+            clock.advance(0)
+        proto.send_packed.assert_called_once()
+        command, packed_data = proto.send_packed.call_args[0]
+        self.assertEqual(command, amp.MsgServer2Portal)
+        self.assertEqual(proto.data_in_batch(packed_data),
+                         [(1, {"text": "foo"}), (2, {"text": "bar"}), (1, {"text": "baz"})])
+        # single messages are sent on the normal form
+        proto.send_packed.reset_mock()
+        with patch.object(amp, "reactor", clock):
+            proto.send_batched(amp.MsgServer2Portal, 1, text="foo")
+            proto.flush_batch()
+        self.assertEqual(proto.data_in(proto.send_packed.call_args[0][1]), (1, {"text": "foo"}))
+        self.assertEqual(clock.getDelayedCalls(), [])
+
+    def test_multicast(self):
+        proto = amp.AMPMultiConnectionProtocol()
+        proto.send_packed = Mock()
+        with patch.object(amp, "reactor", task.Clock()):
+            proto.send_batched(amp.MsgServer2Portal, [1, 2], text="foo")
+            proto.send_batched(amp.MsgServer2Portal, 3, text="bar")
+            proto.flush_batch()
+        packed_data = proto.send_packed.call_args[0][1]
+        self.assertEqual(proto.data_in_batch(packed_data),
+                         [(1, {"text": "foo"}), (2, {"text": "foo"}), (3, {"text": "bar"})])
@@ -19,6 +19,7 @@ import json
 from twisted.internet.protocol import Protocol
 from django.conf import settings
 from evennia.server.session import Session
+from evennia.server.portal.outputbuffer import OutputBuffer
 from evennia.utils.utils import to_str, mod_import
 from evennia.utils.ansi import parse_ansi
 from evennia.utils.text2html import parse_html
@@ -41,6 +42,8 @@ class WebSocketClient(Protocol, Session):
 
         """
         self.transport.validationMade = self.validationMade
+        # all writes go through the output buffer
+        self.output = OutputBuffer(self, self._write_output)
         client_address = self.transport.client
         client_address = client_address[0] if client_address else None
         self.init_session("websocket", client_address, self.factory.sessionhandler)
@@ -113,6 +116,7 @@ class WebSocketClient(Protocol, Session):
         """
         print("In connectionLost of webclient")
         self.sessionhandler.disconnect(self)
+        self.output.flush()
         self.transport.close()
 
     def dataReceived(self, string):
@@ -136,7 +140,22 @@ class WebSocketClient(Protocol, Session):
             line (str): Text to send.
 
         """
-        return self.transport.write(line)
+        return self.output.write(line)
+
+    def _write_output(self, chunks):
+        """
+        Write data from the output buffer to the client as one frame.
+        Several messages are sent as `["batch", [message, ...], {}]`,
+        which the webclient unpacks.
+
+        Args:
+            chunks (list): JSON-encoded messages to send, in order.
+
+        """
+        if len(chunks) == 1:
+            self.transport.write(chunks[0])
+        else:
+            self.transport.write('["batch", [%s], {}]' % ", ".join(chunks))
 
     def at_login(self):
         csession = self.get_client_session()
@@ -214,6 +233,30 @@ class WebSocketClient(Protocol, Session):
         screenreader = options.get("screenreader", flags.get("SCREENREADER", False))
         prompt = options.get("send_prompt", False)
 
+        # the same text is only rendered once for all sessions with the same
+        # settings (as long as there is no other data to send with it)
+        key = (text, raw, nocolor, screenreader, prompt) if len(args) == 1 and not kwargs else None
+        self.sendLine(self.sessionhandler.render(
+            self, key, self._render_text, text, args, kwargs, raw, nocolor, screenreader, prompt))
+
+    def _render_text(self, text, args, kwargs, raw, nocolor, screenreader, prompt):
+        """
+        Render text for sending. The result only depends on the
+        arguments, so it can be shared between sessions.
+
+        Args:
+            text (str): The text to send.
+            args (list): All arguments to send, starting with the text.
+            kwargs (dict): Keywords to send.
+            raw (bool): Send the text without processing.
+            nocolor (bool): Strip all color.
+            screenreader (bool): Clean up the text for screenreaders.
+            prompt (bool): Send the text as a prompt.
+
+        Returns:
+            data (str): The JSON-encoded message to send.
+
+        """
         if screenreader:
             # screenreader mode cleans up output
             text = parse_ansi(text, strip_ansi=True, xterm256=False, mxp=False)
@@ -225,10 +268,11 @@ class WebSocketClient(Protocol, Session):
             args[0] = parse_html(text, strip_ansi=nocolor)
 
         # send to client on required form [cmdname, args, kwargs]
-        self.sendLine(json.dumps([cmd, args, kwargs]))
+        return json.dumps([cmd, args, kwargs])
 
     def send_prompt(self, *args, **kwargs):
-        kwargs["options"].update({"send_prompt": True})
+        # copy the options; they may be shared with other sessions
+        kwargs["options"] = dict(kwargs["options"], send_prompt=True)
         self.send_text(*args, **kwargs)
 
     def send_default(self, cmdname, *args, **kwargs):
@@ -380,21 +380,40 @@ class AjaxWebClientSession(session.Session):
         screenreader = options.get("screenreader", flags.get("SCREENREADER", False))
         prompt = options.get("send_prompt", False)
 
+        cmd = "prompt" if prompt else "text"
+        # the same text is only rendered once for all sessions with the same settings
+        args[0] = self.sessionhandler.render(self, (text, raw, nocolor, screenreader),
+                                             self._render_text, text, raw, nocolor, screenreader)
+
+        # send to client on required form [cmdname, args, kwargs]
+        self.client.lineSend(self.csessid, [cmd, args, kwargs])
+
+    def _render_text(self, text, raw, nocolor, screenreader):
+        """
+        Render text for sending. The result only depends on the
+        arguments, so it can be shared between sessions.
+
+        Args:
+            text (str): The text to send.
+            raw (bool): Send the text without processing.
+            nocolor (bool): Strip all color.
+            screenreader (bool): Clean up the text for screenreaders.
+
+        Returns:
+            text (str): The html to send.
+
+        """
         if screenreader:
             # screenreader mode cleans up output
             text = parse_ansi(text, strip_ansi=True, xterm256=False, mxp=False)
             text = _RE_SCREENREADER_REGEX.sub("", text)
-        cmd = "prompt" if prompt else "text"
         if raw:
-            args[0] = text
-        else:
-            args[0] = parse_html(text, strip_ansi=nocolor)
-
-        # send to client on required form [cmdname, args, kwargs]
-        self.client.lineSend(self.csessid, [cmd, args, kwargs])
+            return text
+        return parse_html(text, strip_ansi=nocolor)
 
     def send_prompt(self, *args, **kwargs):
-        kwargs["options"].update({"send_prompt": True})
+        # copy the options; they may be shared with other sessions
+        kwargs["options"] = dict(kwargs["options"], send_prompt=True)
         self.send_text(*args, **kwargs)
 
     def send_default(self, cmdname, *args, **kwargs):
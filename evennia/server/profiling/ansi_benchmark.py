@@ -0,0 +1,184 @@
+"""
+ANSI parser benchmark
+
+Times the parsing of Evennia color markup for typical outgoing text -
+room descriptions and `EvTable` output - with the parse caches cold
+(every string tokenized anew) and warm (as when the same text is
+sent to many sessions). It also measures the time and the memory of
+the ANSIStrings kept by a rendered, colored `EvTable`. Run it from
+your game dir with
+
+    evennia shell
+    >>> from evennia.server.profiling import ansi_benchmark
+    >>> ansi_benchmark.run()
+    >>> ansi_benchmark.run_evtable()
+
+"""
+from __future__ import print_function
+from builtins import range
+
+import sys
+import timeit
+from array import array
+
+from evennia.utils.ansi import ANSIParser, ANSIString
+from evennia.utils.evtable import EvTable
+
+# the parse flags used by the various protocols: (strip_ansi, xterm256, mxp)
+FLAGS = ((False, False, False),
+         (False, True, False),
+         (False, True, True),
+         (True, False, False))
+
+
+def room_description(num):
+    """
+    Make a room description with the usual mix of markup.
+
+    Args:
+        num (int): Used to make the text unique.
+
+    Returns:
+        text (str): The description.
+
+    """
+    return ("|cThe Old Harbour #%i|n|/"
+            "Rows of |555weathered|n fishing boats bob in the |[005|wdark|n water. "
+            "Gulls cry over the |rred|n roofs of the |=mwarehouses|n and the smell of "
+            "tar and |ysalt|n hangs in the air. A sign reads |lclook sign|ltsign|le.|/"
+            "|wExits:|n |gnorth|n, |geast|n, |gpier|n|/"
+            "|wYou see:|n a |Ccoil of rope||, a |Mbarrel|n and |530Old Tom|n.") % num
+
+
+def evtable_output(num):
+    """
+    Make the text of an EvTable with colored cells.
+
+    Args:
+        num (int): Used to make the text unique.
+
+    Returns:
+        text (str): The table output.
+
+    """
+    table = EvTable("|wKey|n", "|wLocation|n", "|wStatus|n", border="cells")
+    for row in range(10):
+        table.add_row("|gobject-%i-%i|n" % (num, row), "|cRoom #%i|n" % row,
+                      "|rbusy|n" if row % 2 else "|[Gidle|n")
+    return unicode(table)
+
+
+def _time(parser, texts, repeat, cold):
+    """
+    Time the parsing of a list of texts with all `FLAGS`.
+
+    Returns:
+        time (float): Time in microseconds per parsed text.
+
+    """
+    def _parse():
+        if cold:
+            parser.token_cache.clear()
+            parser.parse_cache.clear()
+        for text in texts:
+            for flags in FLAGS:
+                parser.parse_ansi(text, *flags)
+    seconds = min(timeit.repeat(_parse, number=1, repeat=repeat))
+    return 1e6 * seconds / (len(texts) * len(FLAGS))
+
+
+def run(num_texts=100, repeat=10):
+    """
+    Run the benchmark and print the result.
+
+    Args:
+        num_texts (int, optional): Number of different texts of each kind.
+        repeat (int, optional): Number of timing runs; the best is used.
+
+    Returns:
+        results (dict): `{(kind, "cold"/"warm"): microseconds}` per parsed text.
+
+    """
+    parser = ANSIParser()
+    t0 = timeit.default_timer()
+    tables = [evtable_output(num) for num in range(num_texts)]
+    table_build = 1e6 * (timeit.default_timer() - t0) / num_texts
+    texts = {"room description": [room_description(num) for num in range(num_texts)],
+             "evtable": tables}
+    results = {}
+    for kind, kindtexts in sorted(texts.items()):
+        for cold in (True, False):
+            results[(kind, "cold" if cold else "warm")] = _time(parser, kindtexts, repeat, cold)
+
+    print("ANSI parsing, microseconds per text and flag combination:")
+    for (kind, cache), usec in sorted(results.items()):
+        print("  %-18s %-5s %8.1f" % (kind, cache, usec))
+    print("  building an EvTable: %.1f" % table_build)
+    print("token cache: %s" % parser.token_cache.stats())
+    print("parse cache: %s" % parser.parse_cache.stats())
+    return results
+
+
+def _index_size(obj, seen):
+    """
+    Find all ANSIStrings reachable from obj and sum up the memory used
+    by the index data they carry beyond their raw and clean strings.
+
+    """
+    if id(obj) in seen:
+        return 0, 0
+    seen.add(id(obj))
+    if isinstance(obj, ANSIString):
+        size = 0
+        for key, value in vars(obj).items():
+            if isinstance(value, (list, tuple, array)):
+                size += sys.getsizeof(value)
+                # small ints are shared, larger ones are separate objects
+                size += sum(sys.getsizeof(val) for val in value
+                            if isinstance(val, int) and not -5 <= val <= 256)
+        return 1, size
+    elif isinstance(obj, (list, tuple)):
+        values = obj
+    elif isinstance(obj, dict):
+        values = obj.values()
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        values = vars(obj).values()
+    else:
+        return 0, 0
+    num, size = 0, 0
+    for value in values:
+        subnum, subsize = _index_size(value, seen)
+        num += subnum
+        size += subsize
+    return num, size
+
+
+def run_evtable(rows=50, columns=10, repeat=5):
+    """
+    Time rendering a colored EvTable and measure the index memory of
+    the ANSIStrings it keeps.
+
+    Args:
+        rows (int, optional): Number of table rows.
+        columns (int, optional): Number of table columns.
+        repeat (int, optional): Number of timing runs; the best is used.
+
+    Returns:
+        results (dict): With the render `time` in milliseconds, the
+            number of ANSIStrings kept in `strings` and the `bytes` of
+            index data they use.
+
+    """
+    def _render():
+        table = EvTable(*["|wcol %i|n" % col for col in range(columns)], border="cells")
+        for row in range(rows):
+            table.add_row(*["|%s%i-%i|n item" % ("rgbcmy"[col % 6], row, col)
+                            for col in range(columns)])
+        unicode(table)
+        return table
+
+    msecs = 1000 * min(timeit.repeat(_render, number=1, repeat=repeat))
+    num, size = _index_size(_render(), set())
+    print("EvTable %ix%i: render %.1f ms, %i ANSIStrings kept using %i bytes "
+          "of index data" % (rows, columns, msecs, num, size))
+    return {"time": msecs, "strings": num, "bytes": size}
@@ -0,0 +1,67 @@
+"""
+Spawner benchmark
+
+Times spawning many objects from a prototype, one by one (the normal
+`spawn`) and with the bulk path (`spawn(..., bulk=True)`), and counts
+the database queries used. The spawned objects are deleted again
+afterwards. Run it from your game dir with
+
+    evennia shell
+    >>> from evennia.server.profiling import spawn_benchmark
+    >>> spawn_benchmark.run()
+
+"""
+from __future__ import print_function
+
+import timeit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from evennia.prototypes import spawner
+
+# the prototype to spawn; a typical item with a few properties
+PROTOTYPE = {"prototype_key": "spawn_benchmark",
+             "typeclass": "evennia.objects.objects.DefaultObject",
+             "key": "benchmark item",
+             "aliases": ["item"],
+             "locks": "get:all()",
+             "tags": [("benchmark", "profiling", None)],
+             "attrs": [("weight", 3, None, "")],
+             "desc": "A simple item.",
+             "value": 10}
+
+
+def _time(num, bulk):
+    """
+    Spawn objects and delete them again.
+
+    Returns:
+        result (tuple): Objects spawned per second and queries per object.
+
+    """
+    with CaptureQueriesContext(connection) as queries:
+        t0 = timeit.default_timer()
+        objs = spawner.spawn(*[PROTOTYPE] * num, bulk=bulk)
+        seconds = timeit.default_timer() - t0
+    for obj in objs:
+        obj.delete()
+    return num / seconds, float(len(queries)) / num
+
+
+def run(num=500):
+    """
+    Run the benchmark and print the result.
+
+    Args:
+        num (int, optional): Number of objects to spawn with each method.
+
+    Returns:
+        results (dict): `{"batch"/"bulk": (objects/sec, queries/object)}`.
+
+    """
+    results = {"batch": _time(num, False), "bulk": _time(num, True)}
+    print("Spawning %i objects:" % num)
+    for method, (rate, queries) in sorted(results.items()):
+        print("  %-6s %8.0f objects/sec %6.1f queries/object" % (method, rate, queries))
+    return results
@@ -3,6 +3,9 @@ from mock import Mock, patch, mock_open
 from .dummyrunner_settings import (c_creates_button, c_creates_obj, c_digs, c_examines, c_help, c_idles, c_login,
                                    c_login_nodig, c_logout, c_looks, c_moves, c_moves_n, c_moves_s, c_socialize)
 import memplot
+import ansi_benchmark
+import spawn_benchmark
+from evennia.utils.test_resources import EvenniaTest
 
 
 class TestDummyrunnerSettings(TestCase):
@@ -110,3 +113,27 @@ class TestMemPlot(TestCase):
         handle = mocked_open()
         handle.write.assert_called_with('100.0, 0.001, 0.001, 9\n')
         script.stop()
+
+
+class TestAnsiBenchmark(TestCase):
+    @patch.object(ansi_benchmark, "print", create=True)
+    def test_run(self, mocked_print):
+        results = ansi_benchmark.run(num_texts=2, repeat=1)
+        self.assertEqual(sorted(results), [("evtable", "cold"), ("evtable", "warm"),
+                                           ("room description", "cold"),
+                                           ("room description", "warm")])
+
+    @patch.object(ansi_benchmark, "print", create=True)
+    def test_run_evtable(self, mocked_print):
+        results = ansi_benchmark.run_evtable(rows=2, columns=2, repeat=1)
+        self.assertTrue(results["strings"] > 0)
+        self.assertTrue(results["bytes"] > 0)
+
+
+class TestSpawnBenchmark(EvenniaTest):
+    @patch.object(spawn_benchmark, "print", create=True)
+    def test_run(self, mocked_print):
+        results = spawn_benchmark.run(num=3)
+        self.assertEqual(sorted(results), ["batch", "bulk"])
+        # the bulk path uses fewer queries per object
+        self.assertTrue(results["bulk"][1] < results["batch"][1])
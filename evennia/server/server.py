@@ -24,7 +24,7 @@ django.setup()
 import evennia
 evennia._init()
 
-from django.db import connection
+from django.db import connection, transaction
 from django.conf import settings
 
 from evennia.accounts.models import AccountDB
@@ -36,6 +36,7 @@ from evennia.utils.utils import get_evennia_version, mod_import, make_iter
 from evennia.utils import logger
 from evennia.comms import channelhandler
 from evennia.server.sessionhandler import SESSIONS
+from evennia.server.maintenance import MAINTENANCE_HANDLER
 
 from django.utils.translation import ugettext as _
 
@@ -93,7 +94,24 @@ _FLUSH_CACHE = None
 _IDMAPPER_CACHE_MAXSIZE = settings.IDMAPPER_CACHE_MAXSIZE
 _GAMETIME_MODULE = None
 
-_IDLE_TIMEOUT = settings.IDLE_TIMEOUT
+
+def _flush_cache():
+    "Maintenance job checking the idmapper cache size"
+    global _FLUSH_CACHE
+    if not _FLUSH_CACHE:
+        from evennia.utils.idmapper.models import iter_conditional_flush as _FLUSH_CACHE
+    return _FLUSH_CACHE(_IDMAPPER_CACHE_MAXSIZE)
+
+
+# the jobs are run cooperatively, a small step per reactor tick
+MAINTENANCE_HANDLER.add("idmapper_flush", 300, _flush_cache,
+                        desc="Flush the idmapper cache if memory runs high")
+MAINTENANCE_HANDLER.add("script_validation", 3600,
+                        lambda: evennia.ScriptDB.objects.iter_validate(),
+                        desc="Start valid scripts and stop invalid ones")
+MAINTENANCE_HANDLER.add("channel_update", 3700,
+                        lambda: evennia.CHANNEL_HANDLER.iter_update(),
+                        desc="Re-sync the channel handler with the database")
 
 
 def _server_maintenance():
@@ -101,9 +119,7 @@ def _server_maintenance():
     This maintenance function handles repeated checks and updates that
     the server needs to do. It is called every minute.
     """
-    global EVENNIA, _MAINTENANCE_COUNT, _FLUSH_CACHE, _GAMETIME_MODULE
-    if not _FLUSH_CACHE:
-        from evennia.utils.idmapper.models import conditional_flush as _FLUSH_CACHE
+    global EVENNIA, _MAINTENANCE_COUNT, _GAMETIME_MODULE
     if not _GAMETIME_MODULE:
         from evennia.utils import gametime as _GAMETIME_MODULE
 
@@ -120,32 +136,35 @@ def _server_maintenance():
     _GAMETIME_MODULE.SERVER_RUNTIME_LAST_UPDATED = now
     ServerConfig.objects.conf("runtime", _GAMETIME_MODULE.SERVER_RUNTIME)
 
-    if _MAINTENANCE_COUNT % 300 == 0:
-        # check cache size every 5 minutes
-        _FLUSH_CACHE(_IDMAPPER_CACHE_MAXSIZE)
-    if _MAINTENANCE_COUNT % 3600 == 0:
-        # validate scripts every hour
-        evennia.ScriptDB.objects.validate()
-    if _MAINTENANCE_COUNT % 3700 == 0:
-        # validate channels off-sync with scripts
-        evennia.CHANNEL_HANDLER.update()
+    # start the cache flush, script validation and channel update jobs
+    # as they come up
+    MAINTENANCE_HANDLER.tick(_MAINTENANCE_COUNT)
+
     if _MAINTENANCE_COUNT % (3600 * 7) == 0:
         # drop database connection every 7 hrs to avoid default timeouts on MySQL
         # (see https://github.com/evennia/evennia/issues/1376)
         connection.close()
 
-    # handle idle timeouts
-    if _IDLE_TIMEOUT > 0:
-        reason = _("idle timeout exceeded")
-        for session in (sess for sess in SESSIONS.values()
-                        if (now - sess.cmd_last) > _IDLE_TIMEOUT):
-            if not session.account or not \
-                    session.account.access(session.account, "noidletimeout", default=False):
-                SESSIONS.disconnect(session, reason=reason)
+    # idle timeouts are handled by SESSIONS as each session's deadline passes
 
 maintenance_task = LoopingCall(_server_maintenance)
 maintenance_task.start(60, now=True)  # call every minute
 
+
+def _pause_scripts(scripts):
+    """
+    Pause scripts before the server stops. Each pause stores the
+    script's timer and callcount to be restored at the next start;
+    these are all written in one database transaction.
+
+    Args:
+        scripts (list): The scripts to pause.
+
+    """
+    with transaction.atomic():
+        for script in scripts:
+            script.pause(manual_pause=False)
+
 #------------------------------------------------------------
 # Evennia Main Server object
 #------------------------------------------------------------
@@ -199,6 +218,9 @@ class Evennia(object):
             reactor.callLater(1, d.callback, None)
         reactor.sigInt = _wrap_sigint_handler
 
+        # write eventual buffered log lines, however we stop
+        reactor.addSystemEventTrigger('after', 'shutdown', logger.flush_log_files)
+
     # Server startup methods
 
     def sqlite3_prep(self):
@@ -356,8 +378,9 @@ class Evennia(object):
             ServerConfig.objects.conf("server_restart_mode", "reload")
             yield [o.at_server_reload() for o in ObjectDB.get_all_cached_instances()]
             yield [p.at_server_reload() for p in AccountDB.get_all_cached_instances()]
-            yield [(s.pause(manual_pause=False), s.at_server_reload())
-                   for s in ScriptDB.get_all_cached_instances() if s.is_active]
+            scripts = [s for s in ScriptDB.get_all_cached_instances() if s.is_active]
+            _pause_scripts(scripts)
+            yield [s.at_server_reload() for s in scripts]
             yield self.sessions.all_sessions_portal_sync()
             self.at_server_reload_stop()
             # only save monitor state on reload, not on shutdown/reset
@@ -376,7 +399,9 @@ class Evennia(object):
                 yield [(p.unpuppet_all(), p.at_server_shutdown())
                        for p in AccountDB.get_all_cached_instances()]
                 yield ObjectDB.objects.clear_all_sessids()
-            yield [(s.pause(manual_pause=False), s.at_server_shutdown()) for s in ScriptDB.get_all_cached_instances()]
+            scripts = ScriptDB.get_all_cached_instances()
+            _pause_scripts(scripts)
+            yield [s.at_server_shutdown() for s in scripts]
             ServerConfig.objects.conf("server_restart_mode", "reset")
             self.at_server_cold_stop()
 
@@ -384,6 +409,13 @@ class Evennia(object):
         from evennia.scripts.tickerhandler import TICKER_HANDLER
         TICKER_HANDLER.save()
 
+        # write eventual buffered Attribute changes to the database
+        from evennia.utils.dbserialize import flush_saves
+        flush_saves()
+
+        # write eventual buffered log lines to disk
+        logger.flush_log_files()
+
         # always called, also for a reload
         self.at_server_stop()
 
@@ -452,6 +484,10 @@ class Evennia(object):
         TASK_HANDLER.load()
         TASK_HANDLER.create_delays()
 
+        # continue updating objects with changed prototypes
+        from evennia.prototypes.spawner import resume_prototype_updates
+        resume_prototype_updates()
+
         # delete the temporary setting
         ServerConfig.objects.conf("server_restart_mode", delete=True)
 
@@ -17,6 +17,7 @@ from evennia.utils import logger
 from evennia.utils.utils import make_iter, lazy_property
 from evennia.commands.cmdsethandler import CmdSetHandler
 from evennia.server.session import Session
+from evennia.locks.lockhandler import invalidate_capabilities
 from evennia.scripts.monitorhandler import MONITOR_HANDLER
 
 _GA = object.__getattribute__
@@ -220,6 +221,8 @@ class ServerSession(Session):
         self.uid = self.account.id
         self.uname = self.account.username
         self.logged_in = True
+        # the session's lock capabilities change when logging in
+        invalidate_capabilities(self)
         self.conn_time = time.time()
         self.puid = None
         self.puppet = None
@@ -13,10 +13,14 @@ There are two similar but separate stores of sessions:
 
 """
 import time
+from heapq import heappush, heappop
+from collections import defaultdict
 from builtins import object
 from future.utils import listvalues
 
 from django.conf import settings
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred
 from evennia.commands.cmdhandler import CMD_LOGINSTART
 from evennia.utils.logger import log_trace
 from evennia.utils.utils import (variable_from_module, is_iter,
@@ -38,6 +42,7 @@ _ServerSession = None
 _ServerConfig = None
 _ScriptDB = None
 _OOB_HANDLER = None
+_SERVERSESSION_DATA_OUT = None
 
 
 class DummySession(object):
@@ -64,6 +69,7 @@ PSHUTD = chr(16)       # portal (+server) shutdown
 SSHUTD = chr(17)       # server shutdown
 PSTATUS = chr(18)      # ping server or portal status
 SRESET = chr(19)       # server shutdown in reset mode
+PSTATS = chr(20)       # portal output buffer statistics
 
 # i18n
 from django.utils.translation import ugettext as _
@@ -280,6 +286,98 @@ class ServerSessionHandler(SessionHandler):
         super(ServerSessionHandler, self).__init__(*args, **kwargs)
         self.server = None  # set at server initialization
         self.server_data = {"servername": _SERVERNAME}
+        # idle timeouts - a heap of (deadline, sessid) and the current
+        # deadline of each session, to recognize outdated heap entries
+        self._idle_deadlines = []
+        self._idle_scheduled = {}
+        self._idle_call = None
+        # {account id: (is exempt from timeout, cache expiry time)}
+        self._idle_exempt = {}
+        # deferreds waiting for the portal's output statistics
+        self._portal_stats_requests = []
+
+    def __setitem__(self, key, session):
+        "Track the idle timeout of all added sessions"
+        super(ServerSessionHandler, self).__setitem__(key, session)
+        if key is not None and _IDLE_TIMEOUT > 0:
+            self._schedule_idle_timeout(session, session.cmd_last + _IDLE_TIMEOUT)
+
+    def _schedule_idle_timeout(self, session, deadline):
+        """
+        Set when a session should next be checked for idling. The
+        session is only checked then, so its `cmd_last` can change
+        freely in the meantime.
+
+        Args:
+            session (Session): The session to check.
+            deadline (float): The time to check it.
+
+        """
+        self._idle_scheduled[session.sessid] = deadline
+        heappush(self._idle_deadlines, (deadline, session.sessid))
+        call = self._idle_call
+        if call and call.active():
+            if call.getTime() <= deadline:
+                return
+            call.cancel()
+        self._idle_call = reactor.callLater(max(0, deadline - time.time()),
+                                            self.check_idle_timeouts)
+
+    def _is_idle_exempt(self, account, now):
+        """
+        Check the `noidletimeout` lock of an account. The result is
+        cached per account for one `IDLE_TIMEOUT` period.
+
+        Args:
+            account (Account): The account to check.
+            now (float): The current time.
+
+        Returns:
+            exempt (bool): If the account's sessions may idle.
+
+        """
+        exempt, expires = self._idle_exempt.get(account.id, (False, 0))
+        if expires <= now:
+            exempt = account.access(account, "noidletimeout", default=False)
+            self._idle_exempt[account.id] = (exempt, now + _IDLE_TIMEOUT)
+        return exempt
+
+    def check_idle_timeouts(self):
+        """
+        Disconnect the sessions that have idled past `IDLE_TIMEOUT`.
+        Only sessions whose deadline has passed are looked at; those
+        that were active since are rescheduled to their new deadline.
+
+        """
+        if self._idle_call and self._idle_call.active():
+            self._idle_call.cancel()
+        self._idle_call = None
+        deadlines, scheduled = self._idle_deadlines, self._idle_scheduled
+        now = time.time()
+        reason = _("idle timeout exceeded")
+        while deadlines and deadlines[0][0] <= now:
+            deadline, sessid = heappop(deadlines)
+            if scheduled.get(sessid) != deadline:
+                # an outdated entry
+                continue
+            session = self.get(sessid)
+            if not session:
+                del scheduled[sessid]
+                continue
+            if session.cmd_last + _IDLE_TIMEOUT > now:
+                # the session was active since it was scheduled
+                deadline = session.cmd_last + _IDLE_TIMEOUT
+            elif session.account and self._is_idle_exempt(session.account, now):
+                deadline = now + _IDLE_TIMEOUT
+            else:
+                del scheduled[sessid]
+                self.disconnect(session, reason=reason)
+                continue
+            scheduled[sessid] = deadline
+            heappush(deadlines, (deadline, sessid))
+        if deadlines:
+            self._idle_call = reactor.callLater(max(0, deadlines[0][0] - now),
+                                                self.check_idle_timeouts)
 
     def _run_cmd_login(self, session):
         """
@@ -462,6 +560,35 @@ class ServerSessionHandler(SessionHandler):
         self.server.amp_protocol.send_AdminServer2Portal(DUMMYSESSION,
                                                          operation=PSHUTD)
 
+    def get_portal_output_stats(self):
+        """
+        Ask the portal for the output buffer statistics of its sessions.
+
+        Returns:
+            deferred (Deferred): Fires with `{sessid: {"messages": int,
+                "writes": int}}` when the portal answers.
+
+        """
+        deferred = Deferred()
+        self._portal_stats_requests.append(deferred)
+        if len(self._portal_stats_requests) == 1:
+            # only ask again if we are not already waiting for an answer
+            self.server.amp_protocol.send_AdminServer2Portal(DUMMYSESSION,
+                                                             operation=PSTATS)
+        return deferred
+
+    def portal_output_stats(self, stats):
+        """
+        Called by the portal with its output buffer statistics.
+
+        Args:
+            stats (dict): `{sessid: {"messages": int, "writes": int}}`.
+
+        """
+        requests, self._portal_stats_requests = self._portal_stats_requests, []
+        for deferred in requests:
+            deferred.callback(stats)
+
     def login(self, session, account, force=False, testmode=False):
         """
         Log in the previously unloggedin session and the account we by
@@ -541,6 +668,7 @@ class ServerSessionHandler(SessionHandler):
 
         session.at_disconnect(reason)
         sessid = session.sessid
+        self._idle_scheduled.pop(sessid, None)
         if sessid in self and not hasattr(self, "_disconnect_all"):
             del self[sessid]
         if sync_portal:
@@ -627,15 +755,12 @@ class ServerSessionHandler(SessionHandler):
     def validate_sessions(self):
         """
         Check all currently connected sessions (logged in and not) and
-        see if any are dead or idle.
+        see if any are dead or idle. This is done automatically as the
+        idle deadlines pass, see `check_idle_timeouts`.
 
         """
-        tcurr = time.time()
-        reason = _("Idle timeout exceeded, disconnecting.")
-        for session in (session for session in self.values()
-                        if session.logged_in and _IDLE_TIMEOUT > 0 and
-                        (tcurr - session.cmd_last) > _IDLE_TIMEOUT):
-            self.disconnect(session, reason=reason)
+        if _IDLE_TIMEOUT > 0:
+            self.check_idle_timeouts()
 
     def account_count(self):
         """
@@ -743,8 +868,7 @@ class ServerSessionHandler(SessionHandler):
             message (str): Message to send.
 
         """
-        for session in self.values():
-            self.data_out(session, text=message)
+        self.data_out_multi(self.values(), text=message)
 
     def data_out(self, session, **kwargs):
         """
@@ -765,6 +889,54 @@ class ServerSessionHandler(SessionHandler):
         self.server.amp_protocol.send_MsgServer2Portal(session,
                                                        **kwargs)
 
+    def data_out_multi(self, sessions, **kwargs):
+        """
+        Sending the same data Server -> Portal for many sessions.
+
+        Args:
+            sessions (list): Sessions to relay to.
+            text (str, optional): text data to return
+
+        Notes:
+            The outdata is only scrubbed once for every encoding in use
+            by the sessions and then sent across the wire once, with a
+            list of recipients that the Portal relays it to. If
+            inlinefuncs are enabled the outdata may differ between
+            sessions, so it is then instead sent to each session
+            separately (unless the `raw` option is set). Sessions
+            with an overloaded `data_out` method are always sent to
+            separately, through that method.
+
+        """
+        global _SERVERSESSION_DATA_OUT
+        if not _SERVERSESSION_DATA_OUT:
+            from evennia.server.serversession import ServerSession
+            _SERVERSESSION_DATA_OUT = ServerSession.data_out.__func__
+
+        batch = []
+        for session in sessions:
+            if getattr(type(session).data_out, "__func__", None) is _SERVERSESSION_DATA_OUT:
+                batch.append(session)
+            else:
+                session.data_out(**kwargs)
+        sessions = batch
+        if len(sessions) < 2 or (_INLINEFUNC_ENABLED and
+                                 not (kwargs.get("options") or {}).get("raw", False)):
+            for session in sessions:
+                self.data_out(session, **kwargs)
+            return
+
+        # group sessions by encoding, since the data is encoded when cleaned
+        encodings = defaultdict(list)
+        for session in sessions:
+            encodings[session.protocol_flags.get("ENCODING", "utf-8")].append(session)
+
+        for enc_sessions in encodings.values():
+            # clean output for sending (clean_senddata changes the dict)
+            clean_kwargs = self.clean_senddata(enc_sessions[0], dict(kwargs))
+            # send across AMP
+            self.server.amp_protocol.send_MsgServer2PortalMulti(enc_sessions, **clean_kwargs)
+
     def get_inputfuncs(self):
         """
         Get all registered inputfuncs (access function)
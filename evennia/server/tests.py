@@ -30,6 +30,8 @@ from evennia.utils.test_resources import EvenniaTest
 from django.test.runner import DiscoverRunner
 
 from evennia.server.throttle import Throttle
+from evennia.server.sessionhandler import SESSIONS
+from mock import Mock, patch
 
 from .deprecations import check_errors
 
@@ -144,3 +146,179 @@ class ThrottleTest(EvenniaTest):
 
         # There should only be (cache_size * num_ips) total in the Throttle cache
         self.assertEqual(sum([len(cache[x]) for x in cache.keys()]), throttle.cache_size * len(ips))
+
+
+class TestMsgContents(EvenniaTest):
+    """
+    Test the batched message path of msg_contents.
+    """
+    def test_msg_contents(self):
+        sess1, sess2, sess3 = Mock(), Mock(), Mock()
+        self.char2.msg = Mock()
+        SESSIONS.data_out_multi.reset_mock()
+        with patch.object(self.char1.sessions, "all", return_value=[sess1, sess2]), \
+                patch.object(self.obj1.sessions, "all", return_value=[sess3]):
+            self.room1.msg_contents("{who} waves.", mapping={"who": "Tom"}, exclude=self.obj2)
+        # overloaded msg is called separately
+        self.char2.msg.assert_called_once_with(
+            text=("Tom waves.", {}), from_obj=None)
+        SESSIONS.data_out_multi.assert_called_once()
+        args, kwargs = SESSIONS.data_out_multi.call_args
+        self.assertEqual(set(args[0]), set([sess1, sess2, sess3]))
+        self.assertEqual(kwargs, {"text": ("Tom waves.", {})})
+        self.assertFalse(sess1.data_out.called)
+
+
+class TestDataOutMulti(TestCase):
+    """
+    Test sending the same data to many sessions at once.
+    """
+    def test_overloaded_data_out(self):
+        from evennia.server import sessionhandler
+        from evennia.server.serversession import ServerSession
+
+        class _CustomSession(ServerSession):
+            def data_out(self, **kwargs):
+                self.received = kwargs
+
+        handler = sessionhandler.ServerSessionHandler()
+        handler.server = Mock()
+        sess1, sess2, sess3 = ServerSession(), ServerSession(), _CustomSession()
+        for sess in (sess1, sess2, sess3):
+            sess.protocol_flags = {}
+        with patch.object(handler, "clean_senddata", side_effect=lambda sess, kwargs: kwargs), \
+                patch.object(sessionhandler, "_INLINEFUNC_ENABLED", False):
+            handler.data_out_multi([sess1, sess2, sess3], text="Hello")
+        handler.server.amp_protocol.send_MsgServer2PortalMulti.assert_called_once_with(
+            [sess1, sess2], text="Hello")
+        self.assertEqual(sess3.received, {"text": "Hello"})
+
+
+class TestChannelDistribution(EvenniaTest):
+    """
+    Test the batched message path and online cache of channels.
+    """
+    def test_distribute_message(self):
+        import evennia
+        channel = evennia.create_channel("disttest")
+        channel.connect(self.account)
+        channel.connect(self.account2)
+        self.account.is_connected = False
+        self.account2.is_connected = False
+        self.assertEqual(channel.subscriptions.online(), [])
+        self.account.is_connected = True
+        self.account2.is_connected = True
+        with self.assertNumQueries(0):
+            self.assertEqual(set(channel.subscriptions.online()), set([self.account, self.account2]))
+        self.account2.is_connected = False
+        self.assertEqual(channel.subscriptions.online(), [self.account])
+        self.account2.is_connected = True
+        self.assertTrue(channel.mute(self.account2))
+        self.assertFalse(channel.mute(self.account2))
+        self.assertEqual(channel.mutelist, [self.account2])
+
+        sess1, sess2 = Mock(), Mock()
+        SESSIONS.data_out_multi.reset_mock()
+        with patch.object(self.account.sessions, "all", return_value=[sess1, sess2]):
+            channel.msg("Hello", online=True)
+        SESSIONS.data_out_multi.assert_called_once_with(
+            [sess1, sess2], text="[disttest] Hello", options={"from_channel": channel.id})
+        self.assertTrue(channel.unmute(self.account2))
+        channel.delete()
+
+    def test_delivery_order(self):
+        import evennia
+        channel = evennia.create_channel("ordertest")
+        sess1, sess2 = Mock(), Mock()
+        calls = []
+        SESSIONS.data_out_multi.reset_mock()
+        SESSIONS.data_out_multi.side_effect = lambda sessions, **kwargs: calls.append(list(sessions))
+        self.account.msg = Mock(side_effect=lambda *args, **kwargs: calls.append("custom"))
+        try:
+            with patch.object(channel.subscriptions, "all",
+                              return_value=[self.account2, self.account, self.char1]), \
+                    patch.object(self.account2.sessions, "all", return_value=[sess1]), \
+                    patch.object(self.char1.sessions, "all", return_value=[sess2]):
+                channel.msg("Hello", online=False)
+        finally:
+            SESSIONS.data_out_multi.side_effect = None
+        # subscribers are sent to in order
+        self.assertEqual(calls, [[sess1], "custom", [sess2]])
+        channel.delete()
+
+
+class TestIdleTimeouts(TestCase):
+    """
+    Test the deadline-based idle timeouts of the session handler.
+    """
+    def test_idle_timeouts(self):
+        from twisted.internet import task
+        from evennia.server import sessionhandler
+        clock = task.Clock()
+        handler = sessionhandler.ServerSessionHandler()
+        handler.disconnect = Mock()
+        account = Mock(id=5)
+        account.access.return_value = True
+        sess1 = Mock(sessid=1, cmd_last=0, account=None)
+        sess2 = Mock(sessid=2, cmd_last=0, account=account)
+        sess3 = Mock(sessid=3, cmd_last=0, account=None)
+        with patch.object(sessionhandler, "_IDLE_TIMEOUT", 10), \
+                patch.object(sessionhandler, "reactor", clock), \
+                patch.object(sessionhandler, "time", Mock(time=clock.seconds)):
+            handler[1] = sess1
+            handler[2] = sess2
+            handler[3] = sess3
+            clock.advance(5)
+            sess3.cmd_last = 5
+            clock.advance(5)
+            # sess1 timed out, sess2 is exempt and sess3 was active
+            handler.disconnect.assert_called_once_with(sess1, reason="idle timeout exceeded")
+            self.assertEqual(handler._idle_scheduled, {2: 20, 3: 15})
+            clock.advance(5)
+            handler.disconnect.assert_called_with(sess3, reason="idle timeout exceeded")
+            self.assertEqual(handler.disconnect.call_count, 2)
+            # the lock check is cached for an IDLE_TIMEOUT period
+            clock.advance(4)
+            self.assertEqual(account.access.call_count, 1)
+            clock.advance(1)
+            self.assertEqual(account.access.call_count, 2)
+            self.assertEqual(handler._idle_scheduled, {2: 30})
+            self.assertEqual(len(clock.getDelayedCalls()), 1)
+            clock.getDelayedCalls()[0].cancel()
+
+
+class TestMaintenance(TestCase):
+    """
+    Test the cooperative maintenance jobs.
+    """
+    def test_jobs(self):
+        from twisted.internet import task
+        from evennia.server import maintenance
+        clock = task.Clock()
+        # run one step per (one second) reactor tick
+        cooperator = task.Cooperator(terminationPredicateFactory=lambda: lambda: True,
+                                     scheduler=lambda func: clock.callLater(1, func))
+        steps = []
+
+        def _job():
+            for step in range(3):
+                steps.append(step)
+                yield
+
+        handler = maintenance.MaintenanceHandler()
+        job = handler.add("testjob", 2, _job)
+        with patch.object(maintenance, "task", Mock(cooperate=cooperator.cooperate)):
+            handler.tick(1)
+            self.assertFalse(job.running)
+            handler.tick(2)
+            self.assertTrue(job.running)
+            self.assertEqual(job.start(), None)
+            clock.advance(1)
+            self.assertEqual(steps, [0])
+            clock.pump([1, 1, 1])
+        self.assertEqual(steps, [0, 1, 2])
+        self.assertEqual(handler.all(), [job])
+        stats = job.stats()
+        self.assertFalse(stats["running"])
+        self.assertEqual((stats["runs"], stats["errors"], stats["last_steps"]), (1, 0, 3))
+        self.assertTrue(stats["last_runtime"] <= stats["last_duration"])
@@ -98,6 +98,16 @@ WEBSOCKET_CLIENT_INTERFACE = '0.0.0.0'
 # the client will itself figure out this url based on the server's hostname.
 # e.g. ws://external.example.com or wss://external.example.com:443
 WEBSOCKET_CLIENT_URL = None
+# Telnet and websocket sessions can collect all output sent to them during
+# one reactor tick and write it to the network in one go. For telnet this
+# means a single MCCP compression flush, for the websocket a single frame
+# ["batch", [message, ...], {}]. The default webclient understands these
+# frames, but custom websocket clients must too before turning this on.
+PORTAL_OUTPUT_BUFFER = False
+# Write the buffered output right away if it grows larger than this (bytes).
+PORTAL_OUTPUT_BUFFER_SIZE = 16384
+# Max seconds to hold back output. At 0 it's written at the end of the tick.
+PORTAL_OUTPUT_BUFFER_DELAY = 0
 # This determine's whether Evennia's custom admin page is used, or if the
 # standard Django admin is used.
 EVENNIA_ADMIN = True
@@ -109,6 +119,19 @@ EVENNIA_ADMIN = True
 AMP_HOST = 'localhost'
 AMP_PORT = 4006
 AMP_INTERFACE = '127.0.0.1'
+# How data is encoded when sent over AMP. Use "zlib" to compress
+# messages larger than AMP_COMPRESSION_THRESHOLD bytes with the given zlib
+# compression level (1-9, higher is slower but smaller). Use "none" to
+# never compress; this is usually fastest since the AMP connection is
+# normally on the same machine. The two processes can use different codecs.
+AMP_CODEC = "zlib"
+AMP_COMPRESSION_THRESHOLD = 1024
+AMP_COMPRESSION_LEVEL = 6
+# If set, all session messages sent between Portal and Server during the
+# same reactor tick are grouped into a single AMP message. This lowers the
+# per-message overhead a lot when sending to many sessions at once, like
+# during room-wide broadcasts.
+AMP_BATCH_MESSAGES = True
 
 
 # Path to the lib directory containing the bulk of the codebase's code.
@@ -144,6 +167,16 @@ CYCLE_LOGFILES = True
 CHANNEL_LOG_NUM_TAIL_LINES = 20
 # Max size (in bytes) of channel log files before they rotate
 CHANNEL_LOG_ROTATE_SIZE = 1000000
+# Lines logged to custom log files (like channel logs) are buffered and
+# written to disk in batches by a worker thread. A file's buffered lines
+# are written when there are this many of them ...
+LOG_FILE_BATCH_SIZE = 100
+# ... or at the latest this many seconds after they were logged.
+LOG_FILE_BATCH_INTERVAL = 1.0
+# If more lines than this (for all files) are waiting to be written, the
+# server stops to write them all right away, so a log writer that can't
+# keep up won't use more and more memory.
+LOG_FILE_MAX_QUEUE = 10000
 # Local time zone for this installation. All choices can be found here:
 # http://www.postgresql.org/docs/8.0/interactive/datetime-keywords.html#DATETIME-TIMEZONE-SET-TABLE
 TIME_ZONE = 'UTC'
@@ -222,6 +255,23 @@ COMMAND_RATE_WARNING = "You entered commands too fast. Wait a moment and try aga
 MAX_CHAR_LIMIT = 6000
 # The warning to echo back to users if they enter a very large string
 MAX_CHAR_LIMIT_WARNING = "You entered a string that was too long. Please break it up into multiple parts."
+# All TickerHandler subscribers with the same interval are normally ticked
+# at the same time. With many subscribers (like thousands of NPCs on the
+# same AI tick) this blocks the server for the whole time every interval.
+# With this >1, the subscribers of each interval are instead spread out
+# over this many evenly spaced phases within the interval (by a hash of
+# their subscription). Each subscriber is still ticked once per interval.
+TICKER_PHASE_SLOTS = 1
+# If > 0, a ticker that has spent more than this many seconds ticking its
+# subscribers will let the server handle other events (like player input)
+# before continuing with the rest of its subscribers.
+TICKER_TIME_BUDGET = 0
+# Timed Scripts normally each run their own timer in the server. With this
+# set, all timed Scripts are instead driven by one timer, using a "timing
+# wheel" that scales much better to many thousands of timed Scripts. Their
+# repeats may then fire up to SCRIPT_SCHEDULER_RESOLUTION seconds late.
+SCRIPT_SCHEDULER = False
+SCRIPT_SCHEDULER_RESOLUTION = 0.1
 # If this is true, errors and tracebacks from the engine will be
 # echoed as text in-game as well as to the log. This can speed up
 # debugging. OBS: Showing full tracebacks to regular users could be a
@@ -267,6 +317,15 @@ CONN_MAX_AGE = 3600 * 7
 ATTRIBUTE_STORED_MODEL_RENAME = [
         ((u"players", u"playerdb"), (u"accounts", u"accountdb")),
         ((u"typeclasses", u"defaultplayer"), (u"typeclasses", u"defaultaccount"))]
+# In-place changes to mutable Attribute values (like `obj.db.mylist.append(1)`)
+# normally re-save the whole Attribute to the database every time. With this
+# set, the Attribute is instead marked as changed and only saved once, at the
+# end of the current command or server tick, no matter how many changes were
+# made. Outside the running server (like in `evennia shell`) and outside the
+# reactor thread (like in website views) every change is still saved
+# immediately. Until the save, searches for Attribute values in the database
+# will not see the change.
+ATTRIBUTE_SAVE_COALESCING = False
 
 
 ######################################################################
@@ -302,6 +361,12 @@ SEARCH_MULTIMATCH_TEMPLATE = " {number}-{name}{aliases}{info}\n"
 # both for command- and object-searches. This allows full control
 # over the error output (it uses SEARCH_MULTIMATCH_TEMPLATE by default).
 SEARCH_AT_RESULT = "evennia.utils.utils.at_search_result"
+# If set, object key/alias searches among a given list of candidates (like
+# the contents of a room or an inventory) are resolved against an in-memory
+# index of the (lowercase) keys and aliases of the candidates instead of
+# querying the database. The index is updated whenever an object's key or
+# aliases change. Global searches always query the database.
+SEARCH_NAME_INDEX = True
 # Single characters to ignore at the beginning of a command. When set, e.g.
 # cmd, @cmd and +cmd will all find a command "cmd" or one named "@cmd" etc. If
 # you have defined two different commands cmd and @cmd you can still enter
@@ -357,6 +422,10 @@ PROTOTYPE_MODULES = ["world.prototypes"]
 # Modules containining Prototype functions able to be embedded in prototype
 # definitions from in-game.
 PROT_FUNC_MODULES = ["evennia.prototypes.protfuncs"]
+# When the objects spawned from a prototype are updated in the background
+# (like with @spawn/update), this many objects are updated at a time, each
+# batch in one transaction. The server handles other work between batches.
+PROTOTYPE_UPDATE_CHUNK_SIZE = 500
 # Module holding settings/actions for the dummyrunner program (see the
 # dummyrunner for more information)
 DUMMYRUNNER_SETTINGS_MODULE = "evennia.server.profiling.dummyrunner_settings"
@@ -415,6 +484,12 @@ CMDSET_FALLBACKS = {CMDSET_CHARACTER: 'evennia.commands.default.cmdset_character
                     CMDSET_ACCOUNT: 'evennia.commands.default.cmdset_account.AccountCmdSet',
                     CMDSET_SESSION: 'evennia.commands.default.cmdset_session.SessionCmdSet',
                     CMDSET_UNLOGGEDIN: 'evennia.commands.default.cmdset_unloggedin.UnloggedinCmdSet'}
+# The command handler caches the result of merging a given combination of
+# cmdsets so it does not have to re-merge them on every command. This is
+# the max number of merged cmdsets to keep; the least recently used ones
+# are dropped first. Each combination of room, exits, inventory and
+# channel cmdsets in play needs its own entry.
+CMDSET_MERGE_CACHE_SIZE = 2000
 # Parent class for all default commands. Changing this class will
 # modify all default commands, so do so carefully.
 COMMAND_DEFAULT_CLASS = "evennia.commands.default.muxcommand.MuxCommand"
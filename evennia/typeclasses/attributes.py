@@ -19,11 +19,14 @@ from django.utils.encoding import smart_str
 
 from evennia.locks.lockhandler import LockHandler
 from evennia.utils.idmapper.models import SharedMemoryModel
-from evennia.utils.dbserialize import to_pickle, from_pickle
+from evennia.utils.dbserialize import to_pickle, from_pickle, batch_saves
 from evennia.utils.picklefield import PickledObjectField
 from evennia.utils.utils import lazy_property, to_str, make_iter, is_iter
 
 _TYPECLASS_AGGRESSIVE_CACHE = settings.TYPECLASS_AGGRESSIVE_CACHE
+# markers used by the handler caches
+_EMPTY = {}
+_MISSING = object()
 
 # -------------------------------------------------------------
 #
@@ -94,6 +97,9 @@ class Attribute(SharedMemoryModel):
     # Database manager
     # objects = managers.AttributeManager()
 
+    # in-place changed value waiting to be saved (see dbserialize.batch_saves)
+    _pending_value = None
+
     @lazy_property
     def locks(self):
         return LockHandler(self)
@@ -140,6 +146,9 @@ class Attribute(SharedMemoryModel):
         as storing a dbobj which is then deleted elsewhere) out-of-sync.
         The overhead of unpickling seems hard to avoid.
         """
+        if self._pending_value is not None:
+            # an in-place change waiting to be saved
+            return self._pending_value
         return from_pickle(self.db_value, db_obj=self)
 
     # @value.setter
@@ -148,6 +157,7 @@ class Attribute(SharedMemoryModel):
         Setter. Allows for self.value = value. We cannot cache here,
         see self.__value_get.
         """
+        self._pending_value = None
         self.db_value = to_pickle(new_value)
         # print("value_set, self.db_value:", repr(self.db_value))  # DEBUG
         self.save(update_fields=["db_value"])
@@ -211,25 +221,37 @@ class AttributeHandler(object):
         self.obj = obj
         self._objid = obj.id
         self._model = to_str(obj.__dbclass__.__name__.lower())
+        # {category: {key: attr}} (a `None` attr marks a non-existing attribute)
         self._cache = {}
         # store category names fully cached
         self._catcache = {}
         # full cache was run on all attributes
         self._cache_complete = False
 
-    def _fullcache(self):
-        """Cache all attributes of this object"""
-        query = {"%s__id" % self._model: self._objid,
-                 "attribute__db_model__iexact": self._model,
-                 "attribute__db_attrtype": self._attrtype}
-        attrs = [
-            conn.attribute for conn in getattr(
-                self.obj,
-                self._m2m_fieldname).through.objects.filter(
-                **query)]
-        self._cache = dict(("%s-%s" % (to_str(attr.db_key).lower(),
-                                       attr.db_category.lower() if attr.db_category else None),
-                            attr) for attr in attrs)
+    def _fullcache(self, attrs=None):
+        """
+        Cache all attributes of this object.
+
+        Args:
+            attrs (list, optional): All Attributes of this object, if
+                already fetched from the database. This is used by
+                `TypedObjectManager.prefetch_caches`.
+
+        """
+        if attrs is None:
+            query = {"%s__id" % self._model: self._objid,
+                     "attribute__db_model__iexact": self._model,
+                     "attribute__db_attrtype": self._attrtype}
+            attrs = [
+                conn.attribute for conn in getattr(
+                    self.obj,
+                    self._m2m_fieldname).through.objects.filter(
+                    **query).select_related("attribute")]
+        cache = {}
+        for attr in attrs:
+            category = attr.db_category.lower() if attr.db_category else None
+            cache.setdefault(category, {})[to_str(attr.db_key).lower()] = attr
+        self._cache = cache
         self._cache_complete = True
 
     def _getcache(self, key=None, category=None):
@@ -255,27 +277,31 @@ class AttributeHandler(object):
             database lookup.
 
         """
+        if key and _TYPECLASS_AGGRESSIVE_CACHE:
+            # fast path; the key and category are usually already normalized
+            attr = self._cache.get(category, _EMPTY).get(key, _MISSING)
+            if attr is None:
+                return []  # no such attribute: return an empty list
+            if attr is not _MISSING and attr.pk:
+                return [attr]
+
         key = key.strip().lower() if key else None
         category = category.strip().lower() if category else None
         if key:
-            cachekey = "%s-%s" % (key, category)
-            cachefound = False
-            try:
-                attr = _TYPECLASS_AGGRESSIVE_CACHE and self._cache[cachekey]
-                cachefound = True
-            except KeyError:
-                attr = None
-
-            if attr and (not hasattr(attr, "pk") and attr.pk is None):
+            catcache = self._cache.get(category, _EMPTY) if _TYPECLASS_AGGRESSIVE_CACHE else _EMPTY
+            attr = catcache.get(key, _MISSING)
+            if attr is not _MISSING and attr is not None and attr.pk is None:
                 # clear out Attributes deleted from elsewhere. We must search this anew.
-                attr = None
-                cachefound = False
-                del self._cache[cachekey]
-            if cachefound:
+                attr = _MISSING
+                del catcache[key]
+            if attr is not _MISSING:
                 if attr:
                     return [attr]  # return cached entity
                 else:
                     return []  # no such attribute: return an empty list
+            elif _TYPECLASS_AGGRESSIVE_CACHE and self._cache_complete:
+                # all attributes are cached, so this one does not exist
+                return []
             else:
                 query = {"%s__id" % self._model: self._objid,
                          "attribute__db_model__iexact": self._model,
@@ -287,21 +313,20 @@ class AttributeHandler(object):
                 conn = getattr(self.obj, self._m2m_fieldname).through.objects.filter(**query)
                 if conn:
                     attr = conn[0].attribute
-                    self._cache[cachekey] = attr
+                    self._cache.setdefault(category, {})[key] = attr
                     return [attr] if attr.pk else []
                 else:
                     # There is no such attribute. We will explicitly save that
                     # in our cache to avoid firing another query if we try to
                     # retrieve that (non-existent) attribute again.
-                    self._cache[cachekey] = None
+                    self._cache.setdefault(category, {})[key] = None
                     return []
         else:
             # only category given (even if it's None) - we can't
             # assume the cache to be complete unless we have queried
             # for this category before
-            catkey = "-%s" % category
-            if _TYPECLASS_AGGRESSIVE_CACHE and catkey in self._catcache:
-                return [attr for key, attr in self._cache.items() if key.endswith(catkey) and attr]
+            if _TYPECLASS_AGGRESSIVE_CACHE and (category in self._catcache or self._cache_complete):
+                return [attr for attr in self._cache.get(category, _EMPTY).values() if attr]
             else:
                 # we have to query to make this category up-date in the cache
                 query = {"%s__id" % self._model: self._objid,
@@ -310,12 +335,12 @@ class AttributeHandler(object):
                          "attribute__db_category__iexact": category.lower() if category else None}
                 attrs = [conn.attribute for conn
                          in getattr(self.obj, self._m2m_fieldname).through.objects.filter(**query)]
+                catcache = self._cache.setdefault(category, {})
                 for attr in attrs:
                     if attr.pk:
-                        cachekey = "%s-%s" % (attr.db_key, category)
-                        self._cache[cachekey] = attr
+                        catcache[to_str(attr.db_key).lower()] = attr
                 # mark category cache as up-to-date
-                self._catcache[catkey] = True
+                self._catcache[category] = True
                 return attrs
 
     def _setcache(self, key, category, attr_obj):
@@ -330,11 +355,9 @@ class AttributeHandler(object):
         """
         if not key:  # don't allow an empty key in cache
             return
-        cachekey = "%s-%s" % (key, category)
-        catkey = "-%s" % category
-        self._cache[cachekey] = attr_obj
+        self._cache.setdefault(category, {})[key] = attr_obj
         # mark that the category cache is no longer up-to-date
-        self._catcache.pop(catkey, None)
+        self._catcache.pop(category, None)
         self._cache_complete = False
 
     def _delcache(self, key, category):
@@ -346,15 +369,12 @@ class AttributeHandler(object):
             category (str or None): A cleaned category name
 
         """
-        catkey = "-%s" % category
         if key:
-            cachekey = "%s-%s" % (key, category)
-            self._cache.pop(cachekey, None)
+            self._cache.get(category, _EMPTY).pop(key, None)
         else:
-            self._cache = {key: attrobj for key, attrobj in
-                           self._cache.items() if not key.endswith(catkey)}
+            self._cache.pop(category, None)
         # mark that the category cache is no longer up-to-date
-        self._catcache.pop(catkey, None)
+        self._catcache.pop(category, None)
         self._cache_complete = False
 
     def reset_cache(self):
@@ -365,6 +385,29 @@ class AttributeHandler(object):
         self._cache = {}
         self._catcache = {}
 
+    def batch(self):
+        """
+        Context manager for changing many mutable Attribute values
+        in-place while only saving each changed Attribute once, when
+        the batch ends.
+
+        Returns:
+            batch (contextmanager): To be used in a `with` statement.
+
+        Examples:
+            ```python
+            with obj.attributes.batch():
+                for item in items:
+                    obj.db.inventory.append(item)
+            ```
+
+        Notes:
+            The batch covers changes to all Attributes, not only those
+            on this handler's object.
+
+        """
+        return batch_saves()
+
     def has(self, key=None, category=None):
         """
         Checks if the given Attribute (or list of Attributes) exists on
@@ -657,11 +700,12 @@ class AttributeHandler(object):
         """
         if not self._cache_complete:
             self._fullcache()
+        attrs = [attr for catcache in self._cache.values() for attr in catcache.values()]
         if accessing_obj:
-            [attr.delete() for attr in self._cache.values()
+            [attr.delete() for attr in attrs
              if attr and attr.access(accessing_obj, self._attredit, default=default_access)]
         else:
-            [attr.delete() for attr in self._cache.values() if attr and attr.pk]
+            [attr.delete() for attr in attrs if attr and attr.pk]
         self._cache = {}
         self._catcache = {}
         self._cache_complete = False
@@ -685,7 +729,8 @@ class AttributeHandler(object):
         """
         if not self._cache_complete:
             self._fullcache()
-        attrs = sorted([attr for attr in self._cache.values() if attr],
+        attrs = sorted([attr for catcache in self._cache.values()
+                        for attr in catcache.values() if attr],
                        key=lambda o: o.id)
         if accessing_obj:
             return [attr for attr in attrs
@@ -5,15 +5,80 @@ all Attributes and TypedObjects).
 
 """
 import shlex
-from django.db.models import Q
+from collections import defaultdict, OrderedDict
+from django.db import connection, transaction
+from django.db.models import Q, Max
 from evennia.utils import idmapper
 from evennia.utils.utils import make_iter, variable_from_module, to_unicode
+from evennia.utils.dbserialize import to_pickle
+from evennia.utils.picklefield import dbsafe_encode
 from evennia.typeclasses.attributes import Attribute
 from evennia.typeclasses.tags import Tag
 
 __all__ = ("TypedObjectManager", )
 _GA = object.__getattribute__
 _Tag = None
+_MONITOR_HANDLER = None
+
+# the handlers filled by prefetch_caches
+_ATTRIBUTE_HANDLERS = ("attributes", "nicks")
+_TAG_HANDLERS = ("tags", "aliases", "permissions")
+# max number of objects to query for at a time (sqlite limits the
+# number of variables in a query)
+_PREFETCH_CHUNK_SIZE = 500
+# the tag handler for each tagtype
+_TAG_HANDLER_NAMES = {None: "tags", "alias": "aliases", "permission": "permissions"}
+
+
+def _bulk_insert(model, instances):
+    """
+    Insert many new instances of a model into the database with a few
+    queries, giving them their primary keys and caching them.
+
+    Args:
+        model (Model): The database model.
+        instances (list): New, unsaved instances of `model`.
+
+    Notes:
+        Sqlite can't return the ids of rows inserted in bulk, so the
+        rows get explicit ids, above any used before. The database is
+        locked for writing while the ids are picked and inserted. Other
+        databases that can't return the ids (like MySQL) insert one row
+        at a time, since there is no safe way to pick the ids in advance.
+        This should be called within a transaction.
+
+    """
+    if not instances:
+        return
+    if connection.features.can_return_ids_from_bulk_insert:
+        model.objects.bulk_create(instances)
+    elif connection.vendor == "sqlite":
+        table = model._meta.db_table
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # a dummy write takes the database's write lock, so nobody
+                # else can insert rows until our transaction is done
+                cursor.execute("UPDATE sqlite_sequence SET seq=seq WHERE name=%s", [table])
+                # don't reuse the ids of deleted rows
+                cursor.execute("SELECT seq FROM sqlite_sequence WHERE name=%s", [table])
+                row = cursor.fetchone()
+            start = model.objects.aggregate(maxid=Max("id"))["maxid"] or 0
+            start = max(start, row[0] if row else 0)
+            for iinst, instance in enumerate(instances):
+                instance.id = start + iinst + 1
+            model.objects.bulk_create(instances)
+    else:
+        # let the database pick each id. This is what save() does,
+        # without sending the save signals.
+        fields = [field for field in model._meta.local_concrete_fields
+                  if field is not model._meta.auto_field]
+        for instance in instances:
+            instance.id = model.objects._insert([instance], fields=fields, return_id=True)
+    for instance in instances:
+        instance._state.adding = False
+        instance._state.db = model.objects.db
+        if hasattr(instance, "cache_instance"):
+            instance.cache_instance(instance)
 
 
 # Managers
@@ -358,6 +423,225 @@ class TypedObjectManager(idmapper.manager.SharedMemoryManager):
             tag.save()
         return make_iter(tag)[0]
 
+    # handler cache methods
+
+    def prefetch_caches(self, objs, attributes=True, tags=True):
+        """
+        Fill the Attribute- and Tag-caches of many objects at once,
+        using a few database queries instead of (at least) one per
+        object and handler.
+
+        Args:
+            objs (list): Typeclassed objects of this manager's model.
+            attributes (bool, optional): Fill the caches of the
+                `attributes` and `nicks` handlers.
+            tags (bool, optional): Fill the caches of the `tags`,
+                `aliases` and `permissions` handlers.
+
+        Notes:
+            Objects having all the relevant caches filled already are
+            skipped, so this is cheap to call repeatedly on the same
+            objects.
+
+        """
+        dbmodel = self.model.__dbclass__
+        model = dbmodel.__name__.lower()
+        objid = "%s_id" % model
+        objs = [obj for obj in make_iter(objs) if obj and obj.pk]
+
+        def _uncached(handlernames):
+            "Get the objects with at least one handler not fully cached"
+            return [obj for obj in objs
+                    if any(not handler._cache_complete for handler in
+                           (getattr(obj, name, None) for name in handlernames) if handler)]
+
+        for do_prefetch, handlernames, fieldname, relname, typename, handlertype in (
+                (attributes, _ATTRIBUTE_HANDLERS, "db_attributes", "attribute",
+                 "db_attrtype", "_attrtype"),
+                (tags, _TAG_HANDLERS, "db_tags", "tag", "db_tagtype", "_tagtype")):
+            prefetch = do_prefetch and _uncached(handlernames)
+            if not prefetch:
+                continue
+            through = getattr(dbmodel, fieldname).through
+            # {(objid, attrtype/tagtype): [entity, ...]}
+            entities = defaultdict(list)
+            for ichunk in range(0, len(prefetch), _PREFETCH_CHUNK_SIZE):
+                query = {"%s__id__in" % model: [obj.id for obj in
+                                                prefetch[ichunk:ichunk + _PREFETCH_CHUNK_SIZE]],
+                         "%s__db_model__iexact" % relname: model}
+                for conn in through.objects.filter(**query).select_related(relname):
+                    entity = getattr(conn, relname)
+                    entities[(getattr(conn, objid), getattr(entity, typename))].append(entity)
+            for obj in prefetch:
+                for name in handlernames:
+                    handler = getattr(obj, name, None)
+                    if handler:
+                        handler._fullcache(entities.get((obj.id, getattr(handler, handlertype)), []))
+
+    # bulk creation methods
+
+    def bulk_insert(self, objs):
+        """
+        Save many new typeclassed objects to the database at once,
+        using a few queries rather than at least one per object.
+
+        Args:
+            objs (list): New, unsaved typeclassed objects of this
+                manager's model.
+
+        Returns:
+            objs (list): The same objects, now saved and cached.
+
+        Notes:
+            This does not send the `post_save` signal, so `at_first_save`
+            is *not* called; this is up to the caller. The objects'
+            Attribute and Tag caches are set up (empty) and their
+            `at_<fieldname>_postsave` hooks are called like for a
+            normal first save. This should be called within a transaction.
+
+        """
+        dbmodel = self.model.__dbclass__
+        objs = list(objs)
+        _bulk_insert(dbmodel, objs)
+        for obj in objs:
+            for name in _ATTRIBUTE_HANDLERS + _TAG_HANDLERS:
+                handler = getattr(obj, name, None)
+                if handler:
+                    # new objects have no Attributes or Tags yet
+                    handler._fullcache([])
+            for field in dbmodel._meta.fields:
+                hook = getattr(obj, "at_%s_postsave" % field.name, None)
+                if callable(hook):
+                    hook(True)
+        return objs
+
+    def bulk_add_attributes(self, attributes):
+        """
+        Add Attributes to many objects at once.
+
+        Args:
+            attributes (list): Tuples `(obj, key, value[, category[, lockstring]])`,
+                where `obj` is a typeclassed object of this manager's model.
+
+        Notes:
+            Attributes already existing on their object are updated with
+            one query for each distinct value; the new ones are all
+            created with a few queries. This should be called within a
+            transaction.
+
+        """
+        global _MONITOR_HANDLER
+        if not _MONITOR_HANDLER:
+            from evennia.scripts.monitorhandler import MONITOR_HANDLER as _MONITOR_HANDLER
+        dbmodel = self.model.__dbclass__
+        model = dbmodel.__name__.lower()
+        # {(objid, key, category): (obj, key, category, attr)}
+        new_attrs = OrderedDict()
+        # {attrid: (attr, dbvalue, lockstring)}
+        old_attrs = {}
+        for tup in attributes:
+            obj, key, value = tup[:3]
+            keystr = str(key).strip().lower()
+            category = tup[3] if len(tup) > 3 else None
+            category = str(category).strip().lower() if category is not None else None
+            lockstring = tup[4] if len(tup) > 4 else ""
+            attr = obj.attributes._getcache(keystr, category)
+            if attr:
+                old_attrs[attr[0].id] = (attr[0], to_pickle(value), lockstring or "")
+                continue
+            new_attrs[(obj.id, keystr, category)] = (
+                obj, keystr, category,
+                Attribute(db_key=keystr, db_category=category, db_model=model,
+                          db_attrtype=None, db_value=to_pickle(value), db_strvalue=None,
+                          db_lock_storage=lockstring or ""))
+        if old_attrs:
+            # update the existing Attributes, grouped by value
+            groups = defaultdict(list)
+            for attr, dbvalue, lockstring in old_attrs.values():
+                groups[(dbsafe_encode(dbvalue), lockstring)].append(attr)
+            for (_, lockstring), attrs in groups.items():
+                dbvalue = old_attrs[attrs[0].id][1]
+                ids = [attr.id for attr in attrs]
+                for ichunk in range(0, len(ids), _PREFETCH_CHUNK_SIZE):
+                    Attribute.objects.filter(id__in=ids[ichunk:ichunk + _PREFETCH_CHUNK_SIZE]).update(
+                        db_value=dbvalue, db_lock_storage=lockstring)
+                for attr in attrs:
+                    attr._pending_value = None
+                    attr.db_value = old_attrs[attr.id][1]
+                    attr.db_lock_storage = lockstring
+                    _MONITOR_HANDLER.at_update(attr, "db_value")
+        if not new_attrs:
+            return
+        new_attrs = list(new_attrs.values())
+        _bulk_insert(Attribute, [attr for _, _, _, attr in new_attrs])
+        through = dbmodel.db_attributes.through
+        through.objects.bulk_create([through(**{"%s_id" % model: obj.id, "attribute_id": attr.id})
+                                     for obj, _, _, attr in new_attrs])
+        for obj, keystr, category, attr in new_attrs:
+            handler = obj.attributes
+            complete = handler._cache_complete
+            handler._setcache(keystr, category, attr)
+            handler._cache_complete = complete
+
+    def bulk_add_tags(self, tags):
+        """
+        Add Tags, Aliases and Permissions to many objects at once.
+
+        Args:
+            tags (list): Tuples `(obj, key[, category[, data[, tagtype]]])`,
+                where `obj` is a typeclassed object of this manager's
+                model and `tagtype` is `None` (a Tag), `"alias"` or
+                `"permission"`.
+
+        Notes:
+            Each distinct Tag is found or created with `create_tag`,
+            after which all the objects are tagged with a few queries.
+            This should be called within a transaction.
+
+        """
+        dbmodel = self.model.__dbclass__
+        model = dbmodel.__name__.lower()
+        # {(key, category, tagtype): data}
+        tagdata = {}
+        normalized = []
+        for tup in tags:
+            obj, key = tup[:2]
+            if not key:
+                continue
+            key = key.strip().lower()
+            category = tup[2] if len(tup) > 2 else None
+            category = category.strip().lower() if category else None
+            data = tup[3] if len(tup) > 3 else None
+            tagtype = tup[4] if len(tup) > 4 else None
+            tagkey = (key, category, tagtype)
+            if data is not None or tagkey not in tagdata:
+                tagdata[tagkey] = data
+            normalized.append((obj, tagkey))
+        tagobjs = dict((tagkey, self.create_tag(key=tagkey[0], category=tagkey[1],
+                                                data=data, tagtype=tagkey[2]))
+                       for tagkey, data in tagdata.items())
+        # {(objid, tagid): (obj, tagkey, tag)}
+        new_tags = OrderedDict()
+        for obj, tagkey in normalized:
+            handler = getattr(obj, _TAG_HANDLER_NAMES[tagkey[2]])
+            if not handler._cache_complete:
+                handler._fullcache()
+            if handler._cache.get(tagkey[1], {}).get(tagkey[0]):
+                # already tagged
+                continue
+            tag = tagobjs[tagkey]
+            new_tags[(obj.id, tag.id)] = (obj, tagkey, tag)
+        if not new_tags:
+            return
+        through = dbmodel.db_tags.through
+        through.objects.bulk_create([through(**{"%s_id" % model: objid, "tag_id": tagid})
+                                     for objid, tagid in new_tags])
+        for obj, (key, category, tagtype), tag in new_tags.values():
+            handler = getattr(obj, _TAG_HANDLER_NAMES[tagtype])
+            complete = handler._cache_complete
+            handler._setcache(key, category, tag)
+            handler._cache_complete = complete
+
     def dbref(self, dbref, reqhash=True):
         """
         Determing if input is a valid dbref.
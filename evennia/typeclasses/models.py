@@ -496,6 +496,11 @@ class TypedObject(SharedMemoryModel):
         self.typeclass_path = new_typeclass.path
         self.__class__ = new_typeclass
 
+        location = getattr(self, "db_location", None)
+        if location:
+            # re-sort us into the right content-type of our location
+            location.contents_cache.add(self)
+
         if clean_attributes:
             # Clean out old attributes
             if is_iter(clean_attributes):
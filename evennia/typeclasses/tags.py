@@ -15,9 +15,12 @@ from collections import defaultdict
 from django.conf import settings
 from django.db import models
 from evennia.utils.utils import to_str, make_iter
+from evennia.locks.lockhandler import invalidate_capabilities
 
 
 _TYPECLASS_AGGRESSIVE_CACHE = settings.TYPECLASS_AGGRESSIVE_CACHE
+# marker used by the handler caches
+_EMPTY = {}
 
 #------------------------------------------------------------
 #
@@ -98,21 +101,34 @@ class TagHandler(object):
         self.obj = obj
         self._objid = obj.id
         self._model = obj.__dbclass__.__name__.lower()
+        # {category: {key: tag}}
         self._cache = {}
         # store category names fully cached
         self._catcache = {}
         # full cache was run on all tags
         self._cache_complete = False
 
-    def _fullcache(self):
-        "Cache all tags of this object"
-        query = {"%s__id" % self._model: self._objid,
-                 "tag__db_model": self._model,
-                 "tag__db_tagtype": self._tagtype}
-        tags = [conn.tag for conn in getattr(self.obj, self._m2m_fieldname).through.objects.filter(**query)]
-        self._cache = dict(("%s-%s" % (to_str(tag.db_key).lower(),
-                                       tag.db_category.lower() if tag.db_category else None),
-                            tag) for tag in tags)
+    def _fullcache(self, tags=None):
+        """
+        Cache all tags of this object.
+
+        Args:
+            tags (list, optional): All Tags of this object, if already
+                fetched from the database. This is used by
+                `TypedObjectManager.prefetch_caches`.
+
+        """
+        if tags is None:
+            query = {"%s__id" % self._model: self._objid,
+                     "tag__db_model": self._model,
+                     "tag__db_tagtype": self._tagtype}
+            tags = [conn.tag for conn in getattr(self.obj, self._m2m_fieldname).through.objects.filter(
+                **query).select_related("tag")]
+        cache = {}
+        for tag in tags:
+            category = tag.db_category.lower() if tag.db_category else None
+            cache.setdefault(category, {})[to_str(tag.db_key).lower()] = tag
+        self._cache = cache
         self._cache_complete = True
 
     def _getcache(self, key=None, category=None):
@@ -138,17 +154,26 @@ class TagHandler(object):
             database lookup.
 
         """
+        if key and _TYPECLASS_AGGRESSIVE_CACHE:
+            # fast path; the key and category are usually already normalized
+            tag = self._cache.get(category, _EMPTY).get(key)
+            if tag and tag.pk:
+                return [tag]
+
         key = key.strip().lower() if key else None
         category = category.strip().lower() if category else None
         if key:
-            cachekey = "%s-%s" % (key, category)
-            tag = _TYPECLASS_AGGRESSIVE_CACHE and self._cache.get(cachekey, None)
-            if tag and (not hasattr(tag, "pk") and tag.pk is None):
+            catcache = self._cache.get(category, _EMPTY) if _TYPECLASS_AGGRESSIVE_CACHE else _EMPTY
+            tag = catcache.get(key)
+            if tag and tag.pk is None:
                 # clear out Tags deleted from elsewhere. We must search this anew.
                 tag = None
-                del self._cache[cachekey]
+                del catcache[key]
             if tag:
                 return [tag]  # return cached entity
+            elif _TYPECLASS_AGGRESSIVE_CACHE and self._cache_complete:
+                # all tags are cached, so this one does not exist
+                return []
             else:
                 query = {"%s__id" % self._model: self._objid,
                          "tag__db_model": self._model,
@@ -158,15 +183,14 @@ class TagHandler(object):
                 conn = getattr(self.obj, self._m2m_fieldname).through.objects.filter(**query)
                 if conn:
                     tag = conn[0].tag
-                    self._cache[cachekey] = tag
+                    self._cache.setdefault(category, {})[key] = tag
                     return [tag]
         else:
             # only category given (even if it's None) - we can't
             # assume the cache to be complete unless we have queried
             # for this category before
-            catkey = "-%s" % category
-            if _TYPECLASS_AGGRESSIVE_CACHE and catkey in self._catcache:
-                return [tag for key, tag in self._cache.items() if key.endswith(catkey)]
+            if _TYPECLASS_AGGRESSIVE_CACHE and (category in self._catcache or self._cache_complete):
+                return list(self._cache.get(category, _EMPTY).values())
             else:
                 # we have to query to make this category up-date in the cache
                 query = {"%s__id" % self._model: self._objid,
@@ -175,11 +199,11 @@ class TagHandler(object):
                          "tag__db_category__iexact": category.lower() if category else None}
                 tags = [conn.tag for conn in getattr(self.obj,
                                                      self._m2m_fieldname).through.objects.filter(**query)]
+                catcache = self._cache.setdefault(category, {})
                 for tag in tags:
-                    cachekey = "%s-%s" % (tag.db_key, category)
-                    self._cache[cachekey] = tag
+                    catcache[to_str(tag.db_key).lower()] = tag
                 # mark category cache as up-to-date
-                self._catcache[catkey] = True
+                self._catcache[category] = True
                 return tags
         return []
 
@@ -196,11 +220,9 @@ class TagHandler(object):
         if not key:  # don't allow an empty key in cache
             return
         key, category = key.strip().lower(), category.strip().lower() if category else category
-        cachekey = "%s-%s" % (key, category)
-        catkey = "-%s" % category
-        self._cache[cachekey] = tag_obj
+        self._cache.setdefault(category, {})[key] = tag_obj
         # mark that the category cache is no longer up-to-date
-        self._catcache.pop(catkey, None)
+        self._catcache.pop(category, None)
         self._cache_complete = False
 
     def _delcache(self, key, category):
@@ -213,14 +235,12 @@ class TagHandler(object):
 
         """
         key, category = key.strip().lower(), category.strip().lower() if category else category
-        catkey = "-%s" % category
         if key:
-            cachekey = "%s-%s" % (key, category)
-            self._cache.pop(cachekey, None)
+            self._cache.get(category, _EMPTY).pop(key, None)
         else:
-            [self._cache.pop(key, None) for key in self._cache if key.endswith(catkey)]
+            self._cache.pop(category, None)
         # mark that the category cache is no longer up-to-date
-        self._catcache.pop(catkey, None)
+        self._catcache.pop(category, None)
         self._cache_complete = False
 
     def reset_cache(self):
@@ -341,9 +361,7 @@ class TagHandler(object):
         if category:
             query["tag__db_category"] = category.strip().lower()
         getattr(self.obj, self._m2m_fieldname).through.objects.filter(**query).delete()
-        self._cache = {}
-        self._catcache = {}
-        self._cache_complete = False
+        self.reset_cache()
 
     def all(self, return_key_and_category=False, return_objs=False):
         """
@@ -362,7 +380,7 @@ class TagHandler(object):
         """
         if not self._cache_complete:
             self._fullcache()
-        tags = sorted(self._cache.values())
+        tags = sorted(tag for catcache in self._cache.values() for tag in catcache.values())
         if return_key_and_category:
                 # return tuple (key, category)
             return [(to_str(tag.db_key), to_str(tag.db_category)) for tag in tags]
@@ -410,15 +428,41 @@ class TagHandler(object):
 
 class AliasHandler(TagHandler):
     """
-    A handler for the Alias Tag type.
+    A handler for the Alias Tag type. Changing the aliases resets
+    the search name index of the object (if it has one).
 
     """
     _tagtype = "alias"
 
+    def _setcache(self, key, category, tag_obj):
+        super(AliasHandler, self)._setcache(key, category, tag_obj)
+        self.obj._search_names = None
+
+    def _delcache(self, key, category):
+        super(AliasHandler, self)._delcache(key, category)
+        self.obj._search_names = None
+
+    def reset_cache(self):
+        super(AliasHandler, self).reset_cache()
+        self.obj._search_names = None
+
 
 class PermissionHandler(TagHandler):
     """
-    A handler for the Permission Tag type.
+    A handler for the Permission Tag type. Changing permissions
+    invalidates the cached lock capability records.
 
     """
     _tagtype = "permission"
+
+    def _setcache(self, key, category, tag_obj):
+        super(PermissionHandler, self)._setcache(key, category, tag_obj)
+        invalidate_capabilities()
+
+    def _delcache(self, key, category):
+        super(PermissionHandler, self)._delcache(key, category)
+        invalidate_capabilities()
+
+    def clear(self, category=None):
+        super(PermissionHandler, self).clear(category=category)
+        invalidate_capabilities()
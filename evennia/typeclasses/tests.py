@@ -3,6 +3,11 @@ Unit tests for typeclass base system
 
 """
 
+import threading
+from mock import patch
+from twisted.internet import task
+from twisted.python import threadable
+from evennia.utils import dbserialize
 from evennia.utils.test_resources import EvenniaTest
 
 # ------------------------------------------------------------
@@ -57,3 +62,174 @@ class TestTypedObjectManager(EvenniaTest):
         self.assertEquals(self._manager("get_by_tag", category=["category1", "category2"]),
                           [self.obj2])
         self.assertEquals(self._manager("get_by_tag", category=["category5", "category4"]), [])
+
+    def test_search_name_index(self):
+        candidates = [self.obj1, self.obj2, self.char1]
+        self.obj1.aliases.add("thing")
+        self.assertEqual(self.obj1.search_names[0], "obj")
+        self.assertTrue("thing" in self.obj1.search_names[1])
+        self.assertEqual(self._manager("get_objs_with_key_or_alias", "OBJ", candidates=candidates),
+                         [self.obj1])
+        self.assertEqual(self._manager("get_objs_with_key_or_alias", "thing", candidates=candidates),
+                         [self.obj1])
+        self.assertEqual(self._manager("get_objs_with_key_or_alias", "ob", exact=False,
+                                       candidates=candidates), [self.obj1, self.obj2])
+        self.assertEqual(self._manager("get_objs_with_key_or_alias", "thi", exact=False,
+                                       candidates=candidates), [self.obj1])
+        # the index follows changes to key and aliases
+        self.obj2.key = "Box"
+        self.obj1.aliases.remove("thing")
+        self.obj2.aliases.add("crate")
+        self.assertFalse("thing" in self.obj1.search_names[1])
+        self.assertEqual(self._manager("get_objs_with_key_or_alias", "box", candidates=candidates),
+                         [self.obj2])
+        self.assertEqual(self._manager("get_objs_with_key_or_alias", "crate", candidates=candidates),
+                         [self.obj2])
+        self.assertEqual(self._manager("get_objs_with_key_or_alias", "thing", candidates=candidates),
+                         [])
+        # search without candidates still queries the database
+        self.assertEqual(self._manager("get_objs_with_key_or_alias", "crate"), [self.obj2])
+        # deleted objects are not found among the candidates
+        self.obj2.delete()
+        self.assertEqual(self.obj2._search_names, None)
+        self.assertEqual(self._manager("get_objs_with_key_or_alias", "box", candidates=candidates),
+                         [])
+        self.assertEqual(self._manager("get_objs_with_key_or_alias", "bo", exact=False,
+                                       candidates=candidates), [])
+
+    def test_prefetch_caches(self):
+        self.obj1.db.foo = 1
+        self.obj2.tags.add("tag1", category="category1")
+        objs = [self.obj1, self.obj2]
+        for obj in objs:
+            for handler in (obj.attributes, obj.nicks, obj.tags, obj.aliases, obj.permissions):
+                handler.reset_cache()
+        with self.assertNumQueries(2):
+            self.obj1.__class__.objects.prefetch_caches(objs)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.obj1.db.foo, 1)
+            self.assertEqual(self.obj2.db.foo, None)
+            self.assertEqual(self.obj2.tags.get("tag1", category="category1"), "tag1")
+            self.assertEqual(self.obj2.tags.get(category="category1"), "tag1")
+            self.assertEqual(self.obj1.tags.get("tag1", category="category1"), None)
+            self.assertEqual(self.obj1.nicks.get("foo"), None)
+            # already cached objects are skipped
+            self.obj1.__class__.objects.prefetch_caches(objs)
+
+    def test_bulk_insert_row_by_row(self):
+        from django.db import connection
+        from evennia.objects.models import ObjectDB
+        objs = [ObjectDB(db_key="bulk%i" % num,
+                         db_typeclass_path="evennia.objects.objects.DefaultObject")
+                for num in range(3)]
+        # databases without bulk RETURNING (other than sqlite) insert one by one
+        with patch.object(connection, "vendor", "mysql"), \
+                patch.object(connection.features, "can_return_ids_from_bulk_insert", False), \
+                self.assertNumQueries(3):
+            ObjectDB.objects.bulk_insert(objs)
+        self.assertEqual(len(set(obj.id for obj in objs)), 3)
+        self.assertEqual(sorted(ObjectDB.objects.filter(id__in=[obj.id for obj in objs])
+                                .values_list("db_key", flat=True)), ["bulk0", "bulk1", "bulk2"])
+        for obj in objs:
+            obj.delete()
+
+    def test_handler_cache_categories(self):
+        self.obj1.attributes.add("foo", 1, category="stats")
+        self.obj1.attributes.add("bar", 2, category="stats")
+        self.obj1.attributes.add("foo", 3)
+        self.obj1.tags.add("tag1", category="cat1")
+        self.obj1.tags.add("tag2", category="cat1")
+        self.obj1.attributes.reset_cache()
+        self.obj1.tags.reset_cache()
+        self.assertEqual(sorted(self.obj1.attributes.get(category="STATS", return_list=True)), [1, 2])
+        with self.assertNumQueries(0):
+            self.assertEqual(sorted(self.obj1.attributes.get(category="stats", return_list=True)),
+                             [1, 2])
+            self.assertEqual(self.obj1.attributes.get("FOO ", category="Stats"), 1)
+        self.assertEqual(self.obj1.attributes.get("foo"), 3)
+        self.assertEqual(sorted(self.obj1.tags.get(category="cat1")), ["tag1", "tag2"])
+        self.obj1.tags.remove("tag1", category="cat1")
+        self.obj1.attributes.remove("bar", category="stats")
+        self.assertEqual(self.obj1.tags.get(category="cat1"), "tag2")
+        self.assertEqual(self.obj1.attributes.get(category="stats", return_list=True), [1])
+        self.assertEqual(self.obj1.attributes.get("foo"), 3)
+
+    def test_contents_cache(self):
+        cache = self.room1.contents_cache
+        self.assertEqual(cache.get(content_type="exit"), [self.exit])
+        self.assertEqual(self.room1.exits, [self.exit])
+        self.assertEqual(cache.get(content_type="character"), [self.char1, self.char2])
+        self.assertFalse(self.obj1 in cache.get(exclude=[self.obj1, self.obj2]))
+        # an object with a destination counts as an exit
+        self.obj1.destination = self.room2
+        self.assertEqual(self.room1.exits, [self.exit, self.obj1])
+        self.obj1.destination = None
+        self.assertEqual(self.room1.exits, [self.exit])
+        # a flushed instance is reloaded on its own
+        self.obj2.flush_from_cache(force=True)
+        with self.assertNumQueries(1):
+            contents = cache.get(content_type="object")
+        self.assertTrue(self.obj1 in contents)
+        self.assertEqual([obj.key for obj in contents if obj.pk == self.obj2.pk], ["Obj2"])
+        # swapping typeclass re-sorts the object
+        self.obj1.swap_typeclass("evennia.objects.objects.DefaultCharacter")
+        self.assertTrue(self.obj1 in cache.get(content_type="character"))
+        self.assertFalse(self.obj1 in cache.get(content_type="object"))
+
+
+class TestAttributeSaveCoalescing(EvenniaTest):
+
+    def test_batch(self):
+        self.obj1.db.inventory = []
+        stats = dbserialize.save_stats()
+        with self.obj1.attributes.batch():
+            with self.assertNumQueries(0):
+                for num in range(5):
+                    self.obj1.db.inventory.append(num)
+                self.assertEqual(self.obj1.db.inventory, [0, 1, 2, 3, 4])
+            self.assertEqual(dbserialize.save_stats()["pending"], 1)
+        self.assertEqual(dbserialize.save_stats(),
+                         {"writes": stats["writes"] + 1,
+                          "coalesced": stats["coalesced"] + 4,
+                          "pending": 0})
+        attr = self.obj1.attributes.get("inventory", return_obj=True)
+        self.assertEqual(attr._pending_value, None)
+        self.assertEqual(self.obj1.db.inventory, [0, 1, 2, 3, 4])
+        # replacing the value discards pending changes
+        with self.obj1.attributes.batch():
+            self.obj1.db.inventory.append(5)
+            self.obj1.db.inventory = ["new"]
+        self.assertEqual(self.obj1.db.inventory, ["new"])
+
+    def test_save_at_end_of_tick(self):
+        clock = task.Clock()
+        clock.running = True
+        self.obj1.db.stats = {"str": 1}
+        with patch.object(dbserialize, "_REACTOR", clock), \
+                patch.object(dbserialize, "_SAVE_COALESCING", True):
+            self.obj1.db.stats["str"] = 2
+            self.obj1.db.stats["dex"] = 3
+            self.assertEqual(dbserialize.save_stats()["pending"], 1)
+            clock.advance(0)
+        self.assertEqual(dbserialize.save_stats()["pending"], 0)
+        self.assertEqual(self.obj1.db.stats, {"str": 2, "dex": 3})
+
+    def test_other_threads(self):
+        self.obj1.db.inventory = []
+        inventory = self.obj1.db.inventory
+        depths = []
+        with self.obj1.attributes.batch():
+            # batches are tracked per thread
+            thread = threading.Thread(
+                target=lambda: depths.append(dbserialize._SAVE_BUFFER.batch_depth))
+            thread.start()
+            thread.join()
+            self.assertEqual(depths, [0])
+            # outside the reactor thread, changes are saved right away
+            with patch.object(threadable, "ioThread", -1):
+                inventory.append(1)
+                self.assertEqual(dbserialize.save_stats()["pending"], 0)
+            inventory.append(2)
+            self.assertEqual(dbserialize.save_stats()["pending"], 1)
+        self.assertEqual(
+            self.obj1.attributes.get("inventory", return_obj=True).db_value, [1, 2])
@@ -16,6 +16,8 @@ the ansi mapping.
 from builtins import object, range
 
 import re
+from array import array
+from bisect import bisect_right
 from collections import OrderedDict
 
 from django.conf import settings
@@ -71,12 +73,92 @@ ANSI_SPACE = " "
 # Escapes
 ANSI_ESCAPES = ("{{", "\\\\", "\|\|")
 
-_PARSE_CACHE = OrderedDict()
 _PARSE_CACHE_SIZE = 10000
 
 _COLOR_NO_DEFAULT = settings.COLOR_NO_DEFAULT
 
 
+class ParseCache(object):
+    """
+    A size-limited least-recently-used cache, used by the ANSIParser
+    to store token streams and rendered strings.
+
+    """
+
+    def __init__(self, size_limit=_PARSE_CACHE_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            size_limit (int, optional): Max number of entries to keep.
+                Least recently used entries are dropped first.
+
+        """
+        self.size_limit = max(1, size_limit)
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, key):
+        """
+        Get an entry from the cache.
+
+        Args:
+            key (tuple or str): The cache key.
+
+        Returns:
+            value (any or None): The cached value, if any.
+
+        """
+        value = self._cache.pop(key, None)
+        if value is None:
+            self.misses += 1
+        else:
+            # re-insert to mark as most recently used
+            self._cache[key] = value
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """
+        Store an entry, evicting the least recently used entries if the
+        cache is full.
+
+        Args:
+            key (tuple or str): The cache key.
+            value (any): The value to store.
+
+        """
+        cache = self._cache
+        cache[key] = value
+        while len(cache) > self.size_limit:
+            cache.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Empty the cache. The counters are not affected.
+
+        """
+        self._cache.clear()
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            stats (dict): With keys `size`, `size_limit`, `hits`,
+                `misses` and `evictions`.
+
+        """
+        return {"size": len(self._cache), "size_limit": self.size_limit,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
 class ANSIParser(object):
     """
     A class that parses ANSI markup
@@ -208,6 +290,124 @@ class ANSIParser(object):
     # instance of each
     ansi_escapes = re.compile(r"(%s)" % "|".join(ANSI_ESCAPES), re.DOTALL)
 
+    def __init__(self):
+        """
+        Prepare the tokenizer. All markup is matched by one regex, with
+        one named group per kind of markup. At the same position the
+        kinds are tried in the order they used to be substituted in.
+
+        """
+        kinds = (("escape", "|".join(ANSI_ESCAPES)),
+                 ("brightbg", "|".join(re.escape(tup[0])
+                                       for tup in self.ansi_xterm256_bright_bg_map)),
+                 ("fg", "|".join(self.xterm256_fg)),
+                 ("bg", "|".join(self.xterm256_bg)),
+                 ("gfg", "|".join(self.xterm256_gfg)),
+                 ("gbg", "|".join(self.xterm256_gbg)),
+                 ("ansi", "|".join(re.escape(tup[0]) for tup in self.ansi_map)))
+        self.tokenizer = re.compile(r"|".join("(?P<%s>%s)" % (kind, regex)
+                                              for kind, regex in kinds if regex), re.DOTALL)
+        self.xterm256_subs = {"fg": self.xterm256_fg_sub, "bg": self.xterm256_bg_sub,
+                              "gfg": self.xterm256_gfg_sub, "gbg": self.xterm256_gbg_sub}
+        # tokens for each markup string seen, as well as the token
+        # streams and rendered results of whole strings
+        self._markup_tokens = {}
+        self.token_cache = ParseCache(_PARSE_CACHE_SIZE)
+        self.parse_cache = ParseCache(_PARSE_CACHE_SIZE)
+
+    def __deepcopy__(self, memo):
+        # the parser is shared by all ANSIStrings using it, also when
+        # those are copied (the compiled tokenizer can't be copied).
+        return self
+
+    def _markup_token(self, kind, markup):
+        """
+        Create the tokens for a piece of markup.
+
+        Args:
+            kind (str): The kind of markup, as named in the tokenizer.
+            markup (str): The matched markup.
+
+        Returns:
+            tokens (tuple): The tokens. Plain text is given as a string,
+                markup as a tuple `(stripped, ansi, xterm256)` of its
+                rendering without ansi, with 16-color ansi and with
+                xterm256 colors.
+
+        """
+        if kind == "escape":
+            return (markup[0],)
+        elif kind == "brightbg":
+            return self.tokenize(self.ansi_xterm256_bright_bg_map_dict.get(markup, ""))
+        elif kind == "ansi":
+            code = self.ansi_map_dict.get(markup, "")
+            return ((self.strip_raw_codes(code), code, code),)
+        match = self.xterm256_subs[kind].match(markup)
+        code = self.sub_xterm256(match, False, kind)
+        return ((self.strip_raw_codes(code), code, self.sub_xterm256(match, True, kind)),)
+
+    def tokenize(self, string):
+        """
+        Split a string into a stream of text and markup tokens, in one
+        pass. The result is cached.
+
+        Args:
+            string (str): The string to tokenize.
+
+        Returns:
+            tokens (tuple): The tokens, as described in `_markup_token`.
+
+        """
+        tokens = self.token_cache.get(string)
+        if tokens is not None:
+            return tokens
+        markup_tokens = self._markup_tokens
+        tokens = []
+        append, extend = tokens.append, tokens.extend
+        pos = 0
+        for match in self.tokenizer.finditer(string):
+            start, end = match.span()
+            if start > pos:
+                append(string[pos:start])
+            pos = end
+            kind = match.lastgroup
+            markup = match.group()
+            if kind == "brightbg" and start and string[start - 1] == "|":
+                # an escaped bright background marker is left as-is
+                append(markup)
+                continue
+            token = markup_tokens.get(markup)
+            if token is None:
+                token = markup_tokens[markup] = self._markup_token(kind, markup)
+            extend(token)
+        if pos < len(string):
+            append(string[pos:])
+        tokens = tuple(tokens)
+        self.token_cache.set(string, tokens)
+        return tokens
+
+    def render(self, tokens, strip_ansi=False, xterm256=False):
+        """
+        Render a token stream to a string.
+
+        Args:
+            tokens (tuple): Tokens from `tokenize`.
+            strip_ansi (bool, optional): Render without any ansi codes.
+            xterm256 (bool, optional): Use xterm256 colors rather than
+                converting them to 16-color ansi.
+
+        Returns:
+            string (str): The rendered string.
+
+        """
+        index = 0 if strip_ansi else 2 if xterm256 else 1
+        string = "".join([token if token.__class__ is str else token[index]
+                          for token in tokens])
+        if strip_ansi and "\033" in string:
+            # remove ansi codes inserted manually in the string
+            string = self.strip_raw_codes(string)
+        return string
+
     def sub_ansi(self, ansimatch):
         """
         Replacer used by `re.sub` to replace ANSI
@@ -408,54 +608,17 @@ class ANSIParser(object):
         if not string:
             return ''
 
-        # check cached parsings
-        global _PARSE_CACHE
-        cachekey = "%s-%s-%s-%s" % (string, strip_ansi, xterm256, mxp)
-        if cachekey in _PARSE_CACHE:
-            return _PARSE_CACHE[cachekey]
-
-        # pre-convert bright colors to xterm256 color tags
-        string = self.brightbg_sub.sub(self.sub_brightbg, string)
+        cachekey = (string, strip_ansi, xterm256, mxp)
+        parsed_string = self.parse_cache.get(cachekey)
+        if parsed_string is not None:
+            return parsed_string
 
-        def do_xterm256_fg(part):
-            return self.sub_xterm256(part, xterm256, "fg")
-
-        def do_xterm256_bg(part):
-            return self.sub_xterm256(part, xterm256, "bg")
-
-        def do_xterm256_gfg(part):
-            return self.sub_xterm256(part, xterm256, "gfg")
-
-        def do_xterm256_gbg(part):
-            return self.sub_xterm256(part, xterm256, "gbg")
-
-        in_string = utils.to_str(string)
-
-        # do string replacement
-        parsed_string = []
-        parts = self.ansi_escapes.split(in_string) + [" "]
-        for part, sep in zip(parts[::2], parts[1::2]):
-            pstring = self.xterm256_fg_sub.sub(do_xterm256_fg, part)
-            pstring = self.xterm256_bg_sub.sub(do_xterm256_bg, pstring)
-            pstring = self.xterm256_gfg_sub.sub(do_xterm256_gfg, pstring)
-            pstring = self.xterm256_gbg_sub.sub(do_xterm256_gbg, pstring)
-            pstring = self.ansi_sub.sub(self.sub_ansi, pstring)
-            parsed_string.append("%s%s" % (pstring, sep[0].strip()))
-        parsed_string = "".join(parsed_string)
-
-        if not mxp:
+        parsed_string = self.render(self.tokenize(utils.to_str(string)),
+                                    strip_ansi=strip_ansi, xterm256=xterm256)
+        if not mxp and "|lc" in parsed_string:
             parsed_string = self.strip_mxp(parsed_string)
 
-        if strip_ansi:
-            # remove all ansi codes (including those manually
-            # inserted in string)
-            return self.strip_raw_codes(parsed_string)
-
-        # cache and crop old cache
-        _PARSE_CACHE[cachekey] = parsed_string
-        if len(_PARSE_CACHE) > _PARSE_CACHE_SIZE:
-            _PARSE_CACHE.popitem(last=False)
-
+        self.parse_cache.set(cachekey, parsed_string)
         return parsed_string
 
 
@@ -596,21 +759,55 @@ def _transform(func_name):
 
     def wrapped(self, *args, **kwargs):
         replacement_string = _query_super(func_name)(self, *args, **kwargs)
+        raw_string, code_runs = self._raw_string, self._code_runs
         to_string = []
-        char_counter = 0
-        for index in range(0, len(self._raw_string)):
-            if index in self._code_indexes:
-                to_string.append(self._raw_string[index])
-            elif index in self._char_indexes:
-                to_string.append(replacement_string[char_counter])
-                char_counter += 1
+        raw_pos, clean_pos = 0, 0
+        for irun in range(0, len(code_runs), 2):
+            start, end = code_runs[irun], code_runs[irun + 1]
+            to_string.append(replacement_string[clean_pos:clean_pos + start - raw_pos])
+            to_string.append(raw_string[start:end])
+            clean_pos += start - raw_pos
+            raw_pos = end
+        to_string.append(replacement_string[clean_pos:])
         return ANSIString(
             ''.join(to_string), decoded=True,
-            code_indexes=self._code_indexes, char_indexes=self._char_indexes,
-            clean_string=replacement_string)
+            code_runs=code_runs, clean_string=replacement_string)
     return wrapped
 
 
+def _make_runs(spans):
+    """
+    Build the run-length table of an ANSIString's ANSI codes.
+
+    Args:
+        spans (iterable): `(start, end)` index pairs of the codes in
+            the raw string, in order.
+
+    Returns:
+        code_runs (array): Flat array of `start, end` pairs, with empty
+            spans dropped and adjacent spans merged.
+
+    """
+    code_runs = array("l")
+    for start, end in spans:
+        if start == end:
+            continue
+        if code_runs and code_runs[-1] == start:
+            code_runs[-1] = end
+        else:
+            code_runs.extend((start, end))
+    return code_runs
+
+
+def _iter_runs(code_runs, offset=0):
+    """
+    Iterate over the spans of a run-length table, shifted by an offset.
+
+    """
+    for irun in range(0, len(code_runs), 2):
+        yield code_runs[irun] + offset, code_runs[irun + 1] + offset
+
+
 class ANSIMeta(type):
     """
     Many functions on ANSIString are just light wrappers around the unicode
@@ -668,9 +865,11 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
         string to be handled as already decoded. It is important not to double
         decode strings, as escapes can only be respected once.
 
-        Internally, ANSIString can also passes itself precached code/character
-        indexes and clean strings to avoid doing extra work when combining
-        ANSIStrings.
+        Internally, ANSIString can also passes itself precached code runs
+        and clean strings to avoid doing extra work when combining
+        ANSIStrings. For backwards compatibility, a list of `code_indexes`
+        (and `char_indexes`, which are implied by those) can be given
+        instead of the code runs.
 
         """
         string = args[0]
@@ -678,15 +877,17 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
             string = to_str(string, force_string=True)
         parser = kwargs.get('parser', ANSI_PARSER)
         decoded = kwargs.get('decoded', False) or hasattr(string, '_raw_string')
+        code_runs = kwargs.pop('code_runs', None)
         code_indexes = kwargs.pop('code_indexes', None)
-        char_indexes = kwargs.pop('char_indexes', None)
+        kwargs.pop('char_indexes', None)
         clean_string = kwargs.pop('clean_string', None)
-        # All True, or All False, not just one.
-        checks = [x is None for x in [code_indexes, char_indexes, clean_string]]
-        if not len(set(checks)) == 1:
-            raise ValueError("You must specify code_indexes, char_indexes, "
+        if code_indexes is not None:
+            code_runs = _make_runs((index, index + 1) for index in code_indexes)
+        # Both or neither, not just one.
+        if (code_runs is None) != (clean_string is None):
+            raise ValueError("You must specify code_runs (or code_indexes) "
                              "and clean_string together, or not at all.")
-        if not all(checks):
+        if code_runs is not None:
             decoded = True
         if not decoded:
             # Completely new ANSI String
@@ -698,8 +899,7 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
         elif hasattr(string, '_clean_string'):
             # It's already an ANSIString
             clean_string = string._clean_string
-            code_indexes = string._code_indexes
-            char_indexes = string._char_indexes
+            code_runs = string._code_runs
             string = string._raw_string
         else:
             # It's a string that has been pre-ansi decoded.
@@ -711,8 +911,8 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
         ansi_string = super(ANSIString, cls).__new__(ANSIString, to_str(clean_string), "utf-8")
         ansi_string._raw_string = string
         ansi_string._clean_string = clean_string
-        ansi_string._code_indexes = code_indexes
-        ansi_string._char_indexes = char_indexes
+        ansi_string._code_runs = code_runs
+        ansi_string._run_table = None
         return ansi_string
 
     def __str__(self):
@@ -758,24 +958,95 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
         The third thing to set is the _clean_string. This is a unicode object
         that is devoid of all ANSI Escapes.
 
-        Finally, _code_indexes and _char_indexes are defined. These are lookup
-        tables for which characters in the raw string are related to ANSI
-        escapes, and which are for the readable text.
+        Finally, _code_runs is defined. This is a run-length table of
+        where the ANSI escapes are in the raw string, stored as a flat
+        array of `start, end` index pairs. Everything outside those runs
+        is readable text. The table is never changed once made, so
+        strings derived from this one can share it.
 
         """
         self.parser = kwargs.pop('parser', ANSI_PARSER)
         super(ANSIString, self).__init__()
-        if self._code_indexes is None:
-            self._code_indexes, self._char_indexes = self._get_indexes()
+        if self._code_runs is None:
+            self._code_runs = self._get_runs()
+
+    @property
+    def _code_indexes(self):
+        """
+        The indexes in the raw string that are part of ANSI escapes,
+        as a list. This is expanded from the code runs on every call.
+
+        """
+        return [index for start, end in _iter_runs(self._code_runs)
+                for index in range(start, end)]
+
+    @property
+    def _char_indexes(self):
+        """
+        The indexes in the raw string of the readable characters, as a
+        list. This is expanded from the code runs on every call.
+
+        """
+        return [self._raw_index(index) for index in range(len(self._clean_string))]
+
+    def _get_run_table(self):
+        """
+        Get the lookup table mapping the readable characters to the raw
+        string. It is made when first needed.
+
+        Returns:
+            run_table (tuple): `(clean_starts, coded)`, where
+                `clean_starts` holds the clean-string position each code
+                run sits in front of, and `coded[i]` is the total length
+                of the first `i` code runs.
+
+        """
+        if self._run_table is None:
+            clean_starts, coded = array("l"), array("l", [0])
+            total = 0
+            for start, end in _iter_runs(self._code_runs):
+                clean_starts.append(start - total)
+                total += end - start
+                coded.append(total)
+            self._run_table = (clean_starts, coded)
+        return self._run_table
+
+    def _raw_index(self, index):
+        """
+        Get the raw-string index of a readable character.
+
+        Args:
+            index (int): The (non-negative) index in the clean string.
+
+        Returns:
+            raw_index (int): The index in the raw string.
 
-    @staticmethod
-    def _shifter(iterable, offset):
         """
-        Takes a list of integers, and produces a new one incrementing all
-        by a number.
+        clean_starts, coded = self._get_run_table()
+        return index + coded[bisect_right(clean_starts, index)]
 
+    def _codes_around(self, index):
         """
-        return [i + offset for i in iterable]
+        Get the ANSI escapes surrounding a readable character.
+
+        Args:
+            index (int): The (non-negative) index in the clean string.
+
+        Returns:
+            codes (tuple): `(prefix, suffix, irun)`, where `prefix` are
+                all the escapes before the character, `suffix` the
+                escapes directly following it and `irun` the number of
+                code runs before it.
+
+        """
+        clean_starts, coded = self._get_run_table()
+        irun = bisect_right(clean_starts, index)
+        raw_string, code_runs = self._raw_string, self._code_runs
+        prefix = ''.join(raw_string[start:end] for start, end in _iter_runs(code_runs[:2 * irun]))
+        suffix = ''
+        if irun < len(clean_starts) and clean_starts[irun] == index + 1:
+            suffix = raw_string[code_runs[2 * irun]:code_runs[2 * irun + 1]]
+        return prefix, suffix, irun
 
     @classmethod
     def _adder(cls, first, second):
@@ -786,14 +1057,21 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
 
         raw_string = first._raw_string + second._raw_string
         clean_string = first._clean_string + second._clean_string
-        code_indexes = first._code_indexes[:]
-        char_indexes = first._char_indexes[:]
-        code_indexes.extend(
-            cls._shifter(second._code_indexes, len(first._raw_string)))
-        char_indexes.extend(
-            cls._shifter(second._char_indexes, len(first._raw_string)))
-        return ANSIString(raw_string, code_indexes=code_indexes,
-                          char_indexes=char_indexes,
+        if not second._code_runs:
+            code_runs = first._code_runs
+        elif not first._code_runs and not first._raw_string:
+            code_runs = second._code_runs
+        else:
+            code_runs = array("l", first._code_runs)
+            second_runs = _iter_runs(second._code_runs, len(first._raw_string))
+            start, end = next(second_runs)
+            if code_runs and code_runs[-1] == start:
+                code_runs[-1] = end
+            else:
+                code_runs.extend((start, end))
+            for start, end in second_runs:
+                code_runs.extend((start, end))
+        return ANSIString(raw_string, code_runs=code_runs,
                           clean_string=clean_string)
 
     def __add__(self, other):
@@ -838,38 +1116,45 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
         the ANSI Escapes that have played before the start of the slice, we
         must also replay any in these intervals, should they exist.
 
-        Thankfully, slicing the _char_indexes table gives us the actual
-        indexes that need slicing in the raw string. We can check between
-        those indexes to figure out what escape characters need to be
-        replayed.
+        A contiguous slice keeps all escapes before its first character
+        and directly after its last one, and takes the code runs in
+        between from this string's run table without re-parsing.
+        Indexing is the same as slicing out a single character.
 
         """
-        slice_indexes = self._char_indexes[slc]
-        # If it's the end of the string, we need to append final color codes.
-        if not slice_indexes:
-            return ANSIString('')
-        try:
-            string = self[slc.start]._raw_string
-        except IndexError:
+        clean_string = self._clean_string
+        indexes = range(*slc.indices(len(clean_string)))
+        if not indexes:
             return ANSIString('')
-        last_mark = slice_indexes[0]
-        # Check between the slice intervals for escape sequences.
-        i = None
-        for i in slice_indexes[1:]:
-            for index in range(last_mark, i):
-                if index in self._code_indexes:
-                    string += self._raw_string[index]
-            last_mark = i
-            try:
-                string += self._raw_string[i]
-            except IndexError:
-                # raw_string not long enough
-                pass
-        if i is not None:
-            append_tail = self._get_interleving(self._char_indexes.index(i) + 1)
-        else:
-            append_tail = ''
-        return ANSIString(string + append_tail, decoded=True)
+        raw_string = self._raw_string
+        first, last = indexes[0], indexes[-1]
+        prefix, _, ifirst = self._codes_around(first)
+        _, suffix, ilast = self._codes_around(last)
+        if len(indexes) == 1 and last < len(clean_string) - 1:
+            # a single character only gets the escapes following it
+            # if it's the last one, like when indexing
+            suffix = ''
+        raw_first, raw_last = self._raw_index(first), self._raw_index(last)
+        if slc.step in (None, 1):
+            offset = len(prefix) - raw_first
+            code_runs = [(0, len(prefix))]
+            code_runs.extend(_iter_runs(self._code_runs[2 * ifirst:2 * ilast], offset))
+            code_runs.append((raw_last + 1 + offset, raw_last + 1 + offset + len(suffix)))
+            return ANSIString(prefix + raw_string[raw_first:raw_last + 1] + suffix,
+                              code_runs=_make_runs(code_runs),
+                              clean_string=clean_string[first:last + 1])
+        # an interval; replay the escapes between the picked characters
+        string = [prefix, raw_string[raw_first]]
+        last_mark = raw_first
+        for index in indexes[1:]:
+            raw_index = self._raw_index(index)
+            for start, end in _iter_runs(self._code_runs):
+                if last_mark < start and end <= raw_index:
+                    string.append(raw_string[start:end])
+            string.append(raw_string[raw_index])
+            last_mark = raw_index
+        string.append(suffix)
+        return ANSIString(''.join(string), decoded=True)
 
     def __getitem__(self, item):
         """
@@ -882,25 +1167,14 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
         if isinstance(item, slice):
             # Slices must be handled specially.
             return self._slice(item)
-        try:
-            self._char_indexes[item]
-        except IndexError:
+        length = len(self._clean_string)
+        if item < 0:
+            item += length
+        if not 0 <= item < length:
             raise IndexError("ANSIString Index out of range")
-        # Get character codes after the index as well.
-        if self._char_indexes[-1] == self._char_indexes[item]:
-            append_tail = self._get_interleving(item + 1)
-        else:
-            append_tail = ''
-        item = self._char_indexes[item]
-
-        clean = self._raw_string[item]
-        result = ''
         # Get the character they're after, and replay all escape sequences
-        # previous to it.
-        for index in range(0, item + 1):
-            if index in self._code_indexes:
-                result += self._raw_string[index]
-        return ANSIString(result + clean + append_tail, decoded=True)
+        # previous to it (as well as those after it, if it's the last one).
+        return self._slice(slice(item, item + 1))
 
     def clean(self):
         """
@@ -955,55 +1229,17 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
             current_index += len(section)
         return result
 
-    def _get_indexes(self):
+    def _get_runs(self):
         """
-        Two tables need to be made, one which contains the indexes of all
-        readable characters, and one which contains the indexes of all ANSI
-        escapes. It's important to remember that ANSI escapes require more
-        that one character at a time, though no readable character needs more
-        than one character, since the unicode base class abstracts that away
-        from us. However, several readable characters can be placed in a row.
+        Make the run-length table of the ANSI escapes in the raw string.
+        ANSI escapes require more than one character at a time, and
+        often several escapes follow each other; each such stretch is
+        stored as a single `start, end` run. Everything else in the raw
+        string is readable text.
 
-        We must use regexes here to figure out where all the escape sequences
-        are hiding in the string. Then we use the ranges of their starts and
-        ends to create a final, comprehensive list of all indexes which are
-        dedicated to code, and all dedicated to text.
-
-        It's possible that only one of these tables is actually needed, the
-        other assumed to be what isn't in the first.
-
-        """
-
-        code_indexes = []
-        for match in self.parser.ansi_regex.finditer(self._raw_string):
-            code_indexes.extend(range(match.start(), match.end()))
-        if not code_indexes:
-            # Plain string, no ANSI codes.
-            return code_indexes, list(range(0, len(self._raw_string)))
-        # all indexes not occupied by ansi codes are normal characters
-        char_indexes = [i for i in range(len(self._raw_string)) if i not in code_indexes]
-        return code_indexes, char_indexes
-
-    def _get_interleving(self, index):
         """
-        Get the code characters from the given slice end to the next
-        character.
-
-        """
-        try:
-            index = self._char_indexes[index - 1]
-        except IndexError:
-            return ''
-        s = ''
-        while True:
-            index += 1
-            if index in self._char_indexes:
-                break
-            elif index in self._code_indexes:
-                s += self._raw_string[index]
-            else:
-                break
-        return s
+        return _make_runs(match.span() for match in
+                          self.parser.ansi_regex.finditer(self._raw_string))
 
     def __mul__(self, other):
         """
@@ -1014,16 +1250,10 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
             return NotImplemented
         raw_string = self._raw_string * other
         clean_string = self._clean_string * other
-        code_indexes = self._code_indexes[:]
-        char_indexes = self._char_indexes[:]
-        for i in range(1, other + 1):
-            code_indexes.extend(
-                self._shifter(self._code_indexes, i * len(self._raw_string)))
-            char_indexes.extend(
-                self._shifter(self._char_indexes, i * len(self._raw_string)))
-        return ANSIString(
-            raw_string, code_indexes=code_indexes, char_indexes=char_indexes,
-            clean_string=clean_string)
+        length = len(self._raw_string)
+        code_runs = _make_runs(span for i in range(other)
+                               for span in _iter_runs(self._code_runs, i * length))
+        return ANSIString(raw_string, code_runs=code_runs, clean_string=clean_string)
 
     def __rmul__(self, other):
         return self.__mul__(other)
@@ -1271,25 +1501,15 @@ class ANSIString(with_metaclass(ANSIMeta, unicode)):
         """
         if not isinstance(char, ANSIString):
             line = char * amount
-            return ANSIString(
-                char * amount, code_indexes=[], char_indexes=list(range(0, len(line))),
-                clean_string=char)
-        try:
-            start = char._code_indexes[0]
-        except IndexError:
-            start = None
-        end = char._char_indexes[0]
-        prefix = char._raw_string[start:end]
+            return ANSIString(line, code_runs=array("l"), clean_string=line)
+        end = char._raw_index(0)
+        prefix = char._raw_string[:end]
         postfix = char._raw_string[end + 1:]
         line = char._clean_string * amount
-        code_indexes = [i for i in range(0, len(prefix))]
         length = len(prefix) + len(line)
-        code_indexes.extend([i for i in range(length, length + len(postfix))])
-        char_indexes = self._shifter(range(0, len(line)), len(prefix))
+        code_runs = _make_runs(((0, len(prefix)), (length, length + len(postfix))))
         raw_string = prefix + line + postfix
-        return ANSIString(
-            raw_string, clean_string=line, char_indexes=char_indexes,
-            code_indexes=code_indexes)
+        return ANSIString(raw_string, clean_string=line, code_runs=code_runs)
 
     # The following methods should not be called with the '_difference' argument explicitly. This is
     # data provided by the wrapper _spacing_preflight.
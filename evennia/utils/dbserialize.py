@@ -20,20 +20,24 @@ be out of sync with the database.
 """
 from builtins import object, int
 
+import threading
 from functools import update_wrapper
+from contextlib import contextmanager
 from collections import defaultdict, MutableSequence, MutableSet, MutableMapping
 from collections import OrderedDict, deque
 try:
     from cPickle import dumps, loads
 except ImportError:
     from pickle import dumps, loads
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.contenttypes.models import ContentType
+from twisted.python import threadable
 from evennia.utils.utils import to_str, uses_database, is_iter
 from evennia.utils import logger
 
 __all__ = ("to_pickle", "from_pickle", "do_pickle", "do_unpickle",
-           "dbserialize", "dbunserialize")
+           "dbserialize", "dbunserialize", "batch_saves", "flush_saves", "save_stats")
 
 PICKLE_PROTOCOL = 2
 
@@ -69,6 +73,8 @@ _FROM_MODEL_MAP = None
 _TO_MODEL_MAP = None
 _IGNORE_DATETIME_MODELS = None
 _SESSION_HANDLER = None
+_REACTOR = None
+_SAVE_COALESCING = settings.ATTRIBUTE_SAVE_COALESCING
 
 
 def _IS_PACKED_DBOBJ(o):
@@ -127,6 +133,167 @@ def _init_globals():
         from evennia.server.sessionhandler import SESSION_HANDLER as _SESSION_HANDLER
 
 
+#
+# Write-coalescing of changes to mutable Attribute values
+#
+
+
+class _SaveBuffer(object):
+    """
+    Collects Attributes whose mutable values were changed in-place, so
+    that many changes can be written to the database with one save.
+
+    While an Attribute is buffered, its pending (not yet saved) value
+    is stored on it as `_pending_value` and is what is returned when
+    reading the Attribute's value. Assigning a new value to the
+    Attribute clears the pending one.
+
+    Only changes made in the reactor thread are buffered. Changes made
+    in other threads (like by the webserver's threadpool) are saved
+    right away.
+
+    """
+
+    def __init__(self):
+        # {attribute: root_saver_mutable}, in order of first change
+        self.pending = OrderedDict()
+        # the batch depth is tracked per thread
+        self._local = threading.local()
+        self.flush_call = None
+        # statistics
+        self.writes = 0
+        self.coalesced = 0
+
+    @property
+    def batch_depth(self):
+        "The number of batches currently open in this thread."
+        return getattr(self._local, "batch_depth", 0)
+
+    @batch_depth.setter
+    def batch_depth(self, value):
+        self._local.batch_depth = value
+
+    def in_io_thread(self):
+        """
+        Check if we run in the reactor thread. Before the reactor has
+        started there are no other threads to worry about.
+
+        Returns:
+            io_thread (bool): If the buffer may be used from this thread.
+
+        """
+        return threadable.ioThread is None or threadable.isInIOThread()
+
+    def active(self):
+        """
+        Check if changes should currently be buffered.
+
+        Returns:
+            active (bool): If we are in the reactor thread and either in
+                a batch, or the save-coalescing mode is on and the
+                server reactor is running.
+
+        """
+        global _REACTOR
+        if not self.in_io_thread():
+            return False
+        if self.batch_depth:
+            return True
+        if not _SAVE_COALESCING:
+            return False
+        if not _REACTOR:
+            from twisted.internet import reactor as _REACTOR
+        return _REACTOR.running
+
+    def add(self, attr, root):
+        """
+        Mark an Attribute as changed.
+
+        Args:
+            attr (Attribute): The Attribute to save.
+            root (_SaverMutable): The new value of the Attribute.
+
+        """
+        if attr in self.pending:
+            self.coalesced += 1
+        self.pending[attr] = root
+        attr._pending_value = root
+        if not self.batch_depth and not self.flush_call:
+            # save at the end of this reactor tick
+            self.flush_call = _REACTOR.callLater(0, self.flush)
+
+    def flush(self):
+        """
+        Save all pending Attributes to the database.
+
+        """
+        if self.flush_call and self.flush_call.active():
+            self.flush_call.cancel()
+        self.flush_call = None
+        while self.pending:
+            attr, root = self.pending.popitem(last=False)
+            if attr._pending_value is not root or not attr.pk:
+                # the value was replaced or the Attribute deleted since
+                continue
+            try:
+                self.writes += 1
+                attr.value = root
+            except Exception:
+                logger.log_trace()
+
+
+_SAVE_BUFFER = _SaveBuffer()
+
+
+@contextmanager
+def batch_saves():
+    """
+    Context manager for buffering all in-place changes to mutable
+    Attribute values, saving every changed Attribute only once when
+    the outermost batch ends.
+
+    Examples:
+        ```python
+        with batch_saves():
+            for item in items:
+                obj.db.inventory.append(item)
+        ```
+
+    """
+    _SAVE_BUFFER.batch_depth += 1
+    try:
+        yield
+    finally:
+        _SAVE_BUFFER.batch_depth -= 1
+        if not _SAVE_BUFFER.batch_depth and _SAVE_BUFFER.in_io_thread():
+            _SAVE_BUFFER.flush()
+
+
+def flush_saves():
+    """
+    Save all buffered changes to Attributes to the database right away
+    (unless inside a batch, which will be saved when it ends).
+
+    """
+    if _SAVE_BUFFER.pending and not _SAVE_BUFFER.batch_depth and _SAVE_BUFFER.in_io_thread():
+        _SAVE_BUFFER.flush()
+
+
+def save_stats():
+    """
+    Get statistics for the saving of mutable Attribute values.
+
+    Returns:
+        stats (dict): With keys `writes` (database saves of changed
+            mutables), `coalesced` (changes that did not need a save
+            of their own) and `pending` (Attributes awaiting a save).
+
+    """
+    return {"writes": _SAVE_BUFFER.writes,
+            "coalesced": _SAVE_BUFFER.coalesced,
+            "pending": len(_SAVE_BUFFER.pending)}
+
+
 #
 # SaverList, SaverDict, SaverSet - Attribute-specific helper classes and functions
 #
@@ -174,7 +341,11 @@ class _SaverMutable(object):
                     non_saver_name = cls_name
                 raise ValueError(_ERROR_DELETED_ATTR.format(cls_name=cls_name, obj=self,
                                                             non_saver_name=non_saver_name))
-            self._db_obj.value = self
+            if _SAVE_BUFFER.active():
+                _SAVE_BUFFER.add(self._db_obj, self)
+            else:
+                _SAVE_BUFFER.writes += 1
+                self._db_obj.value = self
         else:
             logger.log_err("_SaverMutable %s has no root Attribute to save to." % self)
 
@@ -26,6 +26,7 @@ from evennia.utils.utils import dbref, get_evennia_pids, to_str
 from .manager import SharedMemoryManager
 
 AUTO_FLUSH_MIN_INTERVAL = 60.0 * 5  # at least 5 mins between cache flushes
+FLUSH_CHUNK_SIZE = 1000  # max instances checked per step of a gradual flush
 
 _GA = object.__getattribute__
 _SA = object.__setattr__
@@ -448,13 +449,17 @@ class WeakSharedMemoryModel(with_metaclass(WeakSharedMemoryModelBase, SharedMemo
         abstract = True
 
 
-def flush_cache(**kwargs):
+def iter_flush_cache(chunk_size=FLUSH_CHUNK_SIZE):
     """
-    Flush idmapper cache. When doing so the cache will fire the
-    at_idmapper_flush hook to allow the object to optionally handle
-    its own flushing.
+    Flush the idmapper cache gradually, yielding the database model
+    being flushed after every `chunk_size` cached instances checked.
+    Instances flushed or re-cached between the steps are left alone,
+    and instances whose `at_idmapper_flush` hook returns `False` stay
+    in the cache.
 
-    Uses a signal so we make sure to catch cascades.
+    Args:
+        chunk_size (int, optional): Max number of instances to check
+            between each yield.
 
     """
     def class_hierarchy(clslist):
@@ -467,8 +472,34 @@ def flush_cache(**kwargs):
             else:
                 yield cls
 
+    # all typeclasses of a database model share its cache
+    dbclasses = []
     for cls in class_hierarchy([SharedMemoryModel]):
-        cls.flush_instance_cache()
+        if cls.__dbclass__ not in dbclasses:
+            dbclasses.append(cls.__dbclass__)
+
+    for dbclass in dbclasses:
+        cache = dbclass.__instance_cache__
+        items = listitems(cache)
+        for ichunk in range(0, len(items), chunk_size):
+            for key, obj in items[ichunk:ichunk + chunk_size]:
+                # the instance may have been flushed or replaced meanwhile
+                if cache.get(key) is obj and obj.at_idmapper_flush():
+                    del cache[key]
+            yield dbclass
+
+
+def flush_cache(**kwargs):
+    """
+    Flush idmapper cache. When doing so the cache will fire the
+    at_idmapper_flush hook to allow the object to optionally handle
+    its own flushing.
+
+    Uses a signal so we make sure to catch cascades.
+
+    """
+    for _ in iter_flush_cache():
+        pass
     # run the python garbage collector
     return gc.collect()
 
@@ -522,6 +553,42 @@ def conditional_flush(max_rmem, force=False):
         force (bool, optional): forces a flush, regardless of timeout.
             Defaults to `False`.
 
+    """
+    global LAST_FLUSH
+    if _flush_needed(max_rmem, force):
+        flush_cache()
+        LAST_FLUSH = time.time()
+
+
+def iter_conditional_flush(max_rmem, force=False):
+    """
+    Like `conditional_flush`, but as a generator flushing a bounded
+    number of instances per step, see `iter_flush_cache`. Unlike
+    `conditional_flush` this does not force a full garbage collection
+    afterwards, since that can't be split up; the memory is instead
+    freed by Python's automatic garbage collection.
+
+    Args:
+        max_rmem (int): memory-usage estimation-treshold after which
+            cache is flushed.
+        force (bool, optional): forces a flush, regardless of timeout.
+            Defaults to `False`.
+
+    """
+    global LAST_FLUSH
+    if _flush_needed(max_rmem, force):
+        for cls in iter_flush_cache():
+            yield cls
+        LAST_FLUSH = time.time()
+
+
+def _flush_needed(max_rmem, force=False):
+    """
+    Check if the idmapper cache should be flushed, see `conditional_flush`.
+
+    Returns:
+        flush (bool): If the cache should be flushed now.
+
     """
     global LAST_FLUSH
 
@@ -545,34 +612,32 @@ def conditional_flush(max_rmem, force=False):
 
     if not max_rmem:
         # auto-flush is disabled
-        return
+        return False
 
     now = time.time()
     if not LAST_FLUSH:
         # server is just starting
         LAST_FLUSH = now
-        return
+        return False
 
     if ((now - LAST_FLUSH) < AUTO_FLUSH_MIN_INTERVAL) and not force:
         # too soon after last flush.
         logger.log_warn("Warning: Idmapper flush called more than "
                         "once in %s min interval. Check memory usage." % (AUTO_FLUSH_MIN_INTERVAL / 60.0))
-        return
+        return False
 
     if os.name == "nt":
         # we can't look for mem info in Windows at the moment
-        return
+        return False
 
     # check actual memory usage
     Ncache_max = mem2cachesize(max_rmem)
     Ncache, _ = cache_size()
     actual_rmem = float(os.popen('ps -p %d -o %s | tail -1' % (os.getpid(), "rss")).read()) / 1000.0  # resident memory
 
-    if Ncache >= Ncache_max and actual_rmem > max_rmem * 0.9:
-        # flush cache when number of objects in cache is big enough and our
-        # actual memory use is within 10% of our set max
-        flush_cache()
-        LAST_FLUSH = now
+    # flush cache when number of objects in cache is big enough and our
+    # actual memory use is within 10% of our set max
+    return Ncache >= Ncache_max and actual_rmem > max_rmem * 0.9
 
 
 def cache_size(mb=True):
@@ -3,7 +3,7 @@ from builtins import range
 
 from django.test import TestCase
 
-from .models import SharedMemoryModel
+from .models import SharedMemoryModel, iter_flush_cache
 from django.db import models
 
 
@@ -75,3 +75,11 @@ class SharedMemorysTest(TestCase):
         pk = article.pk
         article.delete()
         self.assertEquals(pk not in Article.__instance_cache__, True)
+
+    def testIterFlushCache(self):
+        list(Article.objects.all())
+        self.assertEqual(len(Article.__instance_cache__), 10)
+        steps = [cls for cls in iter_flush_cache(chunk_size=3) if cls is Article]
+        # one step per chunk of instances
+        self.assertEqual(len(steps), 4)
+        self.assertEqual(len(Article.__instance_cache__), 0)
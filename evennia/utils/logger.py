@@ -6,7 +6,8 @@ are all directed either to stdout (if Evennia is running in
 interactive mode) or to $GAME_DIR/server/logs.
 
 The log_file() function uses its own threading system to log to
-arbitrary files in $GAME_DIR/server/logs.
+arbitrary files in $GAME_DIR/server/logs. Lines are buffered and
+written in batches, use flush_log_files() to write them right away.
 
 Note: All logging functions have two aliases, log_type() and
 log_typemsg(). This is for historical, back-compatible reasons.
@@ -17,6 +18,7 @@ from __future__ import division
 
 import os
 import time
+import threading
 from datetime import datetime
 from traceback import format_exc
 from twisted.python import log, logfile
@@ -28,6 +30,10 @@ _LOGDIR = None
 _LOG_ROTATE_SIZE = None
 _TIMEZONE = None
 _CHANNEL_LOG_NUM_TAIL_LINES = None
+_LOG_FILE_BATCH_SIZE = None
+_LOG_FILE_BATCH_INTERVAL = None
+_LOG_FILE_MAX_QUEUE = None
+_REACTOR = None
 
 
 # logging overrides
@@ -372,6 +378,183 @@ def _open_log_file(filename):
     return None
 
 
+class _LogWriter(object):
+    """
+    Buffers the lines given to `log_file` in a queue per file and
+    writes them to disk in batches from a worker thread, with one
+    flush per batch. A file's queue is written when it reaches
+    `settings.LOG_FILE_BATCH_SIZE` lines or when
+    `settings.LOG_FILE_BATCH_INTERVAL` seconds have passed. Only one
+    worker writes to a given file at a time, so lines are always
+    written in the order they were logged. Log rotation happens as
+    part of the write.
+
+    If more than `settings.LOG_FILE_MAX_QUEUE` lines are waiting, all
+    queues are written synchronously, stalling the server until the
+    writer has caught up.
+
+    """
+
+    def __init__(self):
+        # {filename: [lines]}
+        self.queues = {}
+        # protects the queues, since workers pop from them
+        self.lock = threading.Lock()
+        # {filename: lock}, held while writing to a file
+        self.file_locks = {}
+        # files currently being written by a worker thread
+        self.writing = set()
+        self.flush_call = None
+        self.pending = 0
+        # statistics
+        self.batches = 0
+        self.lines = 0
+        self.stalls = 0
+        self.max_pending = 0
+
+    def add(self, filename, line):
+        """
+        Queue a line for writing.
+
+        Args:
+            filename (str): The log file, relative to the log dir.
+            line (str): The formatted line to write.
+
+        """
+        global _LOG_FILE_BATCH_SIZE, _LOG_FILE_BATCH_INTERVAL, _LOG_FILE_MAX_QUEUE, _REACTOR
+        if _LOG_FILE_BATCH_SIZE is None:
+            from django.conf import settings
+            _LOG_FILE_BATCH_SIZE = settings.LOG_FILE_BATCH_SIZE
+            _LOG_FILE_BATCH_INTERVAL = settings.LOG_FILE_BATCH_INTERVAL
+            _LOG_FILE_MAX_QUEUE = settings.LOG_FILE_MAX_QUEUE
+        if not _REACTOR:
+            from twisted.internet import reactor as _REACTOR
+
+        with self.lock:
+            queue = self.queues.setdefault(filename, [])
+            queue.append(line)
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+            nqueued = len(queue)
+
+        if not _REACTOR.running:
+            # no worker threads to write in the background
+            self.drain()
+        elif self.pending > _LOG_FILE_MAX_QUEUE:
+            # the writer can't keep up; block until everything is written
+            self.stalls += 1
+            self.drain()
+        elif nqueued >= _LOG_FILE_BATCH_SIZE:
+            self.write(filename)
+        elif not self.flush_call:
+            self.flush_call = _REACTOR.callLater(_LOG_FILE_BATCH_INTERVAL, self.flush)
+
+    def _write_queue(self, filehandle, filename):
+        """
+        Write all lines queued for one file as a single batch. This is
+        called in a worker thread, or directly when draining.
+
+        Args:
+            filehandle (EvenniaLogFile): The open log file.
+            filename (str): The log file, relative to the log dir.
+
+        """
+        with self.file_locks[filename]:
+            with self.lock:
+                lines = self.queues.pop(filename, None)
+                if not lines:
+                    return
+                self.pending -= len(lines)
+                self.batches += 1
+                self.lines += len(lines)
+            filehandle.write("".join(lines))
+            # since we don't close the handle, we need to flush
+            # manually or log file won't be written to until the
+            # write buffer is full.
+            filehandle.flush()
+
+    def write(self, filename):
+        """
+        Have a worker thread write the lines queued for a file. If a
+        worker is already writing to that file, the lines are instead
+        picked up when it finishes.
+
+        Args:
+            filename (str): The log file, relative to the log dir.
+
+        """
+        if filename in self.writing:
+            return
+        # save to server/logs/ directory
+        filehandle = _open_log_file(filename)
+        if not filehandle:
+            with self.lock:
+                self.pending -= len(self.queues.pop(filename, ()))
+            return
+        self.file_locks.setdefault(filename, threading.Lock())
+        self.writing.add(filename)
+
+        def errback(failure):
+            """Catching errors to normal log"""
+            log_trace()
+
+        def callback(_):
+            """Continue with lines queued during the write"""
+            self.writing.discard(filename)
+            nqueued = len(self.queues.get(filename, ()))
+            if nqueued >= _LOG_FILE_BATCH_SIZE:
+                self.write(filename)
+            elif nqueued and not self.flush_call:
+                self.flush_call = _REACTOR.callLater(_LOG_FILE_BATCH_INTERVAL, self.flush)
+
+        deferToThread(self._write_queue, filehandle, filename).addErrback(errback).addCallback(callback)
+
+    def flush(self):
+        """
+        Have worker threads write all queued lines.
+
+        """
+        if self.flush_call and self.flush_call.active():
+            self.flush_call.cancel()
+        self.flush_call = None
+        for filename in list(self.queues):
+            self.write(filename)
+
+    def drain(self, filename=None):
+        """
+        Write all queued lines synchronously, waiting for eventual
+        workers to finish with their files first.
+
+        Args:
+            filename (str, optional): Only write the lines queued for
+                this log file, relative to the log dir.
+
+        """
+        if filename is not None:
+            # also wait for a worker that is writing this file
+            filenames = [filename] if (filename in self.queues or
+                                       filename in self.writing) else []
+        else:
+            if self.flush_call and self.flush_call.active():
+                self.flush_call.cancel()
+            self.flush_call = None
+            filenames = list(self.queues)
+        for filename in filenames:
+            filehandle = _open_log_file(filename)
+            if not filehandle:
+                with self.lock:
+                    self.pending -= len(self.queues.pop(filename, ()))
+                continue
+            self.file_locks.setdefault(filename, threading.Lock())
+            try:
+                self._write_queue(filehandle, filename)
+            except Exception:
+                log_trace()
+
+
+_LOG_WRITER = _LogWriter()
+
+
 def log_file(msg, filename="game.log"):
     """
     Arbitrary file logger using threads.
@@ -382,24 +565,44 @@ def log_file(msg, filename="game.log"):
             will appear in the logs directory and log entries will start
             on new lines following datetime info.
 
+    Notes:
+        The line is buffered and written to disk in a batch with other
+        lines, see `flush_log_files`.
+
     """
-    def callback(filehandle, msg):
-        """Writing to file and flushing result"""
-        msg = "\n%s [-] %s" % (timeformat(), msg.strip())
-        filehandle.write(msg)
-        # since we don't close the handle, we need to flush
-        # manually or log file won't be written to until the
-        # write buffer is full.
-        filehandle.flush()
+    _LOG_WRITER.add(filename, "\n%s [-] %s" % (timeformat(), msg.strip()))
 
-    def errback(failure):
-        """Catching errors to normal log"""
-        log_trace()
 
-    # save to server/logs/ directory
-    filehandle = _open_log_file(filename)
-    if filehandle:
-        deferToThread(callback, filehandle, msg).addErrback(errback)
+def flush_log_files(filename=None):
+    """
+    Write all buffered `log_file` lines to disk right away. This blocks
+    until done and is called when the Server or Portal stops.
+
+    Args:
+        filename (str, optional): Only write the lines buffered for
+            this log file.
+
+    """
+    _LOG_WRITER.drain(filename)
+
+
+def log_file_stats():
+    """
+    Get statistics for the `log_file` writer.
+
+    Returns:
+        stats (dict): With keys `batches` (writes to disk), `lines`
+            (lines written), `pending` (lines waiting to be written),
+            `max_pending` (the most lines ever waiting at once) and
+            `stalls` (times the server had to wait for the writer to
+            catch up).
+
+    """
+    return {"batches": _LOG_WRITER.batches,
+            "lines": _LOG_WRITER.lines,
+            "pending": _LOG_WRITER.pending,
+            "max_pending": _LOG_WRITER.max_pending,
+            "stalls": _LOG_WRITER.stalls}
 
 
 def tail_log_file(filename, offset, nlines, callback=None):
@@ -451,6 +654,8 @@ def tail_log_file(filename, offset, nlines, callback=None):
         """Catching errors to normal log"""
         log_trace()
 
+    # make sure we see the lines still waiting to be written
+    flush_log_files(filename)
     filehandle = _open_log_file(filename)
     if filehandle:
         if callback:
@@ -11,6 +11,7 @@ from evennia.utils.idmapper.models import flush_cache
 
 
 SESSIONS.data_out = Mock()
+SESSIONS.data_out_multi = Mock()
 SESSIONS.disconnect = Mock()
 
 
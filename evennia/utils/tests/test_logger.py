@@ -0,0 +1,78 @@
+"""
+Unit tests for the buffered log_file writer of evennia.utils.logger.
+
+"""
+
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase
+from mock import patch
+from twisted.internet import defer, task
+
+from evennia.utils import logger
+
+
+def _defer_to_thread(func, *args):
+    "Run the 'threaded' call directly"
+    return defer.maybeDeferred(func, *args)
+
+
+class TestLogFile(TestCase):
+
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.clock = task.Clock()
+        self.clock.running = True
+
+    def tearDown(self):
+        for filename in list(logger._LOG_FILE_HANDLES):
+            if filename.startswith(self.logdir):
+                logger._LOG_FILE_HANDLES.pop(filename).close()
+        shutil.rmtree(self.logdir)
+
+    def _read(self):
+        with open(os.path.join(self.logdir, "test.log")) as logfile:
+            return [line.split(" [-] ", 1)[1] for line in logfile.read().split("\n") if line]
+
+    def test_batched_writes(self):
+        with patch.object(logger, "_LOGDIR", self.logdir), \
+                patch.object(logger, "_REACTOR", self.clock), \
+                patch.object(logger, "deferToThread", _defer_to_thread):
+            stats = logger.log_file_stats()
+            logger.log_file("line 1", "test.log")
+            logger.log_file("line 2", "test.log")
+            self.assertEqual(logger.log_file_stats()["pending"], stats["pending"] + 2)
+            # written in one batch after a delay
+            self.clock.advance(settings.LOG_FILE_BATCH_INTERVAL)
+            self.assertEqual(logger.log_file_stats()["pending"], stats["pending"])
+            self.assertEqual(logger.log_file_stats()["batches"], stats["batches"] + 1)
+            self.assertEqual(self._read(), ["line 1", "line 2"])
+            # written as soon as a batch is full
+            for num in range(settings.LOG_FILE_BATCH_SIZE):
+                logger.log_file("batch %i" % num, "test.log")
+            self.assertEqual(logger.log_file_stats()["batches"], stats["batches"] + 2)
+            self.assertEqual(len(self._read()), settings.LOG_FILE_BATCH_SIZE + 2)
+            # drained on demand
+            logger.log_file("last", "test.log")
+            logger.flush_log_files()
+            self.assertEqual(self._read()[-1], "last")
+            self.assertEqual(logger.log_file_stats()["pending"], stats["pending"])
+
+    def test_tail_flushes(self):
+        with patch.object(logger, "_LOGDIR", self.logdir), \
+                patch.object(logger, "_REACTOR", self.clock), \
+                patch.object(logger, "deferToThread", _defer_to_thread):
+            pending = logger.log_file_stats()["pending"]
+            logger.log_file("line 1", "test.log")
+            logger.log_file("line 2", "test.log")
+            logger.log_file("other", "other.log")
+            # the lines still waiting to be written are included
+            lines = logger.tail_log_file("test.log", 0, 10)
+            self.assertEqual([line.split(" [-] ", 1)[1].strip() for line in lines if line.strip()],
+                             ["line 1", "line 2"])
+            # other files are left for later
+            self.assertEqual(logger.log_file_stats()["pending"], pending + 1)
+            self.clock.advance(settings.LOG_FILE_BATCH_INTERVAL)
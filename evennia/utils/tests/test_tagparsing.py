@@ -4,7 +4,7 @@ Unit tests for all sorts of inline text-tag parsing, like ANSI, html conversion,
 """
 import re
 from django.test import TestCase
-from evennia.utils.ansi import ANSIString
+from evennia.utils.ansi import ANSIString, ANSIParser
 from evennia.utils.text2html import TextToHTMLparser
 from evennia.utils import inlinefuncs
 
@@ -157,6 +157,55 @@ class ANSIStringTestCase(TestCase):
         self.assertEqual(a.rstrip(), ANSIString("   |r   Test of stuff |b with spaces|n"))
         self.assertEqual(b.strip(), b)
 
+    def test_code_runs(self):
+        """
+        Verify the run-length table of codes and that derived strings share it.
+        """
+        target = ANSIString("|gThis is|rA|n")
+        self.assertEqual(list(target._code_runs), [0, 9, 16, 25, 26, 30])
+        self.assertTrue(ANSIString(target)._code_runs is target._code_runs)
+        self.checker(target[1:8], u'\x1b[1m\x1b[32mhis is\x1b[1m\x1b[31mA\x1b[0m', u'his isA')
+        self.assertEqual(list(target[1:8]._code_runs), [0, 9, 15, 24, 25, 29])
+        self.checker(target * 2, target.raw() * 2, u'This isAThis isA')
+        self.assertEqual(list((target * 2)._code_runs), [0, 9, 16, 25, 26, 39, 46, 55, 56, 60])
+        padded = target.ljust(10)
+        self.checker(padded, target.raw() + u'  ', u'This isA  ')
+        self.assertEqual(len(padded), 10)
+
+
+class ANSIParserTestCase(TestCase):
+    def setUp(self):
+        self.parser = ANSIParser()
+
+    def test_tokenize(self):
+        tokens = self.parser.tokenize("a|rb||r|123")
+        self.assertEqual(tokens[0], "a")
+        self.assertEqual(tokens[1], ("", "\033[1m\033[31m", "\033[1m\033[31m"))
+        self.assertEqual(tokens[2:5], ("b", "|", "r"))
+        self.assertEqual(tokens[5], ("", "\033[1m\033[34m", "\033[38;5;67m"))
+        self.assertTrue(self.parser.tokenize("a|rb||r|123") is tokens)
+
+    def test_render(self):
+        parse = self.parser.parse_ansi
+        self.assertEqual(parse("|[r|/x||[r{{\\"), "\033[41m\r\nx|[r{\\")
+        self.assertEqual(parse("|[r", xterm256=True), "\033[48;5;196m")
+        self.assertEqual(parse("|=a|[=z", xterm256=True), "\033[38;5;16m\033[48;5;231m")
+        self.assertEqual(parse("|r|555red|/\033[31mraw", strip_ansi=True), "red\r\nraw")
+        self.assertEqual(parse("|lclook|lthere|le"), "here")
+        self.assertEqual(parse("|lclook|lthere|le", mxp=True), "|lclook|lthere|le")
+
+    def test_parse_cache(self):
+        self.parser.parse_ansi("|rtext", xterm256=True)
+        self.parser.parse_ansi("|rtext", xterm256=True)
+        self.parser.parse_ansi("|rtext", strip_ansi=True)
+        self.assertEqual(self.parser.parse_cache.stats()["hits"], 1)
+        self.assertEqual(self.parser.parse_cache.stats()["misses"], 2)
+        self.assertEqual(self.parser.token_cache.stats()["hits"], 1)
+        self.parser.parse_cache.size_limit = 1
+        self.parser.parse_ansi("|gtext")
+        self.assertEqual(len(self.parser.parse_cache), 1)
+        self.assertEqual(self.parser.parse_cache.stats()["evictions"], 2)
+
 
 class TestTextToHTMLparser(TestCase):
     def setUp(self):
@@ -97,6 +97,10 @@ class TextToHTMLparser(object):
     re_url = re.compile(r'((?:ftp|www|https?)\W+(?:(?!\.(?:\s|$)|&\w+;)[^"\',;$*^\\(){}<>\[\]\s])+)(\.(?:\s|$)|&\w+;|)')
     re_mxplink = re.compile(r'\|lc(.*?)\|lt(.*?)\|le', re.DOTALL)
 
+    def __init__(self):
+        # html results, keyed on (text, strip_ansi)
+        self.parse_cache = ParseCache()
+
     def _sub_fg(self, colormatch):
         code, text = colormatch.groups()
         return r'''<span class="%s">%s</span>''' % (self.fg_colormap.get(code, "err"), text)
@@ -287,7 +291,16 @@ class TextToHTMLparser(object):
         Returns:
             text (str): Parsed text.
         """
-        # parse everything to ansi first
+        if not text:
+            return ''
+        # an ANSIString compares as its clean string, so it can't be cached
+        cachekey = None if hasattr(text, '_raw_string') else (text, strip_ansi)
+        if cachekey:
+            result = self.parse_cache.get(cachekey)
+            if result is not None:
+                return result
+
+        # render the markup tokens to ansi first
         text = parse_ansi(text, strip_ansi=strip_ansi, xterm256=True, mxp=True)
         # convert all ansi to html
         result = re.sub(self.re_string, self.sub_text, text)
@@ -304,6 +317,8 @@ class TextToHTMLparser(object):
         # clean out eventual ansi that was missed
         #result = parse_ansi(result, strip_ansi=True)
 
+        if cachekey:
+            self.parse_cache.set(cachekey, result)
         return result
 
 
@@ -268,7 +268,14 @@ An "emitter" object must have a function
                 // Parse the incoming data, send to emitter
                 // Incoming data is on the form [cmdname, args, kwargs]
                 data = JSON.parse(data);
-                Evennia.emit(data[0], data[1], data[2]);
+                if (data[0] === "batch") {
+                    // several messages sent in one frame
+                    for (var i = 0; i < data[1].length; i++) {
+                        Evennia.emit(data[1][i][0], data[1][i][1], data[1][i][2]);
+                    }
+                } else {
+                    Evennia.emit(data[0], data[1], data[2]);
+                }
             };
         }
 